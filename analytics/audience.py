@@ -0,0 +1,108 @@
+from bisect import bisect_right
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from .models import Audience
+
+AGE_FIELDS = {
+    '13-17': 'age_range_13_17',
+    '18-24': 'age_range_18_24',
+    '25-34': 'age_range_25_34',
+    '35-44': 'age_range_35_44',
+    '45-54': 'age_range_45_54',
+    '55+': 'age_range_55_plus',
+}
+GENDER_FIELDS = {
+    'male': 'gender_male',
+    'female': 'gender_female',
+    'other': 'gender_other',
+}
+
+def audience_as_of(account_ids, when=None):
+    # The Audience snapshot in effect at `when` (default: the newest) for
+    # each account, in one query.
+    snapshots = Audience.objects.filter(social_account_id__in=list(account_ids))
+    if when is not None:
+        snapshots = snapshots.filter(recorded_at__lte=when)
+    snapshots = snapshots.annotate(
+        rank=Window(RowNumber(), partition_by=[F('social_account_id')], order_by=[F('recorded_at').desc(), F('id').desc()])
+    ).filter(rank=1).order_by()
+    return {snapshot.social_account_id: snapshot for snapshot in snapshots}
+
+class FollowerHistory:
+    # Follower counts per account as sorted (recorded_at, followers) lists,
+    # so batch code can look up the count in effect at any time with a
+    # binary search instead of a query per row.
+    def __init__(self, series=None):
+        self.series = series or {}
+
+    @classmethod
+    def load(cls, account_ids, start=None, end=None, chunk_size=10000):
+        # Snapshots in (start, end], plus the one in effect at start so
+        # lookups at the start of the range still resolve.
+        account_ids = list(account_ids)
+        series = {}
+
+        def add(account_id, recorded_at, followers):
+            times, counts = series.setdefault(account_id, ([], []))
+            times.append(recorded_at)
+            counts.append(followers)
+
+        snapshots = Audience.objects.filter(social_account_id__in=account_ids)
+        if start is not None:
+            for snapshot in audience_as_of(account_ids, start).values():
+                add(snapshot.social_account_id, snapshot.recorded_at, snapshot.followers_count)
+            snapshots = snapshots.filter(recorded_at__gt=start)
+        if end is not None:
+            snapshots = snapshots.filter(recorded_at__lte=end)
+
+        rows = snapshots.order_by('social_account_id', 'recorded_at', 'id').values_list(
+            'social_account_id', 'recorded_at', 'followers_count'
+        )
+        for row in rows.iterator(chunk_size=chunk_size):
+            add(*row)
+        return cls(series)
+
+    def followers_at(self, account_id, when):
+        # None when the account has no snapshot at or before `when`.
+        times, counts = self.series.get(account_id, ((), ()))
+        index = bisect_right(times, when) - 1
+        return counts[index] if index >= 0 else None
+
+    def total_at(self, account_ids, when):
+        return sum(self.followers_at(account_id, when) or 0 for account_id in account_ids)
+
+def _weighted(values, weights):
+    total = sum(weights)
+    return round(sum(value * weight for value, weight in zip(values, weights)) / total, 4)
+
+def _weighted_shares(shares, weights):
+    # Percentage dicts (country -> share) merged key by key; an account
+    # that does not list a key contributes zero for it.
+    keys = {key for share in shares for key in (share or {})}
+    merged = {key: _weighted([(share or {}).get(key, 0) for share in shares], weights) for key in keys}
+    return dict(sorted(merged.items(), key=lambda item: (-item[1], item[0])))
+
+def merge_demographics(snapshots):
+    # Follower-weighted demographics across accounts (CurrentAudience or
+    # Audience rows); accounts count equally while nobody has followers.
+    snapshots = list(snapshots)
+    weights = [snapshot.followers_count for snapshot in snapshots]
+    if not sum(weights):
+        weights = [1] * len(snapshots)
+
+    return {
+        'age_distribution': {
+            label: _weighted([getattr(snapshot, field) for snapshot in snapshots], weights)
+            for label, field in AGE_FIELDS.items()
+        },
+        'gender_distribution': {
+            label: _weighted([getattr(snapshot, field) for snapshot in snapshots], weights)
+            for label, field in GENDER_FIELDS.items()
+        },
+        'top_countries': _weighted_shares([snapshot.top_countries for snapshot in snapshots], weights),
+        'top_cities': _weighted_shares([snapshot.top_cities for snapshot in snapshots], weights),
+        'followers_count': sum(snapshot.followers_count for snapshot in snapshots),
+        'following_count': sum(snapshot.following_count for snapshot in snapshots),
+        'recorded_at': max(snapshot.recorded_at for snapshot in snapshots),
+        'accounts': len(snapshots),
+    }
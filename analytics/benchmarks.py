@@ -0,0 +1,297 @@
+import json
+import math
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from . import tasks
+from .cache import bump_generation
+from .models import *
+from .synthetic import USERNAME_PREFIX
+from accounts.models import User
+
+# Actions that reach outside the process are skipped unless asked for.
+EXTERNAL_ACTIONS = {'social-accounts-sync'}
+EXTERNAL_TASKS = {'sync_all_social_accounts', 'sync_social_accounts', 'sync_social_account', 'sync_competitor_data',
+                  'sync_competitors_batch'}
+
+NLQ_QUERY = 'top 10 reels by engagement in the last 30 days'
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark_user(email=None):
+    users = User.objects.all()
+    if email:
+        return users.get(email=email)
+    return users.filter(username__startswith=USERNAME_PREFIX).order_by('id').first()
+
+class QueryCounter:
+    # Counts statements through an execute wrapper; unlike
+    # CaptureQueriesContext it does not depend on connection.queries_log,
+    # which stops growing once it holds 9000 entries.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+class BenchmarkRunner:
+    def __init__(self, user, repeat=20, warmup=2, warm_cache=False, include_external=False, only=None):
+        self.user = user
+        self.repeat = repeat
+        self.warmup = warmup
+        self.warm_cache = warm_cache
+        self.include_external = include_external
+        self.only = only
+        self.client = APIClient()
+        # Not saved: lets the run reach admin-only actions such as cache_stats.
+        user.is_staff = True
+        self.client.force_authenticate(user)
+
+    def selected(self, name):
+        return not self.only or any(pattern in name for pattern in self.only)
+
+    def rolled_back(self, call):
+        with transaction.atomic():
+            outcome = call()
+            transaction.set_rollback(True)
+        return outcome
+
+    def measure(self, call):
+        # Every call is rolled back, so each sample starts from the same data
+        # and writes (ingested records, rebuilt patterns) are not kept.
+        for _ in range(self.warmup):
+            self.rolled_back(call)
+
+        durations = []
+        queries = []
+        for _ in range(self.repeat):
+            if not self.warm_cache:
+                bump_generation([self.user.id])
+            counter = QueryCounter()
+            # The savepoint and its rollback stay outside the timed block.
+            with transaction.atomic():
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    outcome = call()
+                    durations.append(time.perf_counter() - started)
+                transaction.set_rollback(True)
+            queries.append(counter.count)
+
+        # Tracing slows everything down, so peak memory gets its own pass.
+        if not self.warm_cache:
+            bump_generation([self.user.id])
+        tracemalloc.start()
+        try:
+            self.rolled_back(call)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'p50_ms': round(percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 95) * 1000, 3),
+            'mean_ms': round(statistics.fmean(durations) * 1000, 3),
+            'queries': percentile(queries, 50),
+            'queries_max': max(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'result': outcome,
+        }
+
+    def fixtures(self):
+        user = self.user
+        account = user.social_accounts.order_by('id').first()
+        report, _ = Report.objects.get_or_create(
+            user=user, title='Benchmark report',
+            defaults={'report_type': 'performance', 'format': 'json'}
+        )
+        query = Query.objects.filter(user=user).order_by('id').first() or Query.objects.create(
+            user=user, query_text=NLQ_QUERY
+        )
+        if account and not ContentStrategy.objects.filter(user=user).exists():
+            ContentStrategy.objects.create(
+                user=user, social_account=account, title='Benchmark strategy', description='Benchmark strategy'
+            )
+        # Task samples are rolled back, so the insight and report file the
+        # detail actions read are made here.
+        if not AIInsight.objects.filter(user=user).exists():
+            AIInsight.objects.create(
+                user=user, social_account=account, insight_type='recommendation',
+                title='Benchmark insight', description='Benchmark insight'
+            )
+        if not report.file:
+            tasks.generate_report(report.id)
+            report.refresh_from_db()
+        return SimpleNamespace(
+            account=account,
+            report=report,
+            query=query,
+            competitor_ids=list(user.competitors.values_list('id', flat=True)),
+            post_id=Post.objects.filter(social_account__user=user).values_list('post_id', flat=True).first(),
+            hashtag_id=PostHashtag.objects.filter(
+                post__social_account__user=user
+            ).values_list('hashtag_id', flat=True).first(),
+        )
+
+    def task_calls(self, fixtures):
+        account_ids = list(self.user.social_accounts.values_list('id', flat=True))
+        return {
+            'sync_all_social_accounts': tasks.sync_all_social_accounts,
+            'sync_social_accounts': lambda: tasks.sync_social_accounts(account_ids),
+            'sync_social_account': lambda: tasks.sync_social_account(fixtures.account.id),
+            'update_engagement_patterns': tasks.update_engagement_patterns,
+            'update_engagement_patterns(full=True)': lambda: tasks.update_engagement_patterns(
+                full=True, account_ids=account_ids
+            ),
+            'generate_ai_insights': tasks.generate_ai_insights,
+            'sync_competitor_data': tasks.sync_competitor_data,
+            'sync_competitors_batch': lambda: tasks.sync_competitors_batch(fixtures.competitor_ids),
+            'generate_report': lambda: tasks.generate_report(fixtures.report.id),
+            'process_nlp_query': lambda: tasks.process_nlp_query(fixtures.query.id),
+            'update_daily_rollups': tasks.update_daily_rollups,
+            'rebuild_hashtag_stats': lambda: tasks.rebuild_hashtag_stats(user_ids=[self.user.id]),
+            'score_comment_sentiment': tasks.score_comment_sentiment,
+            'recompute_engagement_rates': lambda: tasks.recompute_engagement_rates(account_ids=account_ids),
+        }
+
+    def request_options(self, name, fixtures):
+        if name == 'competitors-comparison':
+            return {'data': {'competitor_ids[]': fixtures.competitor_ids}}
+        if name == 'hashtags-performance':
+            return {'data': {'hashtag_id': fixtures.hashtag_id}}
+        if name == 'queries-execute':
+            return {'data': {'query_text': NLQ_QUERY}, 'format': 'json'}
+        if name == 'content-strategies-generate':
+            return {'data': {'account_id': fixtures.account.id}, 'format': 'json'}
+        if name == 'ingest-batch':
+            record = {'type': 'metrics', 'post_id': fixtures.post_id, 'likes_count': 1, 'reach': 10}
+            return {'data': json.dumps(record) + '\n', 'content_type': 'application/x-ndjson'}
+        return {}
+
+    def detail_pk(self, viewset):
+        view = viewset(request=SimpleNamespace(user=self.user, query_params={}), format_kwarg=None, kwargs={})
+        return view.get_queryset().order_by('pk').values_list('pk', flat=True).first()
+
+    def endpoint_calls(self, fixtures):
+        from .urls import router
+
+        calls = {}
+        for _, viewset, basename in router.registry:
+            for extra in viewset.get_extra_actions():
+                name = f'{basename}-{extra.url_name}'
+                if name in EXTERNAL_ACTIONS and not self.include_external:
+                    continue
+                args = []
+                if extra.detail:
+                    pk = self.detail_pk(viewset)
+                    if pk is None:
+                        calls[name] = None
+                        continue
+                    args = [pk]
+                url = reverse(name, args=args)
+                options = self.request_options(name, fixtures)
+                for method in extra.mapping:
+                    calls[f'{method.upper()} {name}'] = (getattr(self.client, method), url, options)
+        return calls
+
+    def run_tasks(self, fixtures):
+        results = {}
+        for name, call in self.task_calls(fixtures).items():
+            if not self.selected(name) or name in EXTERNAL_TASKS and not self.include_external:
+                continue
+            measured = self.measure(call)
+            measured['result'] = str(measured['result'])
+            results[name] = measured
+        return results
+
+    def run_endpoints(self, fixtures):
+        results = {}
+        for name, call in self.endpoint_calls(fixtures).items():
+            if not self.selected(name):
+                continue
+            if call is None:
+                results[name] = {'skipped': 'no object to run the detail action on'}
+                continue
+            method, url, options = call
+            measured = self.measure(lambda: method(url, **options).status_code)
+            measured['status'] = measured.pop('result')
+            results[name] = measured
+        return results
+
+    def run(self):
+        from social_analytics.celery import app
+
+        # Run .delay() inline so queued work is part of what gets measured.
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        try:
+            # The fixtures are rolled back with everything else, and files
+            # go to a throwaway MEDIA_ROOT, so a run leaves no trace.
+            with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+                with transaction.atomic():
+                    fixtures = self.fixtures()
+                    task_results = self.run_tasks(fixtures)
+                    endpoint_results = self.run_endpoints(fixtures)
+                    transaction.set_rollback(True)
+        finally:
+            app.conf.task_always_eager = eager
+
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'user': self.user.email,
+                'repeat': self.repeat,
+                'warm_cache': self.warm_cache,
+                'dataset': {
+                    'accounts': self.user.social_accounts.count(),
+                    'posts': Post.objects.filter(social_account__user=self.user).count(),
+                    'post_metrics': PostMetrics.objects.filter(post__social_account__user=self.user).count(),
+                    'comments': Comment.objects.filter(post__social_account__user=self.user).count(),
+                    'audience': Audience.objects.filter(social_account__user=self.user).count(),
+                    'competitors': len(fixtures.competitor_ids),
+                },
+            },
+            'tasks': task_results,
+            'endpoints': endpoint_results,
+        }
+
+def compare_results(baseline, current):
+    rows = []
+    for section in ('tasks', 'endpoints'):
+        for name, result in sorted(current.get(section, {}).items()):
+            before = baseline.get(section, {}).get(name)
+            if not before or 'p50_ms' not in before or 'p50_ms' not in result:
+                continue
+            change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+            rows.append({
+                'name': name,
+                'p50_ms': (before['p50_ms'], result['p50_ms']),
+                'p50_change_percent': round(change, 1),
+                'queries': (before['queries'], result['queries']),
+            })
+    return rows
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from functools import wraps
+from django.core.cache import cache
+from rest_framework.response import Response
+
+GENERATION_KEY = 'analytics:generation:{user_id}'
+STATS_KEY = 'analytics:stats:{name}:{kind}'
+CACHED_ACTIONS = set()
+
+def _incr(key, delta=1, timeout=None):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
+
+def get_generation(user_id):
+    return cache.get(GENERATION_KEY.format(user_id=user_id), 0)
+
+def bump_generation(user_ids):
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    for user_id in user_ids:
+        _incr(GENERATION_KEY.format(user_id=user_id))
+    if user_ids:
+        _incr(STATS_KEY.format(name='all', kind='invalidations'), len(user_ids))
+
+def bump_generation_for_accounts(account_ids):
+    from accounts.models import SocialMediaAccount
+    
+    bump_generation(SocialMediaAccount.objects.filter(
+        id__in=set(account_ids)
+    ).values_list('user_id', flat=True).distinct())
+
+def user_cache_key(user_id, name, payload):
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'analytics:response:{name}:{user_id}:{get_generation(user_id)}:{digest}'
+
+def build_cache_key(user_id, name, query_params):
+    params = sorted((key, sorted(values)) for key, values in query_params.lists())
+    return user_cache_key(user_id, name, params)
+
+def record_lookup(name, hit):
+    _incr(STATS_KEY.format(name=name, kind='hits' if hit else 'misses'))
+
+def cached_action(func):
+    name = func.__qualname__
+    
+    @wraps(func)
+    def wrapper(self, request, *args, **kwargs):
+        key = build_cache_key(request.user.id, name, request.query_params)
+        
+        data = cache.get(key)
+        record_lookup(name, data is not None)
+        if data is not None:
+            return Response(data)
+        
+        response = func(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return response
+    
+    CACHED_ACTIONS.add(name)
+    return wrapper
+
+def get_cache_stats(names=None):
+    names = sorted(names or CACHED_ACTIONS)
+    keys = {
+        (name, kind): STATS_KEY.format(name=name, kind=kind)
+        for name in names for kind in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()) + [STATS_KEY.format(name='all', kind='invalidations')])
+    
+    actions = {}
+    for (name, kind), key in keys.items():
+        actions.setdefault(name, {})[kind] = values.get(key, 0)
+    
+    for counters in actions.values():
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / lookups if lookups else 0
+    
+    return {
+        'actions': actions,
+        'invalidations': values.get(STATS_KEY.format(name='all', kind='invalidations'), 0),
+    }
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import httpx
+from django.db.models import OuterRef, Subquery
+from .models import Competitor, CompetitorMetrics
+from .sync import group_by_platform, platform_client, sync_settings
+
+SNAPSHOT_FIELDS = ['followers_count', 'following_count', 'posts_count', 'avg_engagement_rate', 'avg_likes', 'avg_comments']
+
+def update_latest_metrics(snapshots):
+    # Point each competitor at the newest of the given snapshots, unless it
+    # already points at something newer.
+    newest = {}
+    for snapshot in snapshots:
+        held = newest.get(snapshot.competitor_id)
+        if held is None or (snapshot.recorded_at, snapshot.pk) > (held.recorded_at, held.pk):
+            newest[snapshot.competitor_id] = snapshot
+    if not newest:
+        return 0
+
+    competitors = Competitor.objects.filter(id__in=list(newest)).select_related('latest_metrics')
+    changed = []
+    for competitor in competitors:
+        snapshot = newest[competitor.id]
+        current = competitor.latest_metrics
+        if current is None or (snapshot.recorded_at, snapshot.pk) > (current.recorded_at, current.pk):
+            competitor.latest_metrics = snapshot
+            changed.append(competitor)
+    Competitor.objects.bulk_update(changed, ['latest_metrics'], batch_size=1000)
+    return len(changed)
+
+def rebuild_latest_metrics(competitor_ids=None):
+    competitors = Competitor.objects.all()
+    if competitor_ids is not None:
+        competitors = competitors.filter(id__in=competitor_ids)
+    return competitors.update(latest_metrics=Subquery(
+        CompetitorMetrics.objects.filter(competitor=OuterRef('pk')).order_by('-recorded_at', '-id').values('id')[:1]
+    ))
+
+def to_snapshot(competitor, profile):
+    return CompetitorMetrics(
+        competitor=competitor,
+        **{field: profile.get(field) or 0 for field in SNAPSHOT_FIELDS}
+    )
+
+class CompetitorSyncEngine:
+    def __init__(self, options=None):
+        self.options = dict(sync_settings(), **(options or {}))
+        self.snapshots = []
+        self.failed = {}
+
+    async def _fetch(self, client, competitors):
+        # Every competitor here tracks the same platform account.
+        try:
+            profile = await client.fetch_profile(competitors[0])
+        except httpx.HTTPError as exc:
+            for competitor in competitors:
+                self.failed[competitor.id] = str(exc) or exc.__class__.__name__
+            return
+        self.snapshots.extend(to_snapshot(competitor, profile) for competitor in competitors)
+
+    async def _sync_platform(self, platform, competitors):
+        # Several users may track the same account; fetch it once.
+        by_account = {}
+        for competitor in competitors:
+            by_account.setdefault(competitor.account_id, []).append(competitor)
+
+        client = platform_client(platform, self.options)
+        try:
+            await asyncio.gather(*(self._fetch(client, tracked) for tracked in by_account.values()))
+        finally:
+            await client.close()
+        return client.requests
+
+    async def _run(self, competitors):
+        requests = await asyncio.gather(*(
+            self._sync_platform(platform, platform_competitors)
+            for platform, platform_competitors in group_by_platform(competitors).items()
+        ))
+        return sum(requests)
+
+    def run(self, competitors):
+        started = time.perf_counter()
+        competitors = list(competitors)
+
+        requests = asyncio.run(self._run(competitors))
+        created = CompetitorMetrics.objects.bulk_create(self.snapshots, batch_size=1000)
+        update_latest_metrics(created)
+
+        return {
+            'competitors': len(competitors),
+            'synced': len(created),
+            'failed': self.failed,
+            'requests': requests,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+        }
+
+def sync_competitors(competitors, **options):
+    return CompetitorSyncEngine(options).run(competitors)
@@ -0,0 +1,165 @@
+import numpy as np
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Audience, PostMetrics, PostCurrentMetrics
+from .audience import FollowerHistory
+from .rollups import RAW_WINDOW_DAYS, refresh_daily_rollups
+from .retention import HOURLY_DAYS
+from .hashtags import sync_hashtag_stats
+from .cache import bump_generation_for_accounts
+
+CHUNK_SIZE = 100000
+UPDATE_BATCH_SIZE = 2000
+# Stored rates closer than this to the recomputed value are left alone.
+TOLERANCE = 1e-6
+QUARTER_HOUR = 900
+
+RATIO_FIELDS = ['engagement_rate', 'reach_rate', 'save_rate', 'virality_rate']
+
+COLUMNS = ['id', 'post_id', 'post__social_account_id', 'recorded_at', 'likes_count', 'comments_count',
+           'shares_count', 'saves_count', 'reach', 'impressions', 'engagement_rate']
+
+def _ratio(numerator, denominator):
+    return np.divide(
+        numerator * 100.0, denominator,
+        out=np.zeros(len(numerator), dtype=np.float64), where=denominator > 0
+    )
+
+def compute_ratios(columns, followers):
+    # Vectorized counterparts of utils.calculate_engagement_rate and friends;
+    # a zero denominator gives 0.0 like the scalar version.
+    interactions = columns['likes_count'] + columns['comments_count'] + columns['shares_count']
+    return {
+        'engagement_rate': _ratio(interactions, followers),
+        'reach_rate': _ratio(columns['reach'], followers),
+        'save_rate': _ratio(columns['saves_count'], columns['reach']),
+        'virality_rate': _ratio(columns['shares_count'], columns['impressions']),
+    }
+
+def load_columns(rows):
+    rows = list(rows)
+    ids, post_ids, account_ids, recorded_at, *counts, rates = zip(*rows) if rows else [()] * len(COLUMNS)
+    columns = {
+        'id': np.array(ids, dtype=np.int64),
+        'post_id': np.array(post_ids, dtype=np.int64),
+        'account_id': np.array(account_ids, dtype=np.int64),
+        'recorded_at': np.array([value.timestamp() for value in recorded_at], dtype=np.float64),
+        'engagement_rate': np.array(rates, dtype=np.float64),
+    }
+    for field, values in zip(COLUMNS[4:-1], counts):
+        columns[field] = np.array(values, dtype=np.int64)
+    return columns
+
+class FollowerSeries:
+    # FollowerHistory as NumPy arrays of epoch seconds, so a whole chunk of
+    # snapshots is resolved with one searchsorted per account.
+    def __init__(self, account_ids):
+        self.series = {
+            account_id: (
+                np.array([recorded_at.timestamp() for recorded_at in times], dtype=np.float64),
+                np.array(counts, dtype=np.int64)
+            )
+            for account_id, (times, counts) in FollowerHistory.load(account_ids, chunk_size=CHUNK_SIZE).series.items()
+        }
+
+    def as_of(self, account_ids, timestamps):
+        # Followers in effect at each timestamp, -1 for accounts without any
+        # Audience rows. Snapshots taken before an account's first Audience
+        # row fall back to that first row.
+        followers = np.full(len(account_ids), -1, dtype=np.int64)
+        order = np.argsort(account_ids, kind='stable')
+        accounts, starts = np.unique(account_ids[order], return_index=True)
+        for account_id, start, end in zip(accounts.tolist(), starts, [*starts[1:], len(order)]):
+            if account_id not in self.series:
+                continue
+            times, counts = self.series[account_id]
+            rows = order[start:end]
+            index = np.searchsorted(times, timestamps[rows], side='right') - 1
+            followers[rows] = counts[np.maximum(index, 0)]
+        return followers
+
+def recompute_engagement(account_ids=None, since=None, chunk_size=CHUNK_SIZE, progress=None):
+    snapshots = PostMetrics.objects.order_by('id')
+    if account_ids is not None:
+        snapshots = snapshots.filter(post__social_account_id__in=account_ids)
+    if since is not None:
+        snapshots = snapshots.filter(recorded_at__gte=since)
+
+    accounts = account_ids
+    if accounts is None:
+        accounts = Audience.objects.order_by().values_list('social_account_id', flat=True).distinct()
+    followers = FollowerSeries(list(accounts))
+
+    tzinfo = timezone.get_current_timezone()
+    sealed_before = timezone.localdate() - timedelta(days=RAW_WINDOW_DAYS)
+    # Older days may already be thinned to one snapshot per post, and a
+    # rollup rebuilt from those would lose the removed snapshots' counts.
+    thinned_before = timezone.localdate() - timedelta(days=HOURLY_DAYS)
+    stale_days = {}
+    changed_posts = set()
+    changed_accounts = set()
+    # Only engagement_rate has a column; the other ratios are reported as
+    # averages over the scanned snapshots.
+    ratio_sums = dict.fromkeys(RATIO_FIELDS, 0.0)
+    scanned = updated = 0
+    last_id = 0
+    while True:
+        columns = load_columns(snapshots.filter(id__gt=last_id).values_list(*COLUMNS)[:chunk_size])
+        if not len(columns['id']):
+            break
+        last_id = int(columns['id'][-1])
+        scanned += len(columns['id'])
+
+        counts = followers.as_of(columns['account_id'], columns['recorded_at'])
+        ratios = compute_ratios(columns, counts)
+        for field in RATIO_FIELDS:
+            ratio_sums[field] += float(ratios[field].sum())
+
+        # Without any follower history the stored rate is all there is.
+        rates = ratios['engagement_rate']
+        changed = np.flatnonzero((counts >= 0) & (np.abs(rates - columns['engagement_rate']) > TOLERANCE))
+        if len(changed):
+            _write_rates(columns['id'][changed], rates[changed])
+            updated += len(changed)
+            changed_posts.update(columns['post_id'][changed].tolist())
+            changed_accounts.update(columns['account_id'][changed].tolist())
+            # Distinct (account, quarter hour) pairs first, so local dates are
+            # worked out per bucket rather than per snapshot; no UTC offset
+            # splits a quarter hour across two local days.
+            buckets = np.unique(np.stack([
+                columns['account_id'][changed], columns['recorded_at'][changed] // QUARTER_HOUR
+            ], axis=1), axis=0)
+            for account_id, bucket in buckets.tolist():
+                day = datetime.fromtimestamp(bucket * QUARTER_HOUR, tzinfo).date()
+                if thinned_before <= day < sealed_before:
+                    stale_days.setdefault(day, set()).add(int(account_id))
+        if progress:
+            progress(scanned, updated)
+
+    # Sealed rollups and hashtag stats were built from the old rates.
+    for day, day_accounts in stale_days.items():
+        refresh_daily_rollups([day], account_ids=day_accounts)
+    sync_hashtag_stats(post_ids=changed_posts)
+    bump_generation_for_accounts(changed_accounts)
+
+    return {
+        'scanned': scanned,
+        'updated': updated,
+        'posts': len(changed_posts),
+        'averages': {field: round(total / scanned, 4) if scanned else 0.0 for field, total in ratio_sums.items()},
+    }
+
+def _write_rates(ids, rates):
+    rates_by_id = dict(zip(ids.tolist(), rates.tolist()))
+    with transaction.atomic():
+        PostMetrics.objects.bulk_update(
+            [PostMetrics(id=snapshot_id, engagement_rate=rate) for snapshot_id, rate in rates_by_id.items()],
+            ['engagement_rate'],
+            batch_size=UPDATE_BATCH_SIZE
+        )
+        # Keep the current-metrics copy of any rewritten snapshot in step.
+        current = list(PostCurrentMetrics.objects.filter(metrics_id__in=list(rates_by_id)).only('post_id', 'metrics_id'))
+        for row in current:
+            row.engagement_rate = rates_by_id[row.metrics_id]
+        PostCurrentMetrics.objects.bulk_update(current, ['engagement_rate'], batch_size=UPDATE_BATCH_SIZE)
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+# The export actions stream their own responses; these renderers only see
+# the other payloads a list request can produce (validation errors, 401s,
+# a single object), which they write as one record per row or line.
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        records = _records(data)
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for record in records:
+            writer.writerow([_csv_cell(record.get(column)) for column in columns])
+        return buffer.getvalue().encode(self.charset)
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        lines = [json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in _records(data)]
+        return ''.join(lines).encode(self.charset)
+
+EXPORT_RENDERERS = {
+    'csv': CSVRenderer,
+    'ndjson': NDJSONRenderer,
+}
+
+class _Echo:
+    def write(self, value):
+        return value
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def _csv_cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return _csv_value(value)
+
+def _records(data):
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        data = data['results']
+    if data is None:
+        return []
+    if not isinstance(data, list):
+        data = [data]
+    return [record if isinstance(record, dict) else {'value': record} for record in data]
+
+def iter_export_rows(queryset, export_fields, chunk_size=EXPORT_CHUNK_SIZE):
+    columns = list(export_fields)
+    rows = queryset.values_list(*export_fields.values()).iterator(chunk_size=chunk_size)
+    return columns, rows
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+def stream_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+def streaming_export_response(queryset, export_fields, export_format, filename):
+    columns, rows = iter_export_rows(queryset, export_fields)
+    stream = stream_csv if export_format == 'csv' else stream_ndjson
+    
+    response = StreamingHttpResponse(
+        stream(columns, rows),
+        content_type=EXPORT_RENDERERS[export_format].media_type
+    )
+    stamp = timezone.localtime().strftime('%Y%m%d%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{export_format}"'
+    return response
+
+class StreamingExportMixin:
+    export_fields = {}
+    export_filename = 'export'
+    
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == 'list':
+            renderers += [renderer() for renderer in EXPORT_RENDERERS.values()]
+        return renderers
+    
+    def list(self, request, *args, **kwargs):
+        export_format = request.accepted_renderer.format
+        if export_format not in EXPORT_RENDERERS:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export_response(queryset, self.export_fields, export_format, self.export_filename)
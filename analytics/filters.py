@@ -1,15 +1,16 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 from .models import Post, PostMetrics
 
 class PostFilter(filters.FilterSet):
     date_from = filters.DateTimeFilter(field_name='posted_at', lookup_expr='gte')
     date_to = filters.DateTimeFilter(field_name='posted_at', lookup_expr='lte')
-    min_likes = filters.NumberFilter(field_name='metrics__likes_count', lookup_expr='gte')
-    min_engagement = filters.NumberFilter(field_name='metrics__engagement_rate', lookup_expr='gte')
+    min_likes = filters.NumberFilter(field_name='current_metrics__likes_count', lookup_expr='gte')
+    min_engagement = filters.NumberFilter(field_name='current_metrics__engagement_rate', lookup_expr='gte')
     
     class Meta:
         model = Post
-        fields = ['content_type', 'social_account__platform', 'date_from', 'date_to']
+        fields = ['content_type', 'social_account__platform', 'social_account', 'date_from', 'date_to']
 
 class PostMetricsFilter(filters.FilterSet):
     date_from = filters.DateTimeFilter(field_name='recorded_at', lookup_expr='gte')
@@ -17,4 +18,22 @@ class PostMetricsFilter(filters.FilterSet):
     
     class Meta:
         model = PostMetrics
-        fields = ['post', 'date_from', 'date_to']
\ No newline at end of file
+        fields = ['post', 'date_from', 'date_to']
+class AliasedOrderingFilter(OrderingFilter):
+    # view.ordering_aliases maps older ?ordering= names onto the fields
+    # they now sort by, so existing clients keep working.
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        aliases = getattr(view, 'ordering_aliases', {})
+        resolved = []
+        for term in fields:
+            descending = term.startswith('-')
+            name = aliases.get(term.lstrip('-'), term.lstrip('-'))
+            resolved.append(f'-{name}' if descending else name)
+        return super().remove_invalid_fields(queryset, resolved, view, request)
+
+    def filter_queryset(self, request, queryset, view):
+        # A full-text search already ordered by rank; only an explicit
+        # ?ordering= replaces that with the view's fields.
+        if self.ordering_param not in request.query_params and 'search_rank' in queryset.query.annotations:
+            return queryset
+        return super().filter_queryset(request, queryset, view)
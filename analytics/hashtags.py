@@ -0,0 +1,181 @@
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+from .models import Hashtag, PostHashtag, HashtagDailyStats
+from .rollups import day_bounds
+
+# A tag starts after whitespace or punctuation (not inside a word, URL
+# fragment or HTML entity) and runs over Unicode letters, digits, marks and
+# underscores.
+HASHTAG_PATTERN = re.compile(r'(?<![\w&/#])[#\uFF03]([\w\u0300-\u036f\u200c\u200d]+)')
+MAX_TAG_LENGTH = Hashtag._meta.get_field('tag').max_length
+TAG_CACHE_SIZE = 50000
+
+def normalize_tag(tag):
+    tag = unicodedata.normalize('NFKC', tag.strip().lstrip('#\uFF03')).casefold()
+    return tag[:MAX_TAG_LENGTH]
+
+def extract_hashtags(caption):
+    if not caption or '#' not in caption and '\uFF03' not in caption:
+        return []
+    tags = []
+    for match in HASHTAG_PATTERN.finditer(caption):
+        tag = normalize_tag(match.group(1))
+        if tag and not tag.isdigit() and tag not in tags:
+            tags.append(tag)
+    return tags
+
+class HashtagIdCache:
+    def __init__(self, maxsize=TAG_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.ids = OrderedDict()
+
+    def clear(self):
+        self.ids.clear()
+
+    def resolve(self, tags):
+        resolved = {}
+        missing = set()
+        for tag in set(tags):
+            if tag in self.ids:
+                self.ids.move_to_end(tag)
+                resolved[tag] = self.ids[tag]
+            else:
+                missing.add(tag)
+
+        if missing:
+            Hashtag.objects.bulk_create([Hashtag(tag=tag) for tag in missing], batch_size=1000, ignore_conflicts=True)
+            found = dict(Hashtag.objects.filter(tag__in=missing).values_list('tag', 'id'))
+            resolved.update(found)
+            # Only cache ids once they are committed, so a rolled back chunk
+            # cannot leave ids behind that point at nothing.
+            transaction.on_commit(lambda: self.remember(found))
+
+        return resolved
+
+    def remember(self, ids):
+        self.ids.update(ids)
+        while len(self.ids) > self.maxsize:
+            self.ids.popitem(last=False)
+
+tag_ids = HashtagIdCache()
+
+def link_hashtags(pairs):
+    pairs = {(post_id, normalize_tag(tag)) for post_id, tag in pairs}
+    pairs = {(post_id, tag) for post_id, tag in pairs if tag}
+    if not pairs:
+        return 0
+
+    ids = tag_ids.resolve(tag for _, tag in pairs)
+    PostHashtag.objects.bulk_create(
+        [PostHashtag(post_id=post_id, hashtag_id=ids[tag]) for post_id, tag in pairs],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    return len(pairs)
+
+def link_caption_hashtags(posts):
+    return link_hashtags(
+        (post_id, tag)
+        for post_id, caption in posts
+        for tag in extract_hashtags(caption)
+    )
+
+def _stat_rows(links, **group):
+    return links.order_by().values(
+        'hashtag_id', user_id=F('post__social_account__user_id'), **group
+    ).annotate(
+        usage_count=Count('id'),
+        engagement_sum=Sum('post__current_metrics__engagement_rate'),
+        likes_sum=Sum('post__current_metrics__likes_count')
+    )
+
+def _stat(row, day):
+    return HashtagDailyStats(
+        user_id=row['user_id'],
+        hashtag_id=row['hashtag_id'],
+        date=day,
+        usage_count=row['usage_count'],
+        engagement_sum=row['engagement_sum'] or 0.0,
+        likes_sum=row['likes_sum'] or 0
+    )
+
+def stat_keys(post_ids):
+    keys = {}
+    rows = PostHashtag.objects.filter(post_id__in=set(post_ids)).values_list(
+        'hashtag_id', 'post__posted_at', 'post__social_account__user_id'
+    )
+    for hashtag_id, posted_at, user_id in rows:
+        user_ids, hashtag_ids = keys.setdefault(timezone.localdate(posted_at), (set(), set()))
+        user_ids.add(user_id)
+        hashtag_ids.add(hashtag_id)
+    return keys
+
+def refresh_hashtag_stats(day, user_ids, hashtag_ids=None):
+    start, end = day_bounds(day)
+    links = PostHashtag.objects.filter(
+        post__social_account__user_id__in=user_ids,
+        post__posted_at__gte=start,
+        post__posted_at__lt=end
+    )
+    existing = HashtagDailyStats.objects.filter(user_id__in=user_ids, date=day)
+    if hashtag_ids is not None:
+        links = links.filter(hashtag_id__in=hashtag_ids)
+        existing = existing.filter(hashtag_id__in=hashtag_ids)
+
+    stats = [_stat(row, day) for row in _stat_rows(links)]
+    with transaction.atomic():
+        existing.delete()
+        HashtagDailyStats.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
+
+def sync_hashtag_stats(post_ids=(), keys=None):
+    if keys is None:
+        keys = stat_keys(post_ids) if post_ids else {}
+    for day, (user_ids, hashtag_ids) in keys.items():
+        refresh_hashtag_stats(day, user_ids, hashtag_ids)
+
+def rebuild_hashtag_stats(days=None, batch_size=5000, user_ids=None):
+    links = PostHashtag.objects.all()
+    existing = HashtagDailyStats.objects.all()
+    if user_ids is not None:
+        links = links.filter(post__social_account__user_id__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+    if days is not None:
+        first_day = timezone.localdate() - timedelta(days=days)
+        links = links.filter(post__posted_at__gte=day_bounds(first_day)[0])
+        existing = existing.filter(date__gte=first_day)
+
+    rows = _stat_rows(links, day=TruncDate('post__posted_at', tzinfo=timezone.get_current_timezone()))
+
+    created = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(_stat(row, row['day']))
+            if len(batch) >= batch_size:
+                HashtagDailyStats.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        HashtagDailyStats.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+def trending_hashtags(user, days=30, limit=20):
+    date_from = timezone.localdate() - timedelta(days=days)
+
+    return HashtagDailyStats.objects.filter(
+        user=user,
+        date__gte=date_from
+    ).values('hashtag_id').annotate(
+        tag=F('hashtag__tag'),
+        avg_engagement=Cast(Sum('engagement_sum'), FloatField()) / Sum('usage_count'),
+        likes=Sum('likes_sum'),
+        usage_count=Sum('usage_count')
+    ).order_by('-usage_count', '-avg_engagement', 'hashtag_id')[:limit]
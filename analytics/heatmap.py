@@ -0,0 +1,140 @@
+import struct
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Cast
+from .models import EngagementPattern, EngagementHeatmap
+
+DAYS = 7
+HOURS = 24
+CELLS = DAYS * HOURS
+
+# Per-cell averages; counts are stored separately so grids can be merged.
+AVERAGE_FIELDS = ['engagement_rate', 'likes', 'comments', 'shares']
+PATTERN_FIELDS = {
+    'engagement_rate': 'avg_engagement_rate',
+    'likes': 'avg_likes',
+    'comments': 'avg_comments',
+    'shares': 'avg_shares',
+}
+
+# Version byte, four float32 average channels, one uint32 post count channel;
+# cell index is day_of_week * 24 + hour_of_day.
+GRID_VERSION = 1
+GRID_FORMAT = struct.Struct(f'<B{CELLS * len(AVERAGE_FIELDS)}f{CELLS}I')
+
+# A slot with this many posts gets half weight against the account average.
+CONFIDENCE_PRIOR = 3
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def empty_grid():
+    grid = {field: [0.0] * CELLS for field in AVERAGE_FIELDS}
+    grid['post_count'] = [0] * CELLS
+    return grid
+
+def pack_grid(grid):
+    values = [value for field in AVERAGE_FIELDS for value in grid[field]]
+    return GRID_FORMAT.pack(GRID_VERSION, *values, *grid['post_count'])
+
+def unpack_grid(data):
+    values = GRID_FORMAT.unpack(bytes(data))
+    if values[0] != GRID_VERSION:
+        raise ValueError(f'Unsupported heatmap grid version {values[0]}')
+    grid = {
+        field: list(values[1 + index * CELLS:1 + (index + 1) * CELLS])
+        for index, field in enumerate(AVERAGE_FIELDS)
+    }
+    grid['post_count'] = list(values[1 + len(AVERAGE_FIELDS) * CELLS:])
+    return grid
+
+def merge_grids(grids):
+    # Post-count weighted average of every cell.
+    merged = empty_grid()
+    for grid in grids:
+        for cell, count in enumerate(grid['post_count']):
+            if not count:
+                continue
+            total = merged['post_count'][cell] + count
+            for field in AVERAGE_FIELDS:
+                merged[field][cell] += (grid[field][cell] - merged[field][cell]) * count / total
+            merged['post_count'][cell] = total
+    return merged
+
+def refresh_heatmaps(account_ids=None):
+    patterns = EngagementPattern.objects.order_by()
+    stale = EngagementHeatmap.objects.all()
+    if account_ids is not None:
+        patterns = patterns.filter(social_account_id__in=account_ids)
+        stale = stale.filter(social_account_id__in=account_ids)
+
+    grids = {}
+    for row in patterns.values('social_account_id', 'day_of_week', 'hour_of_day', 'post_count', *PATTERN_FIELDS.values()):
+        grid = grids.setdefault(row['social_account_id'], empty_grid())
+        cell = row['day_of_week'] * HOURS + row['hour_of_day']
+        for field, column in PATTERN_FIELDS.items():
+            grid[field][cell] = row[column]
+        grid['post_count'][cell] = row['post_count']
+
+    stale.exclude(social_account_id__in=list(grids)).delete()
+    EngagementHeatmap.objects.bulk_create(
+        [
+            EngagementHeatmap(social_account_id=account_id, grid=pack_grid(grid), post_count=sum(grid['post_count']))
+            for account_id, grid in grids.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['social_account'],
+        update_fields=['grid', 'post_count', 'updated_at']
+    )
+    return len(grids)
+
+def load_heatmap(user, account_id=None):
+    # One query; without an account the user's accounts are merged.
+    heatmaps = EngagementHeatmap.objects.filter(social_account__user=user)
+    if account_id:
+        heatmaps = heatmaps.filter(social_account_id=account_id)
+    return merge_grids(unpack_grid(grid) for grid in heatmaps.values_list('grid', flat=True))
+
+def confidence(post_count):
+    return post_count / (post_count + CONFIDENCE_PRIOR)
+
+def ranked_slots(grid):
+    # Shrink each slot's engagement toward the grid average by confidence, so
+    # a single lucky post does not outrank a slot with a long track record.
+    total = sum(grid['post_count'])
+    if not total:
+        return []
+    baseline = sum(rate * count for rate, count in zip(grid['engagement_rate'], grid['post_count'])) / total
+
+    slots = []
+    for cell, count in enumerate(grid['post_count']):
+        if not count:
+            continue
+        weight = confidence(count)
+        slots.append({
+            'day_of_week': cell // HOURS,
+            'hour_of_day': cell % HOURS,
+            'avg_engagement_rate': round(grid['engagement_rate'][cell], 4),
+            'avg_likes': round(grid['likes'][cell], 4),
+            'avg_comments': round(grid['comments'][cell], 4),
+            'avg_shares': round(grid['shares'][cell], 4),
+            'post_count': count,
+            'confidence': round(weight, 3),
+            'score': round(weight * grid['engagement_rate'][cell] + (1 - weight) * baseline, 4),
+        })
+    slots.sort(key=lambda slot: (-slot['score'], slot['day_of_week'], slot['hour_of_day']))
+    return slots
+
+def ranked_patterns(patterns):
+    # ranked_slots' ordering for EngagementPattern rows, for responses that
+    # serialize the rows themselves: a slot per account, not a merged cell.
+    totals = patterns.aggregate(
+        weighted=Sum(F('avg_engagement_rate') * F('post_count')), posts=Sum('post_count')
+    )
+    baseline = totals['weighted'] / totals['posts'] if totals['posts'] else 0.0
+    weight = Cast('post_count', FloatField()) / (F('post_count') + CONFIDENCE_PRIOR)
+    return patterns.filter(post_count__gt=0).annotate(
+        score=weight * F('avg_engagement_rate') + (1 - weight) * baseline
+    ).order_by('-score', 'day_of_week', 'hour_of_day', 'id')
+
+def grid_rows(values):
+    return [list(values[day * HOURS:(day + 1) * HOURS]) for day in range(DAYS)]
@@ -0,0 +1,372 @@
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from accounts.models import SocialMediaAccount
+from .models import Post, PostMetrics, PostCurrentMetrics, Comment
+from .rollups import sync_rollups
+from .hashtags import link_caption_hashtags, link_hashtags, sync_hashtag_stats
+from .cache import bump_generation_for_accounts
+
+CHUNK_SIZE = 5000
+COPY_THRESHOLD = 2000
+MAX_REPORTED_ERRORS = 1000
+
+RECORD_TYPES = ['post', 'metrics', 'comment', 'hashtag']
+
+SnapshotRef = namedtuple('SnapshotRef', ['post_id', 'recorded_at'])
+
+def _text(value):
+    return str(value).strip()
+
+def _int(value):
+    value = int(value)
+    if not -2147483648 <= value <= 2147483647:
+        raise ValueError('Ensure this value fits in a 32-bit integer.')
+    return value
+
+def _float(value):
+    return float(value)
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+def _datetime(value):
+    parsed = parse_datetime(str(value).strip())
+    if parsed is None:
+        raise ValueError('Enter a valid ISO 8601 date/time.')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def _content_type(value):
+    value = _text(value)
+    if value not in dict(Post.CONTENT_TYPE_CHOICES):
+        raise ValueError(f'"{value}" is not a valid choice.')
+    return value
+
+# field -> (converter, required)
+RECORD_FIELDS = {
+    'post': {
+        'social_account': (_int, True),
+        'post_id': (_text, True),
+        'content_type': (_content_type, True),
+        'posted_at': (_datetime, True),
+        'caption': (str, False),
+        'media_url': (_text, False),
+        'thumbnail_url': (_text, False),
+        'is_archived': (_bool, False),
+    },
+    'metrics': {
+        'post_id': (_text, True),
+        'likes_count': (_int, False),
+        'comments_count': (_int, False),
+        'shares_count': (_int, False),
+        'saves_count': (_int, False),
+        'views_count': (_int, False),
+        'reach': (_int, False),
+        'impressions': (_int, False),
+        'engagement_rate': (_float, False),
+        'recorded_at': (_datetime, False),
+    },
+    'comment': {
+        'post_id': (_text, True),
+        'comment_id': (_text, True),
+        'username': (_text, True),
+        'text': (str, True),
+        'posted_at': (_datetime, True),
+        'likes_count': (_int, False),
+        'sentiment_score': (_float, False),
+    },
+    'hashtag': {
+        'post_id': (_text, True),
+        'tag': (_text, True),
+    },
+}
+
+# field -> model whose column of the same name bounds its length, so an
+# over-long value is a row error rather than a DataError for the chunk.
+LENGTH_LIMITS = {
+    'post': {'post_id': Post, 'media_url': Post, 'thumbnail_url': Post},
+    'metrics': {'post_id': Post},
+    'comment': {'post_id': Post, 'comment_id': Comment, 'username': Comment},
+    'hashtag': {'post_id': Post},
+}
+
+def _max_length(record_type, name):
+    model = LENGTH_LIMITS[record_type].get(name)
+    return model._meta.get_field(name).max_length if model else None
+
+def validate_record(record_type, raw):
+    fields = RECORD_FIELDS.get(record_type)
+    if fields is None:
+        return None, {'type': [f'Must be one of {", ".join(RECORD_TYPES)}.']}
+
+    data = {}
+    errors = {}
+    for name, (convert, required) in fields.items():
+        value = raw.get(name)
+        if value is None or value == '':
+            if required:
+                errors[name] = ['This field is required.']
+            continue
+        try:
+            data[name] = convert(value)
+        except (TypeError, ValueError) as exc:
+            errors[name] = [str(exc) or 'Invalid value.']
+            continue
+        max_length = _max_length(record_type, name)
+        if max_length is not None and len(data[name]) > max_length:
+            errors[name] = [f'Ensure this field has no more than {max_length} characters.']
+
+    return data, errors
+
+def iter_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            yield line_number, None, None, {'non_field_errors': ['Invalid JSON.']}
+            continue
+        if not isinstance(raw, dict):
+            yield line_number, None, None, {'non_field_errors': ['Expected a JSON object.']}
+            continue
+        record_type = raw.get('type')
+        data, errors = validate_record(record_type, raw)
+        yield line_number, record_type, data, errors
+
+def iter_csv(lines, record_type):
+    text_lines = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+    reader = csv.DictReader(text_lines)
+    for raw in reader:
+        data, errors = validate_record(raw.get('type') or record_type, raw)
+        yield reader.line_num, raw.get('type') or record_type, data, errors
+
+class BatchIngestor:
+    def __init__(self, user=None, chunk_size=CHUNK_SIZE, use_copy=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.counts = dict.fromkeys(RECORD_TYPES, 0)
+        self.errors = []
+        self.error_count = 0
+        self.processed = 0
+        self.account_ids = set()
+        self._post_ids = {}
+        self._owned_accounts = None
+
+    def run(self, records):
+        started = time.perf_counter()
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                self.write(chunk)
+                chunk = []
+        self.write(chunk)
+        self.finish()
+
+        elapsed = time.perf_counter() - started
+
+        return {
+            'processed': self.processed,
+            'created': self.counts,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.processed / elapsed) if elapsed else 0,
+        }
+
+    def write(self, records):
+        for start in range(0, len(records), self.chunk_size):
+            self._process_chunk(records[start:start + self.chunk_size])
+
+    def finish(self):
+        bump_generation_for_accounts(self.account_ids)
+        self.errors.sort(key=lambda error: error['line'] or 0)
+
+    def _reject(self, line_number, record_type, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'type': record_type, 'errors': errors})
+
+    def _process_chunk(self, chunk):
+        if not chunk:
+            return
+        self.processed += len(chunk)
+
+        grouped = {record_type: [] for record_type in RECORD_TYPES}
+        for line_number, record_type, data, errors in chunk:
+            if errors:
+                self._reject(line_number, record_type, errors)
+            else:
+                grouped[record_type].append((line_number, data))
+
+        with transaction.atomic():
+            post_ids = self._write_posts(grouped['post'])
+            self._resolve_posts(grouped['metrics'] + grouped['comment'] + grouped['hashtag'])
+            metrics = [data for _, data in self._with_post(grouped['metrics'], 'metrics')]
+            hashtags = [data for _, data in self._with_post(grouped['hashtag'], 'hashtag')]
+            self._write_metrics(metrics)
+            self._write_comments(self._with_post(grouped['comment'], 'comment'))
+            self._write_hashtags(hashtags)
+            sync_hashtag_stats(post_ids={data['post_id'] for data in metrics + hashtags}.union(post_ids))
+
+    def _owned_account_ids(self):
+        if self._owned_accounts is None:
+            accounts = SocialMediaAccount.objects.all()
+            if self.user is not None:
+                accounts = accounts.filter(user=self.user)
+            self._owned_accounts = set(accounts.values_list('id', flat=True))
+        return self._owned_accounts
+
+    def _write_posts(self, rows):
+        owned = self._owned_account_ids()
+        posts = {}
+        line_numbers = {}
+        for line_number, data in rows:
+            if data['social_account'] not in owned:
+                self._reject(line_number, 'post', {'social_account': ['Unknown social account.']})
+                continue
+            data['social_account_id'] = data.pop('social_account')
+            posts[data['post_id']] = Post(**data)
+            line_numbers[data['post_id']] = line_number
+
+        # Posts whose posted_at changes leave their old day's rollup stale.
+        moved = []
+        existing = Post.objects.filter(post_id__in=list(posts)).values_list('post_id', 'social_account_id', 'posted_at')
+        for post_id, account_id, posted_at in existing:
+            if account_id not in owned:
+                posts.pop(post_id)
+                self._reject(line_numbers[post_id], 'post', {'post_id': ['Post belongs to another account.']})
+            elif posted_at != posts[post_id].posted_at:
+                moved.append((account_id, posted_at))
+
+        if not posts:
+            return []
+
+        Post.objects.bulk_create(
+            posts.values(),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['post_id'],
+            update_fields=['content_type', 'caption', 'media_url', 'thumbnail_url', 'posted_at', 'is_archived', 'updated_at']
+        )
+
+        saved = Post.objects.filter(post_id__in=list(posts)).values_list('post_id', 'id', 'social_account_id')
+        for post_id, pk, account_id in saved:
+            self._post_ids[post_id] = (pk, account_id)
+        self.account_ids.update(post.social_account_id for post in posts.values())
+        self.counts['post'] += len(posts)
+        sync_rollups(posts=posts.values(), removed=moved)
+        
+        link_caption_hashtags((self._post_ids[post_id][0], post.caption) for post_id, post in posts.items())
+        return [self._post_ids[post_id][0] for post_id in posts]
+
+    def _resolve_posts(self, rows):
+        missing = {data['post_id'] for _, data in rows if data['post_id'] not in self._post_ids}
+        if not missing:
+            return
+
+        posts = Post.objects.filter(post_id__in=missing)
+        if self.user is not None:
+            posts = posts.filter(social_account__user=self.user)
+        for post_id, pk, account_id in posts.values_list('post_id', 'id', 'social_account_id'):
+            self._post_ids[post_id] = (pk, account_id)
+
+    def _with_post(self, rows, record_type):
+        resolved = []
+        for line_number, data in rows:
+            post = self._post_ids.get(data['post_id'])
+            if post is None:
+                self._reject(line_number, record_type, {'post_id': ['Unknown post.']})
+                continue
+            data['post_id'], account_id = post
+            self.account_ids.add(account_id)
+            resolved.append((line_number, data))
+        return resolved
+
+    def _write_metrics(self, rows):
+        if not rows:
+            return
+
+        now = timezone.now()
+        for data in rows:
+            data.setdefault('recorded_at', now)
+
+        if self.use_copy and len(rows) >= COPY_THRESHOLD:
+            self._copy_metrics(rows)
+            PostCurrentMetrics.objects.rebuild({data['post_id'] for data in rows})
+            snapshots = [SnapshotRef(data['post_id'], data['recorded_at']) for data in rows]
+        else:
+            snapshots = PostMetrics.objects.bulk_create([PostMetrics(**data) for data in rows], batch_size=1000)
+            PostCurrentMetrics.objects.sync(snapshots)
+
+        sync_rollups(snapshots=snapshots)
+        self.counts['metrics'] += len(rows)
+
+    def _copy_metrics(self, rows):
+        columns = ['post_id', 'recorded_at'] + PostCurrentMetrics.SNAPSHOT_FIELDS
+        defaults = {field: PostMetrics._meta.get_field(field).default for field in PostCurrentMetrics.SNAPSHOT_FIELDS}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for data in rows:
+            writer.writerow([
+                data['post_id'],
+                data['recorded_at'].isoformat(),
+                *(data.get(field, defaults[field]) for field in PostCurrentMetrics.SNAPSHOT_FIELDS)
+            ])
+        buffer.seek(0)
+
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {PostMetrics._meta.db_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+
+    def _write_comments(self, rows):
+        comments = {}
+        line_numbers = {}
+        for line_number, data in rows:
+            comments[data['comment_id']] = Comment(**data)
+            line_numbers[data['comment_id']] = line_number
+
+        # An existing comment_id on someone else's post must not be upserted.
+        foreign = Comment.objects.filter(comment_id__in=list(comments)).exclude(
+            post__social_account_id__in=self._owned_account_ids()
+        )
+        for comment_id in foreign.values_list('comment_id', flat=True):
+            comments.pop(comment_id)
+            self._reject(line_numbers[comment_id], 'comment', {'comment_id': ['Comment belongs to another account.']})
+
+        if not comments:
+            return
+
+        Comment.objects.bulk_create(
+            comments.values(),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['comment_id'],
+            update_fields=['text', 'likes_count', 'sentiment_score', 'sentiment_version']
+        )
+        self.counts['comment'] += len(comments)
+
+    def _write_hashtags(self, rows):
+        self.counts['hashtag'] += link_hashtags((data['post_id'], data['tag']) for data in rows)
+
+def ingest_stream(lines, input_format='ndjson', record_type=None, user=None, **options):
+    if input_format == 'csv':
+        records = iter_csv(lines, record_type)
+    else:
+        records = iter_ndjson(lines)
+    return BatchIngestor(user=user, **options).run(records)
@@ -0,0 +1,199 @@
+import calendar
+import hashlib
+from datetime import timedelta
+from django.db.models import Avg, Case, Count, F, IntegerField, Q, Sum, Value, When, Window
+from django.db.models.functions import FirstValue, RowNumber
+from django.utils import timezone
+from .models import Post, Audience, EngagementPattern, DailyMetricsRollup, AIInsight
+from .cache import bump_generation
+
+WINDOW_DAYS = 7
+
+TOP_CONTENT_MIN_POSTS = 3
+TOP_CONTENT_RATIO = 1.5
+ENGAGEMENT_DROP_RATIO = 0.7
+ENGAGEMENT_DROP_MIN_SNAPSHOTS = 5
+GROWTH_SPIKE_RATIO = 2.0
+GROWTH_SPIKE_MIN_FOLLOWERS = 100
+BEST_SLOT_MIN_POSTS = 3
+
+def fingerprint(*parts):
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+def _insight(key, user_id, account_id, insight_type, title, description, data, priority):
+    return AIInsight(
+        fingerprint=fingerprint(insight_type, *key),
+        user_id=user_id,
+        social_account_id=account_id,
+        insight_type=insight_type,
+        title=title,
+        description=description,
+        data=data,
+        priority=priority
+    )
+
+def top_content_candidates(now):
+    partition = [F('social_account_id')]
+    rows = Post.objects.filter(
+        posted_at__gte=now - timedelta(days=WINDOW_DAYS),
+        current_metrics__isnull=False,
+        social_account__is_active=True,
+        social_account__user__is_active=True
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=partition, order_by=[F('current_metrics__engagement_rate').desc(), F('id').desc()]),
+        account_avg=Window(Avg('current_metrics__engagement_rate'), partition_by=partition),
+        account_posts=Window(Count('id'), partition_by=partition)
+    ).filter(rank=1).values(
+        'social_account_id', 'social_account__user_id', 'post_id', 'content_type',
+        'current_metrics__engagement_rate', 'account_avg', 'account_posts'
+    )
+
+    for row in rows.iterator(chunk_size=2000):
+        rate = row['current_metrics__engagement_rate']
+        if row['account_posts'] < TOP_CONTENT_MIN_POSTS or not row['account_avg'] or rate < row['account_avg'] * TOP_CONTENT_RATIO:
+            continue
+        yield _insight(
+            (row['social_account_id'], row['post_id']),
+            row['social_account__user_id'], row['social_account_id'], 'content_performance',
+            f"Your {row['content_type']} performed exceptionally well",
+            f"Your recent {row['content_type']} reached {rate:.2f}% engagement, "
+            f"{rate / row['account_avg']:.1f}x your weekly average. Consider creating similar content.",
+            {'post_id': row['post_id'], 'engagement_rate': rate, 'account_avg': round(row['account_avg'], 2)},
+            5
+        )
+
+def engagement_drop_candidates(now):
+    today = timezone.localdate(now)
+    split = today - timedelta(days=WINDOW_DAYS)
+    recent = Q(date__gte=split)
+    prior = Q(date__lt=split)
+
+    rows = DailyMetricsRollup.objects.filter(
+        date__gte=today - timedelta(days=WINDOW_DAYS * 2),
+        date__lt=today,
+        social_account__is_active=True,
+        user__is_active=True
+    ).values('social_account_id', 'user_id').annotate(
+        recent_sum=Sum('engagement_rate_sum', filter=recent),
+        recent_count=Sum('snapshots_count', filter=recent),
+        prior_sum=Sum('engagement_rate_sum', filter=prior),
+        prior_count=Sum('snapshots_count', filter=prior)
+    ).filter(
+        recent_count__gte=ENGAGEMENT_DROP_MIN_SNAPSHOTS,
+        prior_count__gte=ENGAGEMENT_DROP_MIN_SNAPSHOTS
+    ).order_by()
+
+    week = today.isocalendar()
+    for row in rows.iterator(chunk_size=2000):
+        recent_avg = row['recent_sum'] / row['recent_count']
+        prior_avg = row['prior_sum'] / row['prior_count']
+        if not prior_avg or recent_avg >= prior_avg * ENGAGEMENT_DROP_RATIO:
+            continue
+        change = (recent_avg - prior_avg) / prior_avg * 100
+        yield _insight(
+            (row['social_account_id'], week[0], week[1]),
+            row['user_id'], row['social_account_id'], 'trend_analysis',
+            'Engagement dropped this week',
+            f'Average engagement fell {abs(change):.0f}% compared to the previous {WINDOW_DAYS} days '
+            f'({prior_avg:.2f}% to {recent_avg:.2f}%). Review what changed in your recent content.',
+            {'recent_avg': round(recent_avg, 2), 'prior_avg': round(prior_avg, 2), 'change_percent': round(change, 1)},
+            8
+        )
+
+def audience_growth_candidates(now):
+    split = now - timedelta(days=WINDOW_DAYS)
+    partition = [F('social_account_id'), F('period')]
+
+    rows = Audience.objects.filter(
+        recorded_at__gte=now - timedelta(days=WINDOW_DAYS * 2),
+        social_account__is_active=True,
+        social_account__user__is_active=True
+    ).annotate(
+        period=Case(When(recorded_at__gte=split, then=Value(1)), default=Value(0), output_field=IntegerField())
+    ).annotate(
+        opening=Window(FirstValue('followers_count'), partition_by=partition, order_by=F('recorded_at').asc()),
+        rank=Window(RowNumber(), partition_by=partition, order_by=F('recorded_at').desc())
+    ).filter(rank=1).values(
+        'social_account_id', 'social_account__user_id', 'period', 'opening', 'followers_count'
+    ).order_by('social_account_id', 'period')
+
+    growth = {}
+    for row in rows.iterator(chunk_size=2000):
+        account = growth.setdefault(row['social_account_id'], {'user_id': row['social_account__user_id']})
+        account[row['period']] = (row['opening'], row['followers_count'])
+
+    week = timezone.localdate(now).isocalendar()
+    for account_id, account in growth.items():
+        if 0 not in account or 1 not in account:
+            continue
+        # Measure both weeks from the last reading of the previous one so the
+        # gap between the two windows is not lost.
+        prior_gain = account[0][1] - account[0][0]
+        recent_gain = account[1][1] - account[0][1]
+        if recent_gain < GROWTH_SPIKE_MIN_FOLLOWERS or recent_gain < max(prior_gain, 1) * GROWTH_SPIKE_RATIO:
+            continue
+        yield _insight(
+            (account_id, week[0], week[1]),
+            account['user_id'], account_id, 'audience_behavior',
+            'Your audience is growing fast',
+            f'You gained {recent_gain} followers in the last {WINDOW_DAYS} days, compared to {prior_gain} the week before.',
+            {'recent_gain': recent_gain, 'prior_gain': prior_gain, 'followers': account[1][1]},
+            6
+        )
+
+def best_slot_candidates(now):
+    rows = EngagementPattern.objects.filter(
+        post_count__gte=BEST_SLOT_MIN_POSTS,
+        social_account__is_active=True,
+        social_account__user__is_active=True
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=[F('social_account_id')], order_by=[F('avg_engagement_rate').desc(), F('id').asc()])
+    ).filter(rank=1).values(
+        'social_account_id', 'social_account__user_id', 'day_of_week', 'hour_of_day', 'avg_engagement_rate', 'post_count'
+    )
+
+    for row in rows.iterator(chunk_size=2000):
+        day = calendar.day_name[row['day_of_week']]
+        yield _insight(
+            (row['social_account_id'], row['day_of_week'], row['hour_of_day']),
+            row['social_account__user_id'], row['social_account_id'], 'optimal_timing',
+            f"Best time to post: {day}s at {row['hour_of_day']:02d}:00",
+            f"Posts published on {day}s around {row['hour_of_day']:02d}:00 average "
+            f"{row['avg_engagement_rate']:.2f}% engagement, your strongest time slot.",
+            {'day_of_week': row['day_of_week'], 'hour_of_day': row['hour_of_day'],
+             'avg_engagement_rate': round(row['avg_engagement_rate'], 2), 'post_count': row['post_count']},
+            4
+        )
+
+INSIGHT_GENERATORS = [
+    top_content_candidates,
+    engagement_drop_candidates,
+    audience_growth_candidates,
+    best_slot_candidates,
+]
+
+def generate_insights(now=None, batch_size=2000):
+    now = now or timezone.now()
+    created = 0
+    user_ids = set()
+
+    for generator in INSIGHT_GENERATORS:
+        candidates = {}
+        for insight in generator(now):
+            candidates[insight.fingerprint] = insight
+
+        fingerprints = list(candidates)
+        for start in range(0, len(fingerprints), batch_size):
+            batch = fingerprints[start:start + batch_size]
+            # ignore_conflicts skips fingerprints that already exist without
+            # saying which, so read back the rows this insert stamped.
+            inserted_at = timezone.now()
+            AIInsight.objects.bulk_create([candidates[key] for key in batch], batch_size=1000, ignore_conflicts=True)
+            inserted = list(AIInsight.objects.filter(
+                fingerprint__in=batch, created_at__gte=inserted_at
+            ).values_list('user_id', flat=True))
+            created += len(inserted)
+            user_ids.update(inserted)
+
+    bump_generation(user_ids)
+    return created
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseForbidden
+
+METRICS_KEY = 'analytics:metrics:{series}'
+SERIES_KEY = 'analytics:metrics:series'
+SLOWEST_KEY = 'analytics:metrics:slowest:{route}'
+
+# Upper bounds of the histogram buckets; durations are in seconds.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ('Request wall time', DURATION_BUCKETS),
+    'request_db_seconds': ('Time spent executing SQL per request', DURATION_BUCKETS),
+    'request_serializer_seconds': ('Time spent in serializer.data per request', DURATION_BUCKETS),
+    'request_queries': ('SQL queries per request', QUERY_BUCKETS),
+}
+
+# Sums are stored as integer microseconds so they can use cache.incr.
+MICROS = 1000000
+
+def instrumentation_settings():
+    return dict({'ENABLED': True, 'FLUSH_INTERVAL': 10, 'TOKEN': None}, **getattr(settings, 'INSTRUMENTATION', {}))
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'slowest_time', 'slowest_sql', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if elapsed > self.slowest_time:
+                self.slowest_time = elapsed
+                self.slowest_sql = sql
+
+current_stats = ContextVar('analytics_request_stats', default=None)
+
+FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'"'), ''),
+]
+
+def fingerprint_sql(sql):
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    sql = sql.strip()
+    return f'{hashlib.md5(sql.encode()).hexdigest()[:8]} {sql[:160]}'
+
+def install_serializer_timing():
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    def timed_data(serializer):
+        stats = current_stats.get()
+        if stats is None:
+            return data.fget(serializer)
+        stats.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_time += time.perf_counter() - started
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+class MetricsRegistry:
+    # Counters are kept per process and pushed to the shared cache every
+    # FLUSH_INTERVAL seconds, so a request costs no cache round trips.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.slowest = {}
+        self.last_flush = time.monotonic()
+
+    def _add(self, series, value):
+        self.pending[series] = self.pending.get(series, 0) + value
+
+    def observe(self, labels, values, slowest):
+        with self.lock:
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                bucket = next((str(bound) for bound in buckets if value <= bound), '+Inf')
+                self._add((name, labels, bucket), 1)
+                self._add((name, labels, 'sum'), round(value * MICROS) if buckets is DURATION_BUCKETS else value)
+                self._add((name, labels, 'count'), 1)
+            if slowest and slowest[0] > self.slowest.get(labels, (0,))[0]:
+                self.slowest[labels] = slowest
+
+    def maybe_flush(self, interval):
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            slowest, self.slowest = self.slowest, {}
+            self.last_flush = time.monotonic()
+        if not pending and not slowest:
+            return
+
+        keys = {json.dumps(series): value for series, value in pending.items()}
+        for key, value in keys.items():
+            cache_key = METRICS_KEY.format(series=hashlib.md5(key.encode()).hexdigest())
+            if not cache.add(cache_key, value, timeout=None):
+                cache.incr(cache_key, value)
+
+        known = set(cache.get(SERIES_KEY) or [])
+        if not known.issuperset(keys):
+            cache.set(SERIES_KEY, sorted(known.union(keys)), timeout=None)
+
+        for labels, (elapsed, sql) in slowest.items():
+            key = SLOWEST_KEY.format(route=hashlib.md5(json.dumps(labels).encode()).hexdigest())
+            previous = cache.get(key)
+            if previous is None or elapsed > previous['seconds']:
+                cache.set(key, {'labels': labels, 'seconds': elapsed, 'fingerprint': fingerprint_sql(sql)}, timeout=None)
+
+registry = MetricsRegistry()
+
+def _label_text(labels):
+    view, method = labels
+    return f'view="{view}",method="{method}"'
+
+def render_metrics():
+    registry.flush()
+    series = {
+        METRICS_KEY.format(series=hashlib.md5(key.encode()).hexdigest()): json.loads(key)
+        for key in cache.get(SERIES_KEY) or []
+    }
+    values = cache.get_many(list(series))
+
+    totals = {}
+    for key, (name, labels, part) in series.items():
+        totals.setdefault(name, {}).setdefault(tuple(labels), {})[part] = values.get(key, 0)
+
+    lines = []
+    for name, (description, buckets) in HISTOGRAMS.items():
+        metric = f'analytics_{name}'
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} histogram')
+        for labels, parts in sorted(totals.get(name, {}).items()):
+            label_text = _label_text(labels)
+            cumulative = 0
+            for bound in [str(bound) for bound in buckets] + ['+Inf']:
+                cumulative += parts.get(bound, 0)
+                lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            total = parts.get('sum', 0)
+            lines.append(f'{metric}_sum{{{label_text}}} {total / MICROS if buckets is DURATION_BUCKETS else total}')
+            lines.append(f'{metric}_count{{{label_text}}} {parts.get("count", 0)}')
+
+    slowest = cache.get_many([
+        SLOWEST_KEY.format(route=hashlib.md5(json.dumps(list(labels)).encode()).hexdigest())
+        for labels in totals.get('request_queries', {})
+    ])
+    lines.append('# HELP analytics_slowest_query_seconds Slowest SQL statement seen per view')
+    lines.append('# TYPE analytics_slowest_query_seconds gauge')
+    for item in sorted(slowest.values(), key=lambda item: item['labels']):
+        fingerprint = item['fingerprint'].replace('\\', '\\\\').replace('"', '\\"')
+        lines.append(
+            f'analytics_slowest_query_seconds{{{_label_text(item["labels"])},fingerprint="{fingerprint}"}} '
+            f'{round(item["seconds"], 6)}'
+        )
+    return '\n'.join(lines) + '\n'
+
+def metrics_view(request):
+    token = instrumentation_settings()['TOKEN']
+    authorized = request.user.is_authenticated and request.user.is_staff
+    if token and request.headers.get('Authorization') == f'Bearer {token}':
+        authorized = True
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
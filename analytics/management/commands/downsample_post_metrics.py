@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from analytics.retention import DAILY_DAYS, HOURLY_DAYS, downsample_post_metrics
+
+class Command(BaseCommand):
+    help = (f'Thin PostMetrics to one snapshot per post per day after {HOURLY_DAYS} days '
+            f'and one per week after {DAILY_DAYS} days')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignore checkpoints and rescan the whole history')
+
+    def handle(self, *args, **options):
+        def progress(name, day, deleted):
+            self.stdout.write(f'{name} {day}: {deleted} removed')
+
+        result = downsample_post_metrics(full=options['full'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {result['daily']} hourly and {result['weekly']} daily snapshots"
+        ))
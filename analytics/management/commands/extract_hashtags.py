@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from analytics.models import Post
+from analytics.hashtags import link_caption_hashtags, rebuild_hashtag_stats
+
+class Command(BaseCommand):
+    help = 'Extract hashtags from existing post captions and link them to their posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--after-id', type=int, default=0, help='Resume after this post id')
+        parser.add_argument('--skip-stats', action='store_true', help='Do not rebuild hashtag stats afterwards')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        last_id = options['after_id']
+        scanned = linked = 0
+
+        while True:
+            batch = list(
+                Post.objects.filter(id__gt=last_id).exclude(caption__isnull=True).exclude(caption='')
+                .order_by('id').values_list('id', 'caption')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            linked += link_caption_hashtags(batch)
+            scanned += len(batch)
+            last_id = batch[-1][0]
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{scanned} captions, {linked} links, last id {last_id} ({round(scanned / elapsed * 60)} captions/min)')
+
+        if not options['skip_stats']:
+            rebuild_hashtag_stats()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} captions and linked {linked} hashtags in {elapsed:.1f}s'
+        ))
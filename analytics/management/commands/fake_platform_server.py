@@ -0,0 +1,134 @@
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from analytics.models import Post
+
+CONTENT_TYPES = [choice for choice, _ in Post.CONTENT_TYPE_CHOICES]
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    posts_per_account = 300
+    rate_limit = 100
+    latency = 0.05
+    windows = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _throttled(self, platform):
+        second = int(time.time())
+        with self.lock:
+            window = self.windows.get(platform)
+            if window is None or window[0] != second:
+                window = [second, 0]
+                self.windows[platform] = window
+            window[1] += 1
+            return window[1] > self.rate_limit
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 4 or parts[1] != 'accounts' or parts[3] not in ('posts', 'profile'):
+            return self._send(404, {'error': 'Not found'})
+
+        platform, account_id = parts[0], parts[2]
+        if self._throttled(platform):
+            return self._send(429, {'error': 'Rate limit exceeded'}, {'Retry-After': '1'})
+        time.sleep(self.latency)
+
+        if parts[3] == 'profile':
+            return self._send(200, self._profile(platform, account_id))
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        limit = min(int(params.get('limit', 100)), 100)
+        offset = int(params.get('cursor', 0))
+        since = parse_datetime(params['since']) if params.get('since') else None
+
+        posts = self._posts(platform, account_id, since)
+        page = posts[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(posts) else None
+        self._send(200, {'posts': page, 'next': next_cursor})
+
+    def _profile(self, platform, account_id):
+        rng = random.Random(f'{platform}:{account_id}:profile')
+        # Followers grow a little every day so repeated syncs show a trend.
+        days = timezone.localdate().timetuple().tm_yday
+        recent = [post['metrics'] for post in self._posts(platform, account_id, None)[:30]]
+        return {
+            'account_id': account_id,
+            'followers_count': rng.randint(1000, 500000) + days * rng.randint(0, 200),
+            'following_count': rng.randint(50, 2000),
+            'posts_count': self.posts_per_account,
+            'avg_engagement_rate': round(sum(m['engagement_rate'] for m in recent) / len(recent), 2) if recent else 0,
+            'avg_likes': round(sum(m['likes_count'] for m in recent) / len(recent), 2) if recent else 0,
+            'avg_comments': round(sum(m['comments_count'] for m in recent) / len(recent), 2) if recent else 0,
+        }
+
+    def _posts(self, platform, account_id, since):
+        rng = random.Random(f'{platform}:{account_id}')
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        posts = []
+        for index in range(self.posts_per_account):
+            posted_at = now - timedelta(hours=index * 6)
+            if since and posted_at < since:
+                break
+            reach = rng.randint(500, 50000)
+            likes = rng.randint(0, reach // 5)
+            comments = rng.randint(0, likes // 10 + 1)
+            shares = rng.randint(0, likes // 20 + 1)
+            posts.append({
+                'post_id': f'{platform}_{account_id}_{index}',
+                'content_type': rng.choice(CONTENT_TYPES),
+                'caption': f'Post {index} from {account_id}',
+                'posted_at': posted_at.isoformat(),
+                'metrics': {
+                    'likes_count': likes,
+                    'comments_count': comments,
+                    'shares_count': shares,
+                    'reach': reach,
+                    'impressions': reach + rng.randint(0, reach),
+                    'engagement_rate': round((likes + comments + shares) / reach * 100, 2),
+                },
+            })
+        return posts
+
+class Command(BaseCommand):
+    help = 'Serve deterministic fake platform data for exercising account and competitor sync locally'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--posts-per-account', type=int, default=FakePlatformHandler.posts_per_account)
+        parser.add_argument('--rate-limit', type=int, default=FakePlatformHandler.rate_limit, help='Requests per second per platform')
+        parser.add_argument('--latency', type=float, default=FakePlatformHandler.latency, help='Seconds added to every response')
+
+    def handle(self, *args, **options):
+        FakePlatformHandler.posts_per_account = options['posts_per_account']
+        FakePlatformHandler.rate_limit = options['rate_limit']
+        FakePlatformHandler.latency = options['latency']
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), FakePlatformHandler)
+        server.daemon_threads = True
+        self.stdout.write(f"Fake platform API listening on http://127.0.0.1:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from analytics.synthetic import PASSWORD, SCALES, delete_dataset, generate_dataset
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset (users, accounts, posts, metrics, comments, audience, competitors)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help='Delete previously generated synthetic data first')
+        for name in SCALES['small']:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, help='Override the scale preset')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            deleted = delete_dataset()
+            self.stdout.write(f"Deleted {sum(deleted.values())} synthetic rows")
+
+        sizes = dict(SCALES[options['scale']])
+        for name in sizes:
+            if options[name] is not None:
+                sizes[name] = options[name]
+
+        def progress(counts):
+            self.stdout.write(f"{counts['posts']} posts, {counts['post_metrics']} metrics, {counts['comments']} comments")
+
+        counts = generate_dataset(seed=options['seed'], batch_size=options['batch_size'], progress=progress, **sizes)
+        self.stdout.write(self.style.SUCCESS(
+            'Generated ' + ', '.join(f'{count} {name}' for name, count in counts.items()) +
+            f" (log in as synthetic-N@example.com / {PASSWORD})"
+        ))
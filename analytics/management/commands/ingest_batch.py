@@ -0,0 +1,46 @@
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from analytics.ingest import RECORD_TYPES, CHUNK_SIZE, ingest_stream
+
+class Command(BaseCommand):
+    help = 'Bulk load posts, metrics, comments and hashtags from NDJSON or CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files to load, or - for stdin')
+        parser.add_argument('--input-format', choices=['ndjson', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--type', choices=RECORD_TYPES, help='Record type of CSV rows without a type column')
+        parser.add_argument('--user', help='Only accept rows for accounts owned by this user (email)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} not found")
+
+        for path in options['paths']:
+            input_format = options['input_format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+            ingest_options = dict(
+                input_format=input_format,
+                record_type=options['type'],
+                user=user,
+                chunk_size=options['chunk_size'],
+                use_copy=False if options['no_copy'] else None,
+            )
+
+            if path == '-':
+                result = ingest_stream(sys.stdin, **ingest_options)
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    result = ingest_stream(stream, **ingest_options)
+
+            for error in result['errors']:
+                self.stderr.write(f"{path}:{error['line']} {error['type']}: {error['errors']}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{path}: {result['processed']} rows, {result['error_count']} errors, "
+                f"{result['rows_per_second']} rows/s {result['created']}"
+            ))
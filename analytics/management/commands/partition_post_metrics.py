@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from analytics.partitions import MONTHS_AHEAD, ensure_partitions, is_partitioned, partition_post_metrics
+
+class Command(BaseCommand):
+    help = 'Convert PostMetrics to a table range partitioned by month on recorded_at, or add upcoming partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500000, help='Rows copied per INSERT during conversion')
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Table partitioning requires PostgreSQL')
+
+        if is_partitioned():
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f"Already partitioned; created {len(created)} new partitions"))
+            return
+
+        def progress(copied):
+            self.stdout.write(f'{copied} rows copied')
+
+        try:
+            result = partition_post_metrics(batch_size=options['batch_size'], progress=progress)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {result['copied']} rows into {result['partitions']} monthly partitions"
+        ))
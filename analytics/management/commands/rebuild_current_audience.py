@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from analytics.models import CurrentAudience
+
+class Command(BaseCommand):
+    help = 'Rebuild the current audience snapshot of every account from Audience history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = CurrentAudience.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt current audience for {total} accounts'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from analytics.models import PostCurrentMetrics
+
+class Command(BaseCommand):
+    help = 'Rebuild the current metrics snapshot of every post from PostMetrics history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = PostCurrentMetrics.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt current metrics for {total} posts'))
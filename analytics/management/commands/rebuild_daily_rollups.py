@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from analytics.models import Post, PostMetrics
+from analytics.rollups import refresh_daily_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute daily metrics rollups from raw posts and PostMetrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only rebuild this many past days (default: full history)')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        
+        if options['days']:
+            first_day = today - timedelta(days=options['days'])
+        else:
+            earliest = [
+                value for value in (
+                    Post.objects.aggregate(first=Min('posted_at'))['first'],
+                    PostMetrics.objects.aggregate(first=Min('recorded_at'))['first'],
+                ) if value
+            ]
+            if not earliest:
+                self.stdout.write('No data to roll up')
+                return
+            first_day = timezone.localdate(min(earliest))
+        
+        days = [first_day + timedelta(days=offset) for offset in range((today - first_day).days)]
+        refreshed = refresh_daily_rollups(days)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {refreshed} rollup rows over {len(days)} days'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from analytics.hashtags import rebuild_hashtag_stats
+
+class Command(BaseCommand):
+    help = 'Recompute per-user daily hashtag statistics from posts and their current metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Only rebuild this many past days (default: full history)')
+
+    def handle(self, *args, **options):
+        created = rebuild_hashtag_stats(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} hashtag stat rows'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from analytics.search import SEARCH_VECTOR_SOURCES, backfill_search_vectors
+
+class Command(BaseCommand):
+    help = 'Fill search_vector for existing posts and comments in id-range batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=list(SEARCH_VECTOR_SOURCES), help='Only backfill this table')
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Full-text search vectors require PostgreSQL')
+
+        def progress(table, updated):
+            self.stdout.write(f'{table}: {updated} rows')
+
+        for table in [options['table']] if options['table'] else SEARCH_VECTOR_SOURCES:
+            updated = backfill_search_vectors(table, batch_size=options['batch_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(f'{table}: updated {updated} rows'))
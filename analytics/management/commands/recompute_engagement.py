@@ -0,0 +1,33 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from analytics.engagement import CHUNK_SIZE, recompute_engagement
+from analytics.patterns import rebuild_engagement_patterns
+
+class Command(BaseCommand):
+    help = 'Recompute PostMetrics engagement rates against the follower count in effect at each snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account_ids', nargs='*', type=int, help='Defaults to every account')
+        parser.add_argument('--days', type=int, help='Only recompute snapshots from this many past days')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+
+        def progress(scanned, updated):
+            self.stdout.write(f'{scanned} scanned, {updated} changed')
+
+        result = recompute_engagement(
+            account_ids=options['account_ids'] or None,
+            since=since,
+            chunk_size=options['chunk_size'],
+            progress=progress
+        )
+        if result['updated']:
+            rebuild_engagement_patterns(options['account_ids'] or None)
+
+        averages = ', '.join(f'{field} {value}' for field, value in result['averages'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {result['updated']} of {result['scanned']} snapshots across {result['posts']} posts ({averages})"
+        ))
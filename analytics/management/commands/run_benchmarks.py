@@ -0,0 +1,49 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from analytics.benchmarks import BenchmarkRunner, benchmark_user, compare_results
+
+class Command(BaseCommand):
+    help = 'Benchmark every API action and Celery task; writes p50/p95 latency, query counts and peak memory as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email of the user to run as (default: first synthetic user)')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--warm-cache', action='store_true', help='Keep cached action results between samples')
+        parser.add_argument('--include-external', action='store_true',
+                            help='Also run platform sync (start fake_platform_server first)')
+        parser.add_argument('--only', action='append', help='Only run actions or tasks whose name contains this')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+        parser.add_argument('--compare', help='Print p50 and query count changes against an earlier results file')
+
+    def handle(self, *args, **options):
+        user = benchmark_user(options['user'])
+        if user is None:
+            raise CommandError('No benchmark user found; run generate_synthetic_data first or pass --user')
+
+        results = BenchmarkRunner(
+            user,
+            repeat=options['repeat'],
+            warmup=options['warmup'],
+            warm_cache=options['warm_cache'],
+            include_external=options['include_external'],
+            only=options['only'],
+        ).run()
+
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            with open(options['compare']) as stream:
+                baseline = json.load(stream)
+            for row in compare_results(baseline, results):
+                before, after = row['p50_ms']
+                self.stdout.write(
+                    f"{row['name']:<55} p50 {before:>9.2f} -> {after:>9.2f} ms ({row['p50_change_percent']:+.1f}%)"
+                    f"  queries {row['queries'][0]} -> {row['queries'][1]}"
+                )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from analytics.sentiment import BATCH_SIZE, CHUNK_SIZE, MODEL_VERSION, score_comments
+
+class Command(BaseCommand):
+    help = f'Score comment sentiment with the local lexicon model ({MODEL_VERSION})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Scoring processes (default: one per CPU, 1 scores inline)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--limit', type=int, help='Stop after this many comments')
+        parser.add_argument('--rescore', action='store_true', help='Score every comment, even those on the current model version')
+
+    def handle(self, *args, **options):
+        def progress(scored, elapsed):
+            self.stdout.write(f'{scored} comments ({round(scored / elapsed) if elapsed else 0}/s)')
+
+        result = score_comments(
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            rescore=options['rescore'],
+            limit=options['limit'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {result['scored']} comments with {result['model_version']} in "
+            f"{result['elapsed_seconds']}s ({result['comments_per_second']}/s)"
+        ))
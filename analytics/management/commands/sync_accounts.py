@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from accounts.models import SocialMediaAccount
+from analytics.sync import sync_accounts
+
+class Command(BaseCommand):
+    help = 'Sync posts and metrics for active social accounts from the platform APIs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('account_ids', nargs='*', type=int, help='Defaults to every active account')
+        parser.add_argument('--platform', help='Only sync accounts on this platform')
+        parser.add_argument('--base-url', help='Override SOCIAL_SYNC BASE_URL')
+
+    def handle(self, *args, **options):
+        accounts = SocialMediaAccount.objects.filter(is_active=True)
+        if options['account_ids']:
+            accounts = accounts.filter(id__in=options['account_ids'])
+        if options['platform']:
+            accounts = accounts.filter(platform=options['platform'])
+
+        sync_options = {}
+        if options['base_url']:
+            sync_options['BASE_URL'] = options['base_url']
+
+        result = sync_accounts(accounts, **sync_options)
+
+        for account_id, error in result['failed'].items():
+            self.stderr.write(f'account {account_id}: {error}')
+        for error in result['errors']:
+            self.stderr.write(f"{error['type']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['synced']}/{result['accounts']} accounts, {result['requests']} requests, "
+            f"{result['posts_fetched']} posts in {result['elapsed_seconds']}s "
+            f"({result['posts_per_second']} posts/s) {result['written']}"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from analytics.models import Competitor
+from analytics.competitors import sync_competitors
+
+class Command(BaseCommand):
+    help = 'Record a metrics snapshot for active competitors from the platform APIs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competitor_ids', nargs='*', type=int, help='Defaults to every active competitor')
+        parser.add_argument('--platform', help='Only sync competitors on this platform')
+        parser.add_argument('--base-url', help='Override SOCIAL_SYNC BASE_URL')
+
+    def handle(self, *args, **options):
+        competitors = Competitor.objects.filter(is_active=True)
+        if options['competitor_ids']:
+            competitors = competitors.filter(id__in=options['competitor_ids'])
+        if options['platform']:
+            competitors = competitors.filter(platform=options['platform'])
+
+        sync_options = {}
+        if options['base_url']:
+            sync_options['BASE_URL'] = options['base_url']
+
+        result = sync_competitors(competitors, **sync_options)
+
+        for competitor_id, error in result['failed'].items():
+            self.stderr.write(f'competitor {competitor_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['synced']}/{result['competitors']} competitors, {result['requests']} requests "
+            f"in {result['elapsed_seconds']}s"
+        ))
@@ -0,0 +1,48 @@
+import time
+from contextlib import ExitStack
+from django.db import connections
+from .instrumentation import RequestStats, current_stats, instrumentation_settings, registry
+
+# Records query count, DB time, slowest statement and serializer time for
+# every request, reports them in a Server-Timing header and feeds the
+# per-route histograms served by metrics_view.
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = instrumentation_settings()
+        self.enabled = options['ENABLED']
+        self.flush_interval = options['FLUSH_INTERVAL']
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'serializer;dur={stats.serializer_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        match = request.resolver_match
+        if match is not None:
+            labels = (match.view_name or match._func_path, request.method)
+            registry.observe(labels, {
+                'request_duration_seconds': total,
+                'request_db_seconds': stats.db_time,
+                'request_serializer_seconds': stats.serializer_time,
+                'request_queries': stats.queries,
+            }, (stats.slowest_time, stats.slowest_sql) if stats.slowest_sql else None)
+            registry.maybe_flush(self.flush_interval)
+        return response
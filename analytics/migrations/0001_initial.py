@@ -0,0 +1,249 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Competitor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20)),
+                ('account_username', models.CharField(max_length=255)),
+                ('account_id', models.CharField(max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competitors', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(db_index=True, max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Post',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.CharField(max_length=255, unique=True)),
+                ('content_type', models.CharField(choices=[('reel', 'Reel'), ('carousel', 'Carousel'), ('static', 'Static Post'), ('story', 'Story'), ('video', 'Video')], max_length=20)),
+                ('caption', models.TextField(blank=True, null=True)),
+                ('media_url', models.URLField(blank=True, max_length=1000, null=True)),
+                ('thumbnail_url', models.URLField(blank=True, max_length=1000, null=True)),
+                ('posted_at', models.DateTimeField()),
+                ('is_archived', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to='accounts.socialmediaaccount')),
+            ],
+            options={
+                'ordering': ['-posted_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('performance', 'Performance Report'), ('engagement', 'Engagement Report'), ('audience', 'Audience Report'), ('content', 'Content Analysis Report'), ('comparative', 'Comparative Report'), ('custom', 'Custom Report')], max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('excel', 'Excel'), ('json', 'JSON')], max_length=10)),
+                ('filters', models.JSONField(default=dict)),
+                ('file', models.FileField(blank=True, null=True, upload_to='reports/')),
+                ('status', models.CharField(default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Query',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query_text', models.TextField()),
+                ('response', models.TextField(blank=True, null=True)),
+                ('response_data', models.JSONField(default=dict)),
+                ('execution_time', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EngagementPattern',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour_of_day', models.IntegerField()),
+                ('day_of_week', models.IntegerField()),
+                ('avg_engagement_rate', models.FloatField(default=0.0)),
+                ('avg_likes', models.FloatField(default=0.0)),
+                ('avg_comments', models.FloatField(default=0.0)),
+                ('avg_shares', models.FloatField(default=0.0)),
+                ('post_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement_patterns', to='accounts.socialmediaaccount')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContentStrategy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('recommendations', models.JSONField(default=list)),
+                ('optimal_times', models.JSONField(default=list)),
+                ('content_mix', models.JSONField(default=dict)),
+                ('hashtag_strategy', models.JSONField(default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='strategies', to='accounts.socialmediaaccount')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='strategies', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CompetitorMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('followers_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('posts_count', models.IntegerField(default=0)),
+                ('avg_engagement_rate', models.FloatField(default=0.0)),
+                ('avg_likes', models.FloatField(default=0.0)),
+                ('avg_comments', models.FloatField(default=0.0)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('competitor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='analytics.competitor')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment_id', models.CharField(max_length=255, unique=True)),
+                ('username', models.CharField(max_length=255)),
+                ('text', models.TextField()),
+                ('likes_count', models.IntegerField(default=0)),
+                ('posted_at', models.DateTimeField()),
+                ('sentiment_score', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='analytics.post')),
+                ('replied_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='analytics.comment')),
+            ],
+            options={
+                'ordering': ['-posted_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Audience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('followers_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('age_range_13_17', models.FloatField(default=0.0)),
+                ('age_range_18_24', models.FloatField(default=0.0)),
+                ('age_range_25_34', models.FloatField(default=0.0)),
+                ('age_range_35_44', models.FloatField(default=0.0)),
+                ('age_range_45_54', models.FloatField(default=0.0)),
+                ('age_range_55_plus', models.FloatField(default=0.0)),
+                ('gender_male', models.FloatField(default=0.0)),
+                ('gender_female', models.FloatField(default=0.0)),
+                ('gender_other', models.FloatField(default=0.0)),
+                ('top_countries', models.JSONField(default=dict)),
+                ('top_cities', models.JSONField(default=dict)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='accounts.socialmediaaccount')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insight_type', models.CharField(choices=[('content_performance', 'Content Performance'), ('audience_behavior', 'Audience Behavior'), ('optimal_timing', 'Optimal Timing'), ('trend_analysis', 'Trend Analysis'), ('competitor_analysis', 'Competitor Analysis'), ('recommendation', 'Recommendation')], max_length=30)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('data', models.JSONField(default=dict)),
+                ('priority', models.IntegerField(default=0)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('social_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='insights', to='accounts.socialmediaaccount')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='insights', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-priority', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('likes_count', models.IntegerField(default=0)),
+                ('comments_count', models.IntegerField(default=0)),
+                ('shares_count', models.IntegerField(default=0)),
+                ('saves_count', models.IntegerField(default=0)),
+                ('views_count', models.IntegerField(default=0)),
+                ('reach', models.IntegerField(default=0)),
+                ('impressions', models.IntegerField(default=0)),
+                ('engagement_rate', models.FloatField(default=0.0)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='analytics.post')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['post', 'recorded_at'], name='analytics_p_post_id_21a1be_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_hashtags', to='analytics.hashtag')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_hashtags', to='analytics.post')),
+            ],
+            options={
+                'unique_together': {('post', 'hashtag')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['social_account', 'posted_at'], name='analytics_p_social__b5cc6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['content_type', 'posted_at'], name='analytics_p_content_c0aa89_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='engagementpattern',
+            unique_together={('social_account', 'hour_of_day', 'day_of_week')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='competitor',
+            unique_together={('user', 'platform', 'account_id')},
+        ),
+    ]
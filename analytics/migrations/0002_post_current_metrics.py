@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCurrentMetrics',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_metrics', serialize=False, to='analytics.post')),
+                ('likes_count', models.IntegerField(default=0)),
+                ('comments_count', models.IntegerField(default=0)),
+                ('shares_count', models.IntegerField(default=0)),
+                ('saves_count', models.IntegerField(default=0)),
+                ('views_count', models.IntegerField(default=0)),
+                ('reach', models.IntegerField(default=0)),
+                ('impressions', models.IntegerField(default=0)),
+                ('engagement_rate', models.FloatField(default=0.0)),
+                ('recorded_at', models.DateTimeField()),
+                ('metrics', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analytics.postmetrics')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['engagement_rate'], name='analytics_p_engagem_eee0b1_idx')],
+            },
+        ),
+    ]
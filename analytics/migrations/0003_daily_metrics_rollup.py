@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('analytics', '0002_post_current_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetricsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=20)),
+                ('content_type', models.CharField(choices=[('reel', 'Reel'), ('carousel', 'Carousel'), ('static', 'Static Post'), ('story', 'Story'), ('video', 'Video')], max_length=20)),
+                ('date', models.DateField()),
+                ('posts_published', models.IntegerField(default=0)),
+                ('snapshots_count', models.IntegerField(default=0)),
+                ('total_likes', models.BigIntegerField(default=0)),
+                ('total_comments', models.BigIntegerField(default=0)),
+                ('total_shares', models.BigIntegerField(default=0)),
+                ('total_reach', models.BigIntegerField(default=0)),
+                ('engagement_rate_sum', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='accounts.socialmediaaccount')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='analytics_d_user_id_52dad8_idx')],
+                'unique_together': {('social_account', 'content_type', 'date')},
+            },
+        ),
+    ]
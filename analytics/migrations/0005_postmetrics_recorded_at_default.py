@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:32
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_processing_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postmetrics',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_postmetrics_recorded_at_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'posted_at'], name='analytics_c_post_id_53bd1a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['posted_at', 'id'], name='analytics_c_posted__8eb6c6_idx'),
+        ),
+    ]
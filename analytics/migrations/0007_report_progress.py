@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='error_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='row_count',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0007_report_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinsight',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=40, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('analytics', '0008_aiinsight_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('usage_count', models.IntegerField(default=0)),
+                ('engagement_sum', models.FloatField(default=0.0)),
+                ('likes_sum', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='analytics.hashtag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='analytics_h_user_id_ca6ff9_idx')],
+                'unique_together': {('user', 'hashtag', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0009_hashtag_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='sentiment_version',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:47
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def search_trigger(table, column):
+    function = f'{table}_search_vector_update'
+    return migrations.RunSQL(
+        sql=f"""
+            CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector('simple', coalesce(NEW.{column}, ''));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER {function}
+                BEFORE INSERT OR UPDATE OF {column} ON {table}
+                FOR EACH ROW EXECUTE FUNCTION {function}();
+        """,
+        reverse_sql=f"""
+            DROP TRIGGER IF EXISTS {function} ON {table};
+            DROP FUNCTION IF EXISTS {function}();
+        """,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0010_comment_sentiment_version'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['username'], name='comment_username_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['post_id'], name='post_post_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        search_trigger('analytics_post', 'caption'),
+        search_trigger('analytics_comment', 'text'),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0011_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='query',
+            name='timings',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0012_query_timings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postcurrentmetrics',
+            name='metrics',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analytics.postmetrics'),
+        ),
+    ]
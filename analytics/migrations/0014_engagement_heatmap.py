@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_heatmaps(apps, schema_editor):
+    from analytics.heatmap import HOURS, PATTERN_FIELDS, empty_grid, pack_grid
+
+    EngagementPattern = apps.get_model('analytics', 'EngagementPattern')
+    EngagementHeatmap = apps.get_model('analytics', 'EngagementHeatmap')
+
+    grids = {}
+    for pattern in EngagementPattern.objects.iterator():
+        grid = grids.setdefault(pattern.social_account_id, empty_grid())
+        cell = pattern.day_of_week * HOURS + pattern.hour_of_day
+        for field, column in PATTERN_FIELDS.items():
+            grid[field][cell] = getattr(pattern, column)
+        grid['post_count'][cell] = pattern.post_count
+
+    EngagementHeatmap.objects.bulk_create([
+        EngagementHeatmap(social_account_id=account_id, grid=pack_grid(grid), post_count=sum(grid['post_count']))
+        for account_id, grid in grids.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('analytics', '0013_postcurrentmetrics_metrics_no_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementHeatmap',
+            fields=[
+                ('social_account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='engagement_heatmap', serialize=False, to='accounts.socialmediaaccount')),
+                ('grid', models.BinaryField()),
+                ('post_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_heatmaps, migrations.RunPython.noop),
+    ]
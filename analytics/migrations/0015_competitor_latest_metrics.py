@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def point_at_latest_metrics(apps, schema_editor):
+    Competitor = apps.get_model('analytics', 'Competitor')
+    CompetitorMetrics = apps.get_model('analytics', 'CompetitorMetrics')
+    Competitor.objects.update(latest_metrics=models.Subquery(
+        CompetitorMetrics.objects.filter(
+            competitor=models.OuterRef('pk')
+        ).order_by('-recorded_at', '-id').values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0014_engagement_heatmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competitor',
+            name='latest_metrics',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='analytics.competitormetrics'),
+        ),
+        migrations.AddIndex(
+            model_name='competitormetrics',
+            index=models.Index(fields=['competitor', 'recorded_at'], name='analytics_c_competi_44529f_idx'),
+        ),
+        migrations.RunPython(point_at_latest_metrics, migrations.RunPython.noop),
+    ]
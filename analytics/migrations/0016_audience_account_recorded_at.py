@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0015_competitor_latest_metrics'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audience',
+            index=models.Index(fields=['social_account', 'recorded_at'], name='analytics_a_social__e75d3e_idx'),
+        ),
+    ]
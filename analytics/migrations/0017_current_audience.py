@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SNAPSHOT_FIELDS = [
+    'followers_count', 'following_count', 'age_range_13_17', 'age_range_18_24', 'age_range_25_34',
+    'age_range_35_44', 'age_range_45_54', 'age_range_55_plus', 'gender_male', 'gender_female',
+    'gender_other', 'top_countries', 'top_cities',
+]
+
+
+def build_current_audience(apps, schema_editor):
+    Audience = apps.get_model('analytics', 'Audience')
+    CurrentAudience = apps.get_model('analytics', 'CurrentAudience')
+
+    latest_id = Audience.objects.filter(
+        social_account=models.OuterRef('social_account')
+    ).order_by('-recorded_at', '-id').values('id')[:1]
+    CurrentAudience.objects.bulk_create(
+        [
+            CurrentAudience(
+                social_account_id=snapshot.social_account_id,
+                audience_id=snapshot.pk,
+                recorded_at=snapshot.recorded_at,
+                **{field: getattr(snapshot, field) for field in SNAPSHOT_FIELDS}
+            )
+            for snapshot in Audience.objects.filter(id=models.Subquery(latest_id)).order_by().iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('analytics', '0016_audience_account_recorded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentAudience',
+            fields=[
+                ('social_account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_audience', serialize=False, to='accounts.socialmediaaccount')),
+                ('followers_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('age_range_13_17', models.FloatField(default=0.0)),
+                ('age_range_18_24', models.FloatField(default=0.0)),
+                ('age_range_25_34', models.FloatField(default=0.0)),
+                ('age_range_35_44', models.FloatField(default=0.0)),
+                ('age_range_45_54', models.FloatField(default=0.0)),
+                ('age_range_55_plus', models.FloatField(default=0.0)),
+                ('gender_male', models.FloatField(default=0.0)),
+                ('gender_female', models.FloatField(default=0.0)),
+                ('gender_other', models.FloatField(default=0.0)),
+                ('top_countries', models.JSONField(default=dict)),
+                ('top_cities', models.JSONField(default=dict)),
+                ('recorded_at', models.DateTimeField()),
+                ('audience', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analytics.audience')),
+            ],
+        ),
+        migrations.RunPython(build_current_audience, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models
+from django.utils import timezone
 from accounts.models import User, SocialMediaAccount
 
 class Post(models.Model):
@@ -18,14 +21,26 @@ class Post(models.Model):
     thumbnail_url = models.URLField(max_length=1000, blank=True, null=True)
     posted_at = models.DateTimeField()
     is_archived = models.BooleanField(default=False)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The posted_at the rollups counted this post under, so a save that
+        # moves it can refresh the day it left.
+        if 'posted_at' in field_names:
+            instance._loaded_posted_at = instance.posted_at
+        return instance
+    
     class Meta:
         ordering = ['-posted_at']
         indexes = [
             models.Index(fields=['social_account', 'posted_at']),
             models.Index(fields=['content_type', 'posted_at']),
+            GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+            GinIndex(fields=['post_id'], name='post_post_id_trgm', opclasses=['gin_trgm_ops']),
         ]
 
 class PostMetrics(models.Model):
@@ -38,7 +53,7 @@ class PostMetrics(models.Model):
     reach = models.IntegerField(default=0)
     impressions = models.IntegerField(default=0)
     engagement_rate = models.FloatField(default=0.0)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-recorded_at']
@@ -46,6 +61,151 @@ class PostMetrics(models.Model):
             models.Index(fields=['post', 'recorded_at']),
         ]
 
+class LatestSnapshotManager(models.Manager):
+    # Maintains a projection holding each key's newest snapshot (one row
+    # per post, one per account). Subclasses name the projection's key
+    # field and its foreign key to the snapshot; the model provides
+    # SNAPSHOT_FIELDS and from_snapshot().
+    key_field = None
+    snapshot_field = None
+    UPSERT_BATCH_SIZE = 500
+
+    @property
+    def key_attname(self):
+        return self.model._meta.get_field(self.key_field).attname
+
+    def sync(self, snapshots):
+        newest = {}
+        for snapshot in snapshots:
+            key = getattr(snapshot, self.key_attname)
+            held = newest.get(key)
+            if held is None or (snapshot.recorded_at, snapshot.pk) >= (held.recorded_at, held.pk):
+                newest[key] = snapshot
+
+        rows = [self.model.from_snapshot(snapshot) for snapshot in newest.values()]
+        self._upsert(rows, newer_only=True)
+        return len(rows)
+
+    def rebuild(self, keys=None, batch_size=2000):
+        snapshot_model = self.model._meta.get_field(self.snapshot_field).related_model
+        latest_id = snapshot_model.objects.filter(
+            **{self.key_field: models.OuterRef(self.key_field)}
+        ).order_by('-recorded_at', '-id').values('id')[:1]
+
+        snapshots = snapshot_model.objects.filter(id=models.Subquery(latest_id)).order_by()
+        if keys is not None:
+            keys = list(keys)
+            snapshots = snapshots.filter(**{f'{self.key_attname}__in': keys})
+            self.filter(**{f'{self.key_attname}__in': keys}).delete()
+
+        rows = []
+        total = 0
+        for snapshot in snapshots.iterator(chunk_size=batch_size):
+            rows.append(self.model.from_snapshot(snapshot))
+            if len(rows) >= batch_size:
+                self._upsert(rows)
+                total += len(rows)
+                rows = []
+
+        self._upsert(rows)
+        return total + len(rows)
+
+    def _upsert(self, rows, newer_only=False):
+        # INSERT ... ON CONFLICT DO UPDATE. With newer_only the comparison
+        # with the stored snapshot happens inside the statement, so of two
+        # concurrent writers the older snapshot can never win; re-saving
+        # the current snapshot always applies.
+        if not rows:
+            return
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        fields = [self.model._meta.get_field(name) for name in [self.key_field, self.snapshot_field, 'recorded_at']]
+        fields += [self.model._meta.get_field(name) for name in self.model.SNAPSHOT_FIELDS]
+        columns = [quote(field.column) for field in fields]
+        key, snapshot_id, recorded_at = columns[:3]
+
+        sql = (
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES %s '
+            f'ON CONFLICT ({key}) DO UPDATE SET {", ".join(f"{column} = EXCLUDED.{column}" for column in columns[1:])}'
+        )
+        if newer_only:
+            sql += (
+                f' WHERE (EXCLUDED.{recorded_at}, EXCLUDED.{snapshot_id}) >= ({table}.{recorded_at}, {table}.{snapshot_id})'
+                f' OR EXCLUDED.{snapshot_id} = {table}.{snapshot_id}'
+            )
+
+        placeholder = f'({", ".join(["%s"] * len(fields))})'
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.UPSERT_BATCH_SIZE):
+                batch = rows[start:start + self.UPSERT_BATCH_SIZE]
+                params = [
+                    field.get_db_prep_save(getattr(row, field.attname), connection)
+                    for row in batch for field in fields
+                ]
+                cursor.execute(sql % ', '.join([placeholder] * len(batch)), params)
+
+class PostCurrentMetricsManager(LatestSnapshotManager):
+    key_field = 'post'
+    snapshot_field = 'metrics'
+
+class PostCurrentMetrics(models.Model):
+    SNAPSHOT_FIELDS = [
+        'likes_count', 'comments_count', 'shares_count', 'saves_count',
+        'views_count', 'reach', 'impressions', 'engagement_rate',
+    ]
+
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='current_metrics')
+    # No database constraint: a partitioned PostMetrics table (see
+    # partitions.py) cannot be referenced by id alone.
+    metrics = models.ForeignKey(PostMetrics, on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    shares_count = models.IntegerField(default=0)
+    saves_count = models.IntegerField(default=0)
+    views_count = models.IntegerField(default=0)
+    reach = models.IntegerField(default=0)
+    impressions = models.IntegerField(default=0)
+    engagement_rate = models.FloatField(default=0.0)
+    recorded_at = models.DateTimeField()
+
+    objects = PostCurrentMetricsManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['engagement_rate']),
+        ]
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(
+            post_id=snapshot.post_id,
+            metrics_id=snapshot.pk,
+            recorded_at=snapshot.recorded_at,
+            **{field: getattr(snapshot, field) for field in cls.SNAPSHOT_FIELDS}
+        )
+
+class DailyMetricsRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    social_account = models.ForeignKey(SocialMediaAccount, on_delete=models.CASCADE, related_name='daily_rollups')
+    platform = models.CharField(max_length=20)
+    content_type = models.CharField(max_length=20, choices=Post.CONTENT_TYPE_CHOICES)
+    date = models.DateField()
+    posts_published = models.IntegerField(default=0)
+    snapshots_count = models.IntegerField(default=0)
+    total_likes = models.BigIntegerField(default=0)
+    total_comments = models.BigIntegerField(default=0)
+    total_shares = models.BigIntegerField(default=0)
+    total_reach = models.BigIntegerField(default=0)
+    engagement_rate_sum = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['social_account', 'content_type', 'date']
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     comment_id = models.CharField(max_length=255, unique=True)
@@ -55,10 +215,18 @@ class Comment(models.Model):
     replied_to = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='replies')
     posted_at = models.DateTimeField()
     sentiment_score = models.FloatField(blank=True, null=True)
+    sentiment_version = models.CharField(max_length=32, blank=True, null=True)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-posted_at']
+        indexes = [
+            models.Index(fields=['post', 'posted_at']),
+            models.Index(fields=['posted_at', 'id']),
+            GinIndex(fields=['search_vector'], name='comment_search_vector_gin'),
+            GinIndex(fields=['username'], name='comment_username_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
 class Hashtag(models.Model):
     tag = models.CharField(max_length=255, unique=True, db_index=True)
@@ -72,6 +240,21 @@ class PostHashtag(models.Model):
     class Meta:
         unique_together = ['post', 'hashtag']
 
+class HashtagDailyStats(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hashtag_stats')
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    usage_count = models.IntegerField(default=0)
+    engagement_sum = models.FloatField(default=0.0)
+    likes_sum = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'hashtag', 'date']
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
 class Audience(models.Model):
     social_account = models.ForeignKey(SocialMediaAccount, on_delete=models.CASCADE, related_name='audience')
     followers_count = models.IntegerField(default=0)
@@ -91,6 +274,50 @@ class Audience(models.Model):
     
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['social_account', 'recorded_at']),
+        ]
+
+class CurrentAudienceManager(LatestSnapshotManager):
+    key_field = 'social_account'
+    snapshot_field = 'audience'
+
+class CurrentAudience(models.Model):
+    # Newest Audience snapshot per account, so totals across accounts are a
+    # single query.
+    SNAPSHOT_FIELDS = [
+        'followers_count', 'following_count', 'age_range_13_17', 'age_range_18_24', 'age_range_25_34',
+        'age_range_35_44', 'age_range_45_54', 'age_range_55_plus', 'gender_male', 'gender_female',
+        'gender_other', 'top_countries', 'top_cities',
+    ]
+
+    social_account = models.OneToOneField(SocialMediaAccount, on_delete=models.CASCADE, primary_key=True, related_name='current_audience')
+    audience = models.ForeignKey(Audience, on_delete=models.CASCADE, related_name='+')
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    age_range_13_17 = models.FloatField(default=0.0)
+    age_range_18_24 = models.FloatField(default=0.0)
+    age_range_25_34 = models.FloatField(default=0.0)
+    age_range_35_44 = models.FloatField(default=0.0)
+    age_range_45_54 = models.FloatField(default=0.0)
+    age_range_55_plus = models.FloatField(default=0.0)
+    gender_male = models.FloatField(default=0.0)
+    gender_female = models.FloatField(default=0.0)
+    gender_other = models.FloatField(default=0.0)
+    top_countries = models.JSONField(default=dict)
+    top_cities = models.JSONField(default=dict)
+    recorded_at = models.DateTimeField()
+
+    objects = CurrentAudienceManager()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(
+            social_account_id=snapshot.social_account_id,
+            audience_id=snapshot.pk,
+            recorded_at=snapshot.recorded_at,
+            **{field: getattr(snapshot, field) for field in cls.SNAPSHOT_FIELDS}
+        )
 
 class EngagementPattern(models.Model):
     social_account = models.ForeignKey(SocialMediaAccount, on_delete=models.CASCADE, related_name='engagement_patterns')
@@ -107,6 +334,19 @@ class EngagementPattern(models.Model):
     class Meta:
         unique_together = ['social_account', 'hour_of_day', 'day_of_week']
 
+class EngagementHeatmap(models.Model):
+    # Dense 7x24 grid of an account's EngagementPattern rows, packed by
+    # analytics.heatmap.pack_grid and refreshed by the pattern job.
+    social_account = models.OneToOneField(SocialMediaAccount, on_delete=models.CASCADE, primary_key=True, related_name='engagement_heatmap')
+    grid = models.BinaryField()
+    post_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class ProcessingCheckpoint(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
 class AIInsight(models.Model):
     INSIGHT_TYPE_CHOICES = [
         ('content_performance', 'Content Performance'),
@@ -125,6 +365,7 @@ class AIInsight(models.Model):
     data = models.JSONField(default=dict)
     priority = models.IntegerField(default=0)
     is_read = models.BooleanField(default=False)
+    fingerprint = models.CharField(max_length=40, unique=True, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -136,6 +377,7 @@ class Query(models.Model):
     response = models.TextField(blank=True, null=True)
     response_data = models.JSONField(default=dict)
     execution_time = models.FloatField(blank=True, null=True)
+    timings = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -166,6 +408,9 @@ class Report(models.Model):
     filters = models.JSONField(default=dict)
     file = models.FileField(upload_to='reports/', blank=True, null=True)
     status = models.CharField(max_length=20, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0)
+    row_count = models.BigIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
     
@@ -178,6 +423,8 @@ class Competitor(models.Model):
     account_username = models.CharField(max_length=255)
     account_id = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
+    # Newest CompetitorMetrics row, maintained by analytics.competitors.
+    latest_metrics = models.ForeignKey('CompetitorMetrics', on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
     added_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -195,6 +442,9 @@ class CompetitorMetrics(models.Model):
     
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['competitor', 'recorded_at']),
+        ]
 
 class ContentStrategy(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='strategies')
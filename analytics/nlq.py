@@ -0,0 +1,348 @@
+import hashlib
+import re
+import time
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import Post, Comment
+from .cache import CACHED_ACTIONS, record_lookup, user_cache_key
+
+# Part of the plan cache key; bump when the grammar changes so stale plans
+# are not reused.
+GRAMMAR_VERSION = 1
+PLAN_CACHE_TIMEOUT = 60 * 60 * 24
+RESULT_CACHE_NAME = 'nlq.results'
+CACHED_ACTIONS.add(RESULT_CACHE_NAME)
+
+DEFAULT_PERIOD = {'kind': 'days', 'value': 30}
+DEFAULT_TOP_LIMIT = 5
+MAX_TOP_LIMIT = 50
+MAX_GROUPS = 100
+
+# metric -> (source, field, default aggregate, label)
+METRICS = {
+    'likes': ('posts', 'current_metrics__likes_count', 'sum', 'likes'),
+    'comments': ('posts', 'current_metrics__comments_count', 'sum', 'comments'),
+    'shares': ('posts', 'current_metrics__shares_count', 'sum', 'shares'),
+    'saves': ('posts', 'current_metrics__saves_count', 'sum', 'saves'),
+    'views': ('posts', 'current_metrics__views_count', 'sum', 'views'),
+    'reach': ('posts', 'current_metrics__reach', 'sum', 'reach'),
+    'impressions': ('posts', 'current_metrics__impressions', 'sum', 'impressions'),
+    'engagement': ('posts', 'current_metrics__engagement_rate', 'avg', 'engagement rate'),
+    'posts': ('posts', 'id', 'count', 'posts'),
+    'sentiment': ('comments', 'sentiment_score', 'avg', 'comment sentiment'),
+}
+
+METRIC_WORDS = [
+    (r'engagement(?: rate)?|engaged', 'engagement'),
+    (r'sentiment|mood|tone', 'sentiment'),
+    (r'likes?|hearts?', 'likes'),
+    (r'comments?|replies', 'comments'),
+    (r'shares?|reposts?|retweets?', 'shares'),
+    (r'saves?|bookmarks?', 'saves'),
+    (r'views?|plays?|watch(?:es)?', 'views'),
+    (r'reach', 'reach'),
+    (r'impressions?', 'impressions'),
+    (r'posts?|content|uploads?|published', 'posts'),
+]
+
+AGGREGATE_WORDS = [
+    (r'average|avg|mean|typical|per post', 'avg'),
+    (r'total|sum|overall|combined|all together', 'sum'),
+    (r'how many|number of|count', 'count'),
+    (r'maximum|max|highest|most|peak|best', 'max'),
+    (r'minimum|min|lowest|least|worst', 'min'),
+]
+
+AGGREGATES = {'avg': Avg, 'sum': Sum, 'count': Count, 'max': Max, 'min': Min}
+AGGREGATE_LABELS = {'avg': 'Average', 'sum': 'Total', 'count': 'Number of', 'max': 'Highest', 'min': 'Lowest'}
+
+CONTENT_TYPE_WORDS = [
+    (r'reels?', 'reel'),
+    (r'carousels?|albums?', 'carousel'),
+    (r'static(?: posts?)?|images?|photos?|pictures?', 'static'),
+    (r'stor(?:y|ies)', 'story'),
+    (r'videos?|clips?', 'video'),
+]
+
+PLATFORM_WORDS = [
+    (r'instagram|insta|ig', 'instagram'),
+    (r'facebook|fb', 'facebook'),
+    (r'twitter|tweets?|on x', 'twitter'),
+    (r'linkedin', 'linkedin'),
+    (r'youtube|yt', 'youtube'),
+    (r'tiktok|tik tok', 'tiktok'),
+]
+
+GROUP_WORDS = [
+    (r'(?:by|per|for each|each|across) platforms?', 'platform'),
+    (r'(?:by|per|for each|each|across) (?:content type|type|format)s?', 'content_type'),
+    (r'(?:by|per|for each|each|across) accounts?', 'account'),
+    (r'(?:by|per|each) day|daily|day by day', 'day'),
+    (r'(?:by|per|each) week|weekly|week by week', 'week'),
+    (r'(?:by|per|each) month|monthly|month by month', 'month'),
+]
+
+UNIT_DAYS = {'day': 1, 'week': 7, 'month': 30, 'year': 365}
+
+PERIOD_PATTERNS = [
+    (re.compile(r'\b(?:last|past|previous|in the last|over the last) (\d+) (day|week|month|year)s?\b'),
+     lambda match: {'kind': 'days', 'value': int(match.group(1)) * UNIT_DAYS[match.group(2)]}),
+    (re.compile(r'\b(?:last|past|previous) (day|week|month|year)\b'),
+     lambda match: {'kind': 'days', 'value': UNIT_DAYS[match.group(1)]}),
+    (re.compile(r'\btoday\b'), lambda match: {'kind': 'today'}),
+    (re.compile(r'\byesterday\b'), lambda match: {'kind': 'yesterday'}),
+    (re.compile(r'\bthis week\b'), lambda match: {'kind': 'this_week'}),
+    (re.compile(r'\bthis month\b'), lambda match: {'kind': 'this_month'}),
+    (re.compile(r'\bthis year\b'), lambda match: {'kind': 'this_year'}),
+    (re.compile(r'\b(?:all time|ever|overall history)\b'), lambda match: {'kind': 'all'}),
+]
+
+TOP_PATTERN = re.compile(
+    r'\b(top|best|best performing|highest|worst|bottom|lowest)\s+(?:(\d+)\s+)?'
+    r'(?:\w+\s+)?(posts?|reels?|carousels?|stor(?:y|ies)|videos?|content|static posts?)\b'
+)
+ORDER_BY_PATTERN = re.compile(r'\b(?:by|on|with the most|with most|sorted by|ranked by)\s+(\w+(?: rate)?)\b')
+ACCOUNT_PATTERN = re.compile(r'@([\w.]+)')
+NUMBER_WORDS = {'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6',
+                'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10'}
+
+def _compile(words):
+    return [(re.compile(rf'\b(?:{pattern})\b'), value) for pattern, value in words]
+
+METRIC_PATTERNS = _compile(METRIC_WORDS)
+AGGREGATE_PATTERNS = _compile(AGGREGATE_WORDS)
+CONTENT_TYPE_PATTERNS = _compile(CONTENT_TYPE_WORDS)
+PLATFORM_PATTERNS = _compile(PLATFORM_WORDS)
+GROUP_PATTERNS = _compile(GROUP_WORDS)
+
+class QueryError(Exception):
+    pass
+
+def normalize_query(text):
+    text = text.lower().strip()
+    text = re.sub(r"[^\w@.\s]|(?<!\w)\.|\.(?!\w)", ' ', text)
+    return ' '.join(NUMBER_WORDS.get(word, word) for word in text.split())
+
+def _find_all(patterns, text):
+    found = []
+    for pattern, value in patterns:
+        if pattern.search(text) and value not in found:
+            found.append(value)
+    return found
+
+def _first(patterns, text):
+    found = _find_all(patterns, text)
+    return found[0] if found else None
+
+def _metric_from(text):
+    metrics = _find_all(METRIC_PATTERNS, text)
+    specific = [metric for metric in metrics if metric != 'posts']
+    if specific:
+        return specific[0]
+    return metrics[0] if metrics else None
+
+def parse_query(normalized):
+    plan = {
+        'intent': 'aggregate',
+        'metric': None,
+        'aggregate': None,
+        'content_types': [],
+        'platforms': _find_all(PLATFORM_PATTERNS, normalized),
+        'accounts': ACCOUNT_PATTERN.findall(normalized),
+        'period': dict(DEFAULT_PERIOD),
+        'group_by': _first(GROUP_PATTERNS, normalized),
+    }
+
+    text = ACCOUNT_PATTERN.sub(' ', normalized)
+    for pattern, build in PERIOD_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            plan['period'] = build(match)
+            text = text[:match.start()] + ' ' + text[match.end():]
+            break
+
+    top = TOP_PATTERN.search(text)
+    if top:
+        plan['intent'] = 'top'
+        plan['order'] = 'asc' if top.group(1) in ('worst', 'bottom', 'lowest') else 'desc'
+        plan['limit'] = min(int(top.group(2) or DEFAULT_TOP_LIMIT), MAX_TOP_LIMIT)
+        plan['metric'] = 'engagement'
+        for match in ORDER_BY_PATTERN.finditer(text, top.end()):
+            metric = _metric_from(match.group(1))
+            if metric not in (None, 'posts', 'sentiment'):
+                plan['metric'] = metric
+                break
+    else:
+        plan['metric'] = _metric_from(text)
+        if plan['metric'] is None:
+            if plan['group_by'] or _first(AGGREGATE_PATTERNS, text) == 'count':
+                plan['metric'] = 'posts'
+            else:
+                raise QueryError('Could not tell which metric to report. Try likes, comments, shares, '
+                                 'views, reach, impressions, engagement, posts or sentiment.')
+
+        aggregate = _first(AGGREGATE_PATTERNS, text) or METRICS[plan['metric']][2]
+        if plan['metric'] == 'posts':
+            aggregate = 'count'
+        elif aggregate == 'count':
+            aggregate = 'sum' if METRICS[plan['metric']][2] == 'sum' else 'avg'
+        plan['aggregate'] = aggregate
+
+    plan['content_types'] = _find_all(CONTENT_TYPE_PATTERNS, text)
+    return plan
+
+def get_plan(text):
+    normalized = normalize_query(text)
+    if not normalized:
+        raise QueryError('query_text is empty')
+
+    key = f'analytics:nlq:plan:{GRAMMAR_VERSION}:{hashlib.sha1(normalized.encode()).hexdigest()}'
+    plan = cache.get(key)
+    if plan is not None:
+        return plan, True
+
+    plan = parse_query(normalized)
+    cache.set(key, plan, PLAN_CACHE_TIMEOUT)
+    return plan, False
+
+def period_bounds(period, now=None):
+    now = now or timezone.now()
+    today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    kind = period['kind']
+    if kind == 'days':
+        return now - timedelta(days=period['value']), None
+    if kind == 'today':
+        return today, None
+    if kind == 'yesterday':
+        return today - timedelta(days=1), today
+    if kind == 'this_week':
+        return today - timedelta(days=today.weekday()), None
+    if kind == 'this_month':
+        return today.replace(day=1), None
+    if kind == 'this_year':
+        return today.replace(month=1, day=1), None
+    return None, None
+
+def _source(user, plan):
+    source = METRICS[plan['metric']][0]
+    if source == 'comments':
+        queryset = Comment.objects.filter(post__social_account__user=user)
+        prefix = 'post__'
+    else:
+        queryset = Post.objects.filter(social_account__user=user)
+        prefix = ''
+
+    start, end = period_bounds(plan['period'])
+    if start:
+        queryset = queryset.filter(posted_at__gte=start)
+    if end:
+        queryset = queryset.filter(posted_at__lt=end)
+    if plan['content_types']:
+        queryset = queryset.filter(**{f'{prefix}content_type__in': plan['content_types']})
+    if plan['platforms']:
+        queryset = queryset.filter(**{f'{prefix}social_account__platform__in': plan['platforms']})
+    if plan['accounts']:
+        queryset = queryset.filter(**{f'{prefix}social_account__account_username__in': plan['accounts']})
+    return queryset, prefix
+
+# Returns the queryset to run and, for ungrouped aggregates, the aggregate
+# expression to evaluate over it.
+def build_queryset(user, plan):
+    queryset, prefix = _source(user, plan)
+    field = METRICS[plan['metric']][1]
+
+    if plan['intent'] == 'top':
+        order = F(field).asc(nulls_last=True) if plan['order'] == 'asc' else F(field).desc(nulls_last=True)
+        return queryset.order_by(order, '-id').values(
+            'post_id', 'content_type', 'posted_at', 'caption',
+            platform=F('social_account__platform'),
+            account=F('social_account__account_username'),
+            value=F(field)
+        )[:plan['limit']], None
+
+    value = AGGREGATES[plan['aggregate']](field)
+    group_by = plan['group_by']
+    if group_by is None:
+        return queryset.order_by(), value
+
+    tzinfo = timezone.get_current_timezone()
+    groups = {
+        'platform': F(f'{prefix}social_account__platform'),
+        'content_type': F(f'{prefix}content_type'),
+        'account': F(f'{prefix}social_account__account_username'),
+        'day': TruncDay('posted_at', tzinfo=tzinfo),
+        'week': TruncWeek('posted_at', tzinfo=tzinfo),
+        'month': TruncMonth('posted_at', tzinfo=tzinfo),
+    }
+    ordering = 'group' if group_by in ('day', 'week', 'month') else '-value'
+    return queryset.order_by().values(group=groups[group_by]).annotate(value=value).order_by(ordering)[:MAX_GROUPS], None
+
+def _format(value):
+    if value is None:
+        return 0
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date().isoformat()
+    return value
+
+def describe(plan):
+    label = METRICS[plan['metric']][3]
+    scope = []
+    if plan['content_types']:
+        scope.append(f"on {', '.join(plan['content_types'])} posts")
+    if plan['platforms']:
+        scope.append(f"on {', '.join(name.title() for name in plan['platforms'])}")
+    if plan['accounts']:
+        scope.append(f"for {', '.join('@' + name for name in plan['accounts'])}")
+    period = plan['period']
+    if period['kind'] == 'days':
+        scope.append(f"in the last {period['value']} days")
+    elif period['kind'] != 'all':
+        scope.append(period['kind'].replace('_', ' '))
+
+    if plan['intent'] == 'top':
+        direction = 'Bottom' if plan['order'] == 'asc' else 'Top'
+        return ' '.join([f"{direction} {plan['limit']} posts by {label}"] + scope)
+    head = f"{AGGREGATE_LABELS[plan['aggregate']]} {label}"
+    if plan['group_by']:
+        head += f" by {plan['group_by'].replace('_', ' ')}"
+    return ' '.join([head] + scope)
+
+def run_query(user, text):
+    started = time.perf_counter()
+    plan, plan_cached = get_plan(text)
+    parsed = time.perf_counter()
+
+    # Relative periods move with the calendar, so the day is part of the key.
+    key = user_cache_key(user.id, RESULT_CACHE_NAME, [plan, timezone.localdate().isoformat()])
+    payload = cache.get(key)
+    result_cached = payload is not None
+    record_lookup(RESULT_CACHE_NAME, result_cached)
+    planned = executed = parsed
+
+    if not result_cached:
+        queryset, aggregate = build_queryset(user, plan)
+        planned = time.perf_counter()
+        if aggregate is not None:
+            results = {'value': _format(queryset.aggregate(value=aggregate)['value'])}
+        else:
+            results = [{name: _format(value) for name, value in row.items()} for row in queryset]
+        executed = time.perf_counter()
+
+        payload = {'plan': plan, 'message': describe(plan), 'results': results}
+        cache.set(key, payload)
+
+    finished = time.perf_counter()
+    timings = {
+        'parse_ms': round((parsed - started) * 1000, 3),
+        'plan_ms': round((planned - parsed) * 1000, 3),
+        'execute_ms': round((executed - planned) * 1000, 3),
+        'total_ms': round((finished - started) * 1000, 3),
+        'plan_cached': plan_cached,
+        'result_cached': result_cached,
+    }
+    return dict(payload, timings=timings)
@@ -0,0 +1,172 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class KeysetPagination(BasePagination):
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    # Requests that page by number, pick their own ordering or are ranked
+    # by search relevance keep the classic OFFSET pagination.
+    fallback_query_params = ('page', 'ordering', 'search')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if any(param in request.query_params for param in self.fallback_query_params):
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count(queryset, request)
+        cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = cursor['r'] if cursor else False
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, cursor['v']))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = (cursor is not None) if not self.reverse else has_more
+        self.first = self._position(results[0]) if results else None
+        self.last = self._position(results[-1]) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in ('true', 'exact'):
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    def _flip(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, ordering, values):
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _position(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def decode_cursor(self, request, model=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if not isinstance(cursor, dict) or not isinstance(cursor.get('v'), list):
+                raise ValueError
+            if len(cursor['v']) != len(self.ordering):
+                raise ValueError
+            values = [self._cursor_value(model, field, value) for field, value in zip(self.ordering, cursor['v'])]
+            return {'v': values, 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _cursor_value(self, model, field, value):
+        # Cursors come from the client: only plain values that the ordering
+        # field accepts, so a tampered one is a 404 rather than a 500.
+        if value is None or isinstance(value, (bool, dict, list)):
+            raise ValueError
+        if model is not None:
+            value = model._meta.get_field(field.lstrip('-')).to_python(value)
+        return value
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first, True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+def estimate_count(queryset):
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+class PostCursorPagination(KeysetPagination):
+    ordering = ('-posted_at', '-id')
+
+class PostMetricsCursorPagination(KeysetPagination):
+    ordering = ('-recorded_at', '-id')
+
+class CommentCursorPagination(KeysetPagination):
+    ordering = ('-posted_at', '-id')
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import PostMetrics
+from .rollups import day_bounds
+
+# PostMetrics is range partitioned by month on recorded_at (PostgreSQL only),
+# so filters on recorded_at only scan the months they cover. Months are
+# local (TIME_ZONE) calendar months, like the daily rollups.
+TABLE = PostMetrics._meta.db_table
+SOURCE_TABLE = f'{TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+MONTHS_AHEAD = 3
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+def month_start(value):
+    return (timezone.localdate(value) if hasattr(value, 'hour') else value).replace(day=1)
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+def existing_partitions(cursor):
+    cursor.execute(
+        'SELECT child.relname FROM pg_inherits '
+        'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+        'WHERE pg_inherits.inhparent = to_regclass(%s)',
+        [TABLE]
+    )
+    return {name for name, in cursor.fetchall()}
+
+def create_partition(cursor, month):
+    start, end = day_bounds(month)[0], day_bounds(next_month(month))[0]
+    name = partition_name(month)
+
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE recorded_at >= %s AND recorded_at < %s)',
+        [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        return
+
+    # Rows for this month already landed in the default partition (a
+    # backfill, or the job not running for a while); move them across.
+    with transaction.atomic():
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at >= %s AND recorded_at < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+
+def ensure_partitions(first_month=None, months_ahead=MONTHS_AHEAD):
+    if not is_partitioned():
+        return []
+
+    last_month = month_start(timezone.now())
+    for _ in range(months_ahead):
+        last_month = next_month(last_month)
+
+    created = []
+    with connection.cursor() as cursor:
+        existing = existing_partitions(cursor)
+        month = first_month or month_start(timezone.now())
+        while month <= last_month:
+            if partition_name(month) not in existing:
+                create_partition(cursor, month)
+                created.append(partition_name(month))
+            month = next_month(month)
+    return created
+
+def _table_definitions(cursor, table):
+    cursor.execute(
+        'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s',
+        [table, '%_pkey']
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+def partition_post_metrics(batch_size=500000, progress=None):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE]
+        )
+        referencing = [name for name, in cursor.fetchall()]
+        if referencing:
+            raise ValueError(f"Foreign keys from {', '.join(referencing)} must be dropped before partitioning {TABLE}")
+
+        indexes, foreign_keys = _table_definitions(cursor, TABLE)
+        cursor.execute(f'SELECT min(recorded_at), coalesce(max(id), 0) FROM {TABLE}')
+        oldest, max_id = cursor.fetchone()
+
+        # Build the partitioned table next to the old one; writers are
+        # blocked for the duration of the copy.
+        with transaction.atomic():
+            cursor.execute(f'LOCK TABLE {TABLE} IN EXCLUSIVE MODE')
+            cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {SOURCE_TABLE}')
+            cursor.execute(f'ALTER TABLE {SOURCE_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {SOURCE_TABLE}_pkey')
+            cursor.execute(f'CREATE TABLE {TABLE} (LIKE {SOURCE_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (recorded_at)')
+            cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, recorded_at)')
+            cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+            existing = set()
+            month = month_start(oldest) if oldest else month_start(timezone.now())
+            while month <= month_start(timezone.now()):
+                create_partition(cursor, month)
+                existing.add(month)
+                month = next_month(month)
+
+            copied = 0
+            for start in range(0, max_id + 1, batch_size):
+                cursor.execute(
+                    f'INSERT INTO {TABLE} SELECT * FROM {SOURCE_TABLE} WHERE id >= %s AND id < %s',
+                    [start, start + batch_size]
+                )
+                copied += cursor.rowcount
+                if progress:
+                    progress(copied)
+
+            # The identity sequence goes with the old table; ids continue
+            # from a plain sequence owned by the new one.
+            cursor.execute(f'DROP TABLE {SOURCE_TABLE}')
+            cursor.execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+            cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+            cursor.execute('SELECT setval(%s, %s)', [SEQUENCE, max(max_id, 1)])
+            # Definitions were read before the rename, so they already name
+            # the new table.
+            for name, definition in indexes:
+                cursor.execute(definition)
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+
+    created = ensure_partitions()
+    return {'copied': copied, 'partitions': len(existing) + len(created)}
@@ -0,0 +1,122 @@
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+from .models import Post, EngagementPattern, ProcessingCheckpoint
+from .cache import bump_generation_for_accounts
+from .heatmap import refresh_heatmaps
+
+CHECKPOINT_NAME = 'engagement_patterns'
+
+PATTERN_FIELDS = ['avg_engagement_rate', 'avg_likes', 'avg_comments', 'avg_shares', 'post_count']
+
+def _bucket_totals(posts):
+    tzinfo = timezone.get_current_timezone()
+    
+    rows = posts.filter(
+        social_account__is_active=True,
+        current_metrics__isnull=False
+    ).annotate(
+        day=ExtractIsoWeekDay('posted_at', tzinfo=tzinfo),
+        hour=ExtractHour('posted_at', tzinfo=tzinfo)
+    ).order_by().values('social_account_id', 'day', 'hour').annotate(
+        posts=Count('id'),
+        engagement_rate=Sum('current_metrics__engagement_rate'),
+        likes=Sum('current_metrics__likes_count'),
+        comments=Sum('current_metrics__comments_count'),
+        shares=Sum('current_metrics__shares_count')
+    )
+    
+    return {
+        (row['social_account_id'], row['day'] - 1, row['hour']): row
+        for row in rows
+    }
+
+def _fold(pattern, totals):
+    count = pattern.post_count + totals['posts']
+    pattern.avg_engagement_rate = (pattern.avg_engagement_rate * pattern.post_count + (totals['engagement_rate'] or 0)) / count
+    pattern.avg_likes = (pattern.avg_likes * pattern.post_count + (totals['likes'] or 0)) / count
+    pattern.avg_comments = (pattern.avg_comments * pattern.post_count + (totals['comments'] or 0)) / count
+    pattern.avg_shares = (pattern.avg_shares * pattern.post_count + (totals['shares'] or 0)) / count
+    pattern.post_count = count
+    return pattern
+
+def _new_pattern(key):
+    account_id, day, hour = key
+    return EngagementPattern(social_account_id=account_id, day_of_week=day, hour_of_day=hour, post_count=0)
+
+def rebuild_engagement_patterns(account_ids=None):
+    checkpoint = ProcessingCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    posts = Post.objects.all()
+    stale = EngagementPattern.objects.order_by()
+    if account_ids is not None:
+        account_ids = list(account_ids)
+        if not account_ids:
+            return 0
+        posts = posts.filter(social_account_id__in=account_ids)
+        stale = stale.filter(social_account_id__in=account_ids)
+    
+    # A scoped rebuild leaves the checkpoint alone, so it stops where the
+    # checkpoint is: fold_new_posts still owes every account the posts above.
+    if account_ids is None or checkpoint is None:
+        upper = Post.objects.aggregate(upper=Max('id'))['upper'] or 0
+    else:
+        upper = checkpoint.position
+    totals = _bucket_totals(posts.filter(id__lte=upper))
+    patterns = [_fold(_new_pattern(key), bucket) for key, bucket in totals.items()]
+    
+    table = EngagementPattern._meta.db_table
+    with transaction.atomic():
+        previous = set(stale.values_list('social_account_id', flat=True).distinct())
+        # Raw DELETE: delete() would load every row to send post_delete (and
+        # a cache bump) per pattern. Nothing references patterns, and the
+        # bump below covers every account that had or now has patterns.
+        with connection.cursor() as cursor:
+            if account_ids is None:
+                cursor.execute(f'DELETE FROM {table}')
+            else:
+                placeholders = ', '.join(['%s'] * len(account_ids))
+                cursor.execute(f'DELETE FROM {table} WHERE social_account_id IN ({placeholders})', account_ids)
+        EngagementPattern.objects.bulk_create(patterns, batch_size=1000)
+        refresh_heatmaps(account_ids)
+        if account_ids is None:
+            ProcessingCheckpoint.objects.update_or_create(name=CHECKPOINT_NAME, defaults={'position': upper})
+    
+    bump_generation_for_accounts(previous.union(pattern.social_account_id for pattern in patterns))
+    return len(patterns)
+
+def fold_new_posts():
+    checkpoint = ProcessingCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None:
+        return rebuild_engagement_patterns()
+    
+    upper = Post.objects.aggregate(upper=Max('id'))['upper'] or 0
+    if upper <= checkpoint.position:
+        return 0
+    
+    totals = _bucket_totals(Post.objects.filter(id__gt=checkpoint.position, id__lte=upper))
+    account_ids = {account_id for account_id, _, _ in totals}
+    
+    existing = {
+        (pattern.social_account_id, pattern.day_of_week, pattern.hour_of_day): pattern
+        for pattern in EngagementPattern.objects.filter(social_account_id__in=account_ids)
+    }
+    patterns = [
+        _fold(existing.get(key) or _new_pattern(key), bucket)
+        for key, bucket in totals.items()
+    ]
+    
+    with transaction.atomic():
+        EngagementPattern.objects.bulk_create(
+            patterns,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['social_account', 'hour_of_day', 'day_of_week'],
+            update_fields=PATTERN_FIELDS + ['updated_at']
+        )
+        refresh_heatmaps(account_ids)
+        checkpoint.position = upper
+        checkpoint.save()
+    
+    bump_generation_for_accounts(account_ids)
+    return len(patterns)
@@ -0,0 +1,438 @@
+import csv
+import io
+import json
+import re
+import tempfile
+import zipfile
+from datetime import timedelta
+from xml.sax.saxutils import escape
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from accounts.models import SocialMediaAccount
+from .audience import FollowerHistory
+from .exports import iter_export_rows
+from .models import Post, PostMetrics, Comment, Audience, CompetitorMetrics, Report
+
+PROGRESS_EVERY = 10000
+
+# Control characters XML 1.0 does not allow even escaped; the same pattern
+# as openpyxl's ILLEGAL_CHARACTERS_RE.
+ILLEGAL_XML_CHARACTERS = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+FILE_EXTENSIONS = {
+    'csv': 'csv',
+    'json': 'json',
+    'excel': 'xlsx',
+    'pdf': 'pdf',
+}
+
+# source -> (model, user lookup, time field, account lookup, platform lookup, columns)
+# A column without a lookup is the account's follower count as of the
+# row's time field, filled in from FollowerHistory.
+REPORT_SOURCES = {
+    'posts': (Post, 'social_account__user', 'posted_at', 'social_account', 'social_account__platform', {
+        'post_id': 'post_id',
+        'platform': 'social_account__platform',
+        'account_username': 'social_account__account_username',
+        'content_type': 'content_type',
+        'posted_at': 'posted_at',
+        'likes_count': 'current_metrics__likes_count',
+        'comments_count': 'current_metrics__comments_count',
+        'shares_count': 'current_metrics__shares_count',
+        'saves_count': 'current_metrics__saves_count',
+        'views_count': 'current_metrics__views_count',
+        'reach': 'current_metrics__reach',
+        'impressions': 'current_metrics__impressions',
+        'engagement_rate': 'current_metrics__engagement_rate',
+        'followers_count': None,
+        'caption': 'caption',
+    }),
+    'metrics': (PostMetrics, 'post__social_account__user', 'recorded_at', 'post__social_account', 'post__social_account__platform', {
+        'post_id': 'post__post_id',
+        'platform': 'post__social_account__platform',
+        'content_type': 'post__content_type',
+        'recorded_at': 'recorded_at',
+        'likes_count': 'likes_count',
+        'comments_count': 'comments_count',
+        'shares_count': 'shares_count',
+        'saves_count': 'saves_count',
+        'views_count': 'views_count',
+        'reach': 'reach',
+        'impressions': 'impressions',
+        'engagement_rate': 'engagement_rate',
+        'followers_count': None,
+    }),
+    'comments': (Comment, 'post__social_account__user', 'posted_at', 'post__social_account', 'post__social_account__platform', {
+        'comment_id': 'comment_id',
+        'post_id': 'post__post_id',
+        'platform': 'post__social_account__platform',
+        'username': 'username',
+        'text': 'text',
+        'likes_count': 'likes_count',
+        'sentiment_score': 'sentiment_score',
+        'posted_at': 'posted_at',
+    }),
+    'audience': (Audience, 'social_account__user', 'recorded_at', 'social_account', 'social_account__platform', {
+        'platform': 'social_account__platform',
+        'account_username': 'social_account__account_username',
+        'recorded_at': 'recorded_at',
+        'followers_count': 'followers_count',
+        'following_count': 'following_count',
+        'age_range_13_17': 'age_range_13_17',
+        'age_range_18_24': 'age_range_18_24',
+        'age_range_25_34': 'age_range_25_34',
+        'age_range_35_44': 'age_range_35_44',
+        'age_range_45_54': 'age_range_45_54',
+        'age_range_55_plus': 'age_range_55_plus',
+        'gender_male': 'gender_male',
+        'gender_female': 'gender_female',
+        'gender_other': 'gender_other',
+        'top_countries': 'top_countries',
+        'top_cities': 'top_cities',
+    }),
+    'competitors': (CompetitorMetrics, 'competitor__user', 'recorded_at', None, 'competitor__platform', {
+        'platform': 'competitor__platform',
+        'account_username': 'competitor__account_username',
+        'recorded_at': 'recorded_at',
+        'followers_count': 'followers_count',
+        'following_count': 'following_count',
+        'posts_count': 'posts_count',
+        'avg_engagement_rate': 'avg_engagement_rate',
+        'avg_likes': 'avg_likes',
+        'avg_comments': 'avg_comments',
+    }),
+}
+
+REPORT_TYPE_SOURCES = {
+    'performance': 'posts',
+    'engagement': 'metrics',
+    'audience': 'audience',
+    'content': 'posts',
+    'comparative': 'competitors',
+}
+
+def _parse_filter_datetime(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f'Invalid date filter: {value!r}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+def build_report_rows(report):
+    filters = report.filters or {}
+    source = filters.get('source', 'posts') if report.report_type == 'custom' else REPORT_TYPE_SOURCES[report.report_type]
+    if source not in REPORT_SOURCES:
+        raise ValueError(f'Unknown report source: {source}')
+
+    model, user_lookup, time_field, account_lookup, platform_lookup, columns = REPORT_SOURCES[source]
+    queryset = model.objects.filter(**{user_lookup: report.user})
+
+    if filters.get('date_from'):
+        queryset = queryset.filter(**{f'{time_field}__gte': _parse_filter_datetime(filters['date_from'])})
+    if filters.get('date_to'):
+        queryset = queryset.filter(**{f'{time_field}__lte': _parse_filter_datetime(filters['date_to'])})
+    if filters.get('days'):
+        queryset = queryset.filter(**{f'{time_field}__gte': timezone.now() - timedelta(days=int(filters['days']))})
+    if filters.get('platform'):
+        queryset = queryset.filter(**{platform_lookup: filters['platform']})
+    if filters.get('account_id') and account_lookup:
+        queryset = queryset.filter(**{f'{account_lookup}_id': filters['account_id']})
+    if filters.get('content_type') and source in ('posts', 'metrics'):
+        content_lookup = 'content_type' if source == 'posts' else 'post__content_type'
+        queryset = queryset.filter(**{content_lookup: filters['content_type']})
+
+    if report.report_type == 'content':
+        return _content_rows(queryset)
+
+    if report.report_type == 'custom' and filters.get('fields'):
+        unknown = set(filters['fields']) - set(columns)
+        if unknown:
+            raise ValueError(f"Unknown report fields: {', '.join(sorted(unknown))}")
+        columns = {name: columns[name] for name in filters['fields']}
+
+    queryset = queryset.order_by(time_field, 'pk')
+    if None in columns.values():
+        names, rows = _rows_with_followers(report.user, queryset, columns, time_field, account_lookup)
+    else:
+        names, rows = iter_export_rows(queryset, columns)
+    return names, rows, queryset.count()
+
+def _rows_with_followers(user, queryset, columns, time_field, account_lookup):
+    bounds = queryset.aggregate(first=Min(time_field), last=Max(time_field))
+    history = FollowerHistory.load(
+        SocialMediaAccount.objects.filter(user=user).values_list('id', flat=True),
+        start=bounds['first'],
+        end=bounds['last']
+    )
+    lookups = {name: lookup for name, lookup in columns.items() if lookup}
+    _, rows = iter_export_rows(queryset, dict(lookups, _account=f'{account_lookup}_id', _time=time_field))
+
+    def with_followers():
+        for *values, account_id, recorded_at in rows:
+            values = iter(values)
+            followers = history.followers_at(account_id, recorded_at)
+            yield tuple(next(values) if lookup else followers for lookup in columns.values())
+
+    return list(columns), with_followers()
+
+def _content_rows(queryset):
+    names = ['platform', 'content_type', 'posts_count', 'total_likes', 'total_comments',
+             'total_shares', 'total_reach', 'avg_engagement_rate']
+    grouped = queryset.order_by().values('social_account__platform', 'content_type').annotate(
+        posts_count=Count('id'),
+        total_likes=Sum('current_metrics__likes_count'),
+        total_comments=Sum('current_metrics__comments_count'),
+        total_shares=Sum('current_metrics__shares_count'),
+        total_reach=Sum('current_metrics__reach'),
+        avg_engagement_rate=Avg('current_metrics__engagement_rate')
+    ).order_by('social_account__platform', '-avg_engagement_rate')
+    rows = list(grouped.values_list('social_account__platform', 'content_type', *names[2:]))
+    return names, iter(rows), len(rows)
+
+def _text_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+class CSVReportWriter:
+    def __init__(self, stream, title):
+        self.text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+        self.writer = csv.writer(self.text)
+
+    def write_header(self, columns):
+        self.writer.writerow(columns)
+
+    def write_row(self, row):
+        self.writer.writerow([_text_value(value) for value in row])
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+
+class JSONReportWriter:
+    def __init__(self, stream, title):
+        self.stream = stream
+        self.title = title
+        self.first = True
+
+    def write_header(self, columns):
+        self.columns = columns
+        self.stream.write(json.dumps({'title': self.title, 'columns': columns})[:-1].encode())
+        self.stream.write(b', "rows": [\n')
+
+    def write_row(self, row):
+        if not self.first:
+            self.stream.write(b',\n')
+        self.first = False
+        self.stream.write(json.dumps(dict(zip(self.columns, row)), cls=DjangoJSONEncoder).encode())
+
+    def close(self):
+        self.stream.write(b'\n]}\n')
+
+class XLSXReportWriter:
+    MAX_ROWS = 1048576
+
+    def __init__(self, stream, title):
+        self.zip = zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED)
+        self.title = title
+        self.sheets = 0
+        self.sheet = None
+
+    def _open_sheet(self):
+        self.sheets += 1
+        self.sheet = self.zip.open(f'xl/worksheets/sheet{self.sheets}.xml', 'w', force_zip64=True)
+        self.sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self.sheet_rows = 0
+        self._write_cells(self.columns)
+
+    def _close_sheet(self):
+        self.sheet.write(b'</sheetData></worksheet>')
+        self.sheet.close()
+
+    def _write_cells(self, values):
+        cells = []
+        for value in values:
+            if isinstance(value, bool):
+                cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)):
+                cells.append(f'<c><v>{value}</v></c>')
+            elif value is None:
+                cells.append('<c/>')
+            else:
+                text = ILLEGAL_XML_CHARACTERS.sub('', str(_text_value(value)))
+                cells.append(f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>')
+        self.sheet.write(f'<row>{"".join(cells)}</row>'.encode())
+        self.sheet_rows += 1
+
+    def write_header(self, columns):
+        self.columns = columns
+        self._open_sheet()
+
+    def write_row(self, row):
+        if self.sheet_rows >= self.MAX_ROWS:
+            self._close_sheet()
+            self._open_sheet()
+        self._write_cells(row)
+
+    def close(self):
+        self._close_sheet()
+        sheet_range = range(1, self.sheets + 1)
+        self.zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in sheet_range
+            )
+            + '</Types>'
+        ))
+        self.zip.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        self.zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + ''.join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in sheet_range)
+            + '</sheets></workbook>'
+        ))
+        self.zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(
+                f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{n}.xml"/>'
+                for n in sheet_range
+            )
+            + '</Relationships>'
+        ))
+        self.zip.close()
+
+class PDFReportWriter:
+    PAGE_WIDTH = 842
+    PAGE_HEIGHT = 595
+    FONT_SIZE = 7
+    LEADING = 9
+    MARGIN = 30
+    LINE_WIDTH = 190
+
+    def __init__(self, stream, title):
+        self.stream = stream
+        self.title = title
+        self.offsets = {}
+        self.pages = []
+        self.lines = []
+        # 1: catalog, 2: page tree, 3: font; pages are allocated from 4 on
+        self.next_object = 4
+        self.lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING - 2
+        self.stream.write(b'%PDF-1.4\n')
+
+    def _object(self, number, body):
+        self.offsets[number] = self.stream.tell()
+        self.stream.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+
+    def _format(self, values):
+        line = ' | '.join(str(_text_value(value)) for value in values)
+        return line[:self.LINE_WIDTH]
+
+    def _escape(self, line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+    def _flush_page(self):
+        if not self.lines:
+            return
+        page, content = self.next_object, self.next_object + 1
+        self.next_object += 2
+
+        text = [f'BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL {self.MARGIN} {self.PAGE_HEIGHT - self.MARGIN} Td'.encode()]
+        for line in [self.title, self.header, *self.lines]:
+            text.append(b'(' + self._escape(line) + b') Tj T*')
+        text.append(b'ET')
+        data = b'\n'.join(text)
+
+        self._object(content, f'<< /Length {len(data)} >>\nstream\n'.encode() + data + b'\nendstream')
+        self._object(page, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content} 0 R >>'
+        ).encode())
+        self.pages.append(page)
+        self.lines = []
+
+    def write_header(self, columns):
+        self.header = self._format(columns)
+
+    def write_row(self, row):
+        self.lines.append(self._format(row))
+        if len(self.lines) >= self.lines_per_page:
+            self._flush_page()
+
+    def close(self):
+        self._flush_page()
+        if not self.pages:
+            self.lines.append('No data')
+            self._flush_page()
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>')
+        kids = ' '.join(f'{page} 0 R' for page in self.pages)
+        self._object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>'.encode())
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+        xref = self.stream.tell()
+        count = self.next_object
+        entries = [b'0000000000 65535 f \n'] + [
+            f'{self.offsets[number]:010d} 00000 n \n'.encode() for number in range(1, count)
+        ]
+        self.stream.write(f'xref\n0 {count}\n'.encode() + b''.join(entries))
+        self.stream.write(f'trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode())
+
+REPORT_WRITERS = {
+    'csv': CSVReportWriter,
+    'json': JSONReportWriter,
+    'excel': XLSXReportWriter,
+    'pdf': PDFReportWriter,
+}
+
+def build_report(report):
+    columns, rows, total = build_report_rows(report)
+    Report.objects.filter(pk=report.pk).update(progress=0, row_count=0)
+
+    written = 0
+    with tempfile.TemporaryFile() as stream:
+        writer = REPORT_WRITERS[report.format](stream, report.title)
+        writer.write_header(columns)
+        for row in rows:
+            writer.write_row(row)
+            written += 1
+            if written % PROGRESS_EVERY == 0:
+                Report.objects.filter(pk=report.pk).update(
+                    progress=min(99, written * 100 // total) if total else 0,
+                    row_count=written
+                )
+        writer.close()
+
+        stream.seek(0)
+        filename = f"{slugify(report.title) or 'report'}-{report.pk}.{FILE_EXTENSIONS[report.format]}"
+        report.file.save(filename, File(stream), save=False)
+
+    report.row_count = written
+    report.progress = 100
+    report.status = 'completed'
+    report.completed_at = timezone.now()
+    report.save()
+    return written
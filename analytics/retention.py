@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .models import PostMetrics, ProcessingCheckpoint
+from .rollups import day_bounds
+
+# Snapshots are kept hourly for HOURLY_DAYS, then thinned to the last
+# snapshot per post per day, and after DAILY_DAYS to the last one per post
+# per ISO week. The newest snapshot of a bucket always survives, so the
+# snapshot PostCurrentMetrics points at is never removed. Daily rollups are
+# built while a day still has every snapshot; refreshing one from a thinned
+# day would undercount it, so recompute_engagement leaves those alone.
+HOURLY_DAYS = 30
+DAILY_DAYS = 365
+
+DAILY_CHECKPOINT = 'postmetrics_downsample_daily'
+WEEKLY_CHECKPOINT = 'postmetrics_downsample_weekly'
+
+def thin_snapshots(start, end):
+    # Delete every snapshot in [start, end) except each post's newest one.
+    extra = PostMetrics.objects.filter(
+        recorded_at__gte=start,
+        recorded_at__lt=end
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=[F('post_id')], order_by=[F('recorded_at').desc(), F('id').desc()])
+    ).filter(rank__gt=1).order_by().values('id')
+
+    sql, params = extra.query.sql_with_params()
+    with connection.cursor() as cursor:
+        # Raw DELETE: the ORM would load every row to send post_delete. The
+        # outer range lets PostgreSQL prune to the partitions involved.
+        cursor.execute(
+            f'DELETE FROM {PostMetrics._meta.db_table} '
+            f'WHERE recorded_at >= %s AND recorded_at < %s AND id IN ({sql})',
+            [connection.ops.adapt_datetimefield_value(start), connection.ops.adapt_datetimefield_value(end), *params]
+        )
+        return cursor.rowcount
+
+def _downsample(checkpoint_name, first_day, last_day, step, progress=None):
+    checkpoint, _ = ProcessingCheckpoint.objects.get_or_create(name=checkpoint_name)
+    if checkpoint.position:
+        first_day = max(first_day, date.fromordinal(checkpoint.position))
+
+    deleted = 0
+    day = first_day
+    while day + step <= last_day:
+        with transaction.atomic():
+            deleted += thin_snapshots(day_bounds(day)[0], day_bounds(day + step)[0])
+            checkpoint.position = (day + step).toordinal()
+            checkpoint.save(update_fields=['position', 'updated_at'])
+        if progress:
+            progress(checkpoint_name, day, deleted)
+        day += step
+    return deleted
+
+def downsample_post_metrics(today=None, full=False, progress=None):
+    today = today or timezone.localdate()
+    daily_end = today - timedelta(days=HOURLY_DAYS)
+    weekly_end = today - timedelta(days=DAILY_DAYS)
+    weekly_end -= timedelta(days=weekly_end.weekday())
+
+    oldest = PostMetrics.objects.order_by('recorded_at').values_list('recorded_at', flat=True).first()
+    if oldest is None:
+        return {'daily': 0, 'weekly': 0}
+    oldest = timezone.localdate(oldest)
+
+    if full:
+        ProcessingCheckpoint.objects.filter(name__in=[DAILY_CHECKPOINT, WEEKLY_CHECKPOINT]).delete()
+
+    # Weekly first, so the daily pass never thins a day that is about to
+    # be folded into a week anyway.
+    weekly = _downsample(
+        WEEKLY_CHECKPOINT, oldest - timedelta(days=oldest.weekday()), weekly_end, timedelta(days=7), progress
+    )
+    daily = _downsample(DAILY_CHECKPOINT, max(oldest, weekly_end), daily_end, timedelta(days=1), progress)
+    return {'daily': daily, 'weekly': weekly}
@@ -0,0 +1,166 @@
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Sum, Count
+from django.utils import timezone
+from .models import Post, PostMetrics, DailyMetricsRollup
+
+# Rollups are only read for days older than this many days; the most recent
+# days come from raw rows so a late nightly run never leaves a gap.
+RAW_WINDOW_DAYS = 1
+
+ROLLUP_GROUPS = {
+    'social_account': ('social_account', 'post__social_account', 'social_account'),
+    'platform': ('platform', 'post__social_account__platform', 'social_account__platform'),
+    'content_type': ('content_type', 'post__content_type', 'content_type'),
+}
+
+TOTAL_FIELDS = ['posts_count', 'snapshots_count', 'total_likes', 'total_comments',
+                'total_shares', 'total_reach', 'engagement_rate_sum']
+
+def day_bounds(day, tzinfo=None):
+    tzinfo = tzinfo or timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tzinfo)
+    return start, start + timedelta(days=1)
+
+def refresh_daily_rollups(days, account_ids=None):
+    refreshed = 0
+    for day in sorted(set(days)):
+        start, end = day_bounds(day)
+        
+        metrics = PostMetrics.objects.filter(recorded_at__gte=start, recorded_at__lt=end)
+        posts = Post.objects.filter(posted_at__gte=start, posted_at__lt=end)
+        existing = DailyMetricsRollup.objects.filter(date=day)
+        if account_ids is not None:
+            metrics = metrics.filter(post__social_account_id__in=account_ids)
+            posts = posts.filter(social_account_id__in=account_ids)
+            existing = existing.filter(social_account_id__in=account_ids)
+        
+        rows = {}
+        
+        def row_for(account_id, user_id, platform, content_type):
+            key = (account_id, content_type)
+            if key not in rows:
+                rows[key] = DailyMetricsRollup(
+                    user_id=user_id,
+                    social_account_id=account_id,
+                    platform=platform,
+                    content_type=content_type,
+                    date=day
+                )
+            return rows[key]
+        
+        for item in metrics.order_by().values(
+            'post__social_account_id', 'post__social_account__user_id',
+            'post__social_account__platform', 'post__content_type'
+        ).annotate(
+            snapshots_count=Count('id'),
+            total_likes=Sum('likes_count'),
+            total_comments=Sum('comments_count'),
+            total_shares=Sum('shares_count'),
+            total_reach=Sum('reach'),
+            engagement_rate_sum=Sum('engagement_rate')
+        ):
+            row = row_for(item['post__social_account_id'], item['post__social_account__user_id'],
+                          item['post__social_account__platform'], item['post__content_type'])
+            row.snapshots_count = item['snapshots_count']
+            row.total_likes = item['total_likes'] or 0
+            row.total_comments = item['total_comments'] or 0
+            row.total_shares = item['total_shares'] or 0
+            row.total_reach = item['total_reach'] or 0
+            row.engagement_rate_sum = item['engagement_rate_sum'] or 0.0
+        
+        for item in posts.order_by().values(
+            'social_account_id', 'social_account__user_id', 'social_account__platform', 'content_type'
+        ).annotate(posts_published=Count('id')):
+            row = row_for(item['social_account_id'], item['social_account__user_id'],
+                          item['social_account__platform'], item['content_type'])
+            row.posts_published = item['posts_published']
+        
+        with transaction.atomic():
+            existing.delete()
+            DailyMetricsRollup.objects.bulk_create(rows.values(), batch_size=1000)
+        refreshed += len(rows)
+    
+    return refreshed
+
+def sync_rollups(posts=(), snapshots=(), removed=()):
+    # removed: (account_id, datetime) pairs a deleted or moved post or
+    # snapshot used to be counted at.
+    sealed_before = timezone.localdate() - timedelta(days=RAW_WINDOW_DAYS)
+    stale = {}
+    
+    for account_id, moment in [(post.social_account_id, post.posted_at) for post in posts] + list(removed):
+        day = timezone.localdate(moment)
+        if day < sealed_before:
+            stale.setdefault(day, set()).add(account_id)
+    
+    snapshots = [snapshot for snapshot in snapshots if timezone.localdate(snapshot.recorded_at) < sealed_before]
+    if snapshots:
+        account_ids = dict(Post.objects.filter(
+            id__in={snapshot.post_id for snapshot in snapshots}
+        ).values_list('id', 'social_account_id'))
+        for snapshot in snapshots:
+            stale.setdefault(timezone.localdate(snapshot.recorded_at), set()).add(account_ids[snapshot.post_id])
+    
+    for day, account_ids in stale.items():
+        refresh_daily_rollups([day], account_ids=account_ids)
+
+def _merge(totals, key, values):
+    bucket = totals.setdefault(key, dict.fromkeys(TOTAL_FIELDS, 0))
+    for field in TOTAL_FIELDS:
+        bucket[field] += values.get(field) or 0
+
+def rollup_totals(user, days=None, group_by=None):
+    today = timezone.localdate()
+    raw_from_day = today - timedelta(days=RAW_WINDOW_DAYS)
+    
+    rollups = DailyMetricsRollup.objects.filter(user=user, date__lt=raw_from_day)
+    if days is not None:
+        window_day = today - timedelta(days=days)
+        rollups = rollups.filter(date__gte=window_day)
+        raw_from_day = max(raw_from_day, window_day)
+    raw_start = day_bounds(raw_from_day)[0]
+    
+    raw_metrics = PostMetrics.objects.filter(post__social_account__user=user, recorded_at__gte=raw_start)
+    raw_posts = Post.objects.filter(
+        social_account__user=user,
+        posted_at__gte=raw_start,
+        posted_at__lte=timezone.now()
+    )
+    
+    sources = [
+        (rollups, dict(
+            posts_count=Sum('posts_published'),
+            snapshots_count=Sum('snapshots_count'),
+            total_likes=Sum('total_likes'),
+            total_comments=Sum('total_comments'),
+            total_shares=Sum('total_shares'),
+            total_reach=Sum('total_reach'),
+            engagement_rate_sum=Sum('engagement_rate_sum')
+        )),
+        (raw_metrics, dict(
+            snapshots_count=Count('id'),
+            total_likes=Sum('likes_count'),
+            total_comments=Sum('comments_count'),
+            total_shares=Sum('shares_count'),
+            total_reach=Sum('reach'),
+            engagement_rate_sum=Sum('engagement_rate')
+        )),
+        (raw_posts, dict(posts_count=Count('id'))),
+    ]
+    
+    totals = {}
+    if group_by:
+        for (queryset, aggregates), key in zip(sources, ROLLUP_GROUPS[group_by]):
+            for row in queryset.order_by().values(key).annotate(**aggregates):
+                _merge(totals, row[key], row)
+    else:
+        _merge(totals, None, {})
+        for queryset, aggregates in sources:
+            _merge(totals, None, queryset.aggregate(**aggregates))
+    
+    for bucket in totals.values():
+        snapshots = bucket['snapshots_count']
+        bucket['avg_engagement_rate'] = bucket.pop('engagement_rate_sum') / snapshots if snapshots else 0
+    
+    return totals if group_by else totals[None]
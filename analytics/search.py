@@ -0,0 +1,54 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+from rest_framework import filters
+
+# 'simple' does no stemming or stop-word removal, which keeps captions and
+# comments in any language searchable. The search_vector triggers added in
+# migration 0011 use the same configuration.
+SEARCH_CONFIG = 'simple'
+
+SEARCH_VECTOR_SOURCES = {
+    'analytics_post': 'caption',
+    'analytics_comment': 'text',
+}
+
+def backfill_search_vectors(table, batch_size=50000, progress=None):
+    column = SEARCH_VECTOR_SOURCES[table]
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT coalesce(min(id), 0), coalesce(max(id), 0) FROM {table}')
+        lower, upper = cursor.fetchone()
+        updated = 0
+        for start in range(lower, upper + 1, batch_size):
+            cursor.execute(
+                f"UPDATE {table} SET search_vector = to_tsvector(%s, coalesce({column}, '')) "
+                f"WHERE id >= %s AND id < %s",
+                [SEARCH_CONFIG, start, start + batch_size]
+            )
+            updated += cursor.rowcount
+            if progress:
+                progress(table, updated)
+    return updated
+
+# Matches the search_vector column with websearch syntax and orders by rank.
+# Fields in the view's trigram_search_fields also match by prefix or trigram
+# similarity. Other databases fall back to SearchFilter's ILIKE matching.
+class FullTextSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        if connection.vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        condition = Q(search_vector=query)
+        for field in getattr(view, 'trigram_search_fields', []):
+            # Plain LIKE (not UPPER() ... LIKE) so the gin_trgm_ops index is
+            # usable; trigram similarity is already case-insensitive.
+            condition |= Q(**{f'{field}__startswith': terms}) | Q(**{f'{field}__trigram_similar': terms})
+
+        return queryset.filter(condition).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-id')
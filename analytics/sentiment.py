@@ -0,0 +1,160 @@
+import math
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .models import Comment
+
+# Bump whenever the lexicon or scoring rules change; comments scored with
+# another version are picked up again by score_comments().
+MODEL_VERSION = 'lexicon-1'
+
+CHUNK_SIZE = 5000
+BATCH_SIZE = 500
+
+LEXICON = {
+    # positive
+    'love': 3.2, 'loved': 2.9, 'loving': 2.9, 'lovely': 2.8, 'amazing': 2.8, 'awesome': 3.1,
+    'excellent': 2.7, 'fantastic': 2.6, 'great': 3.1, 'good': 1.9, 'nice': 1.8, 'best': 3.2,
+    'better': 1.9, 'beautiful': 2.9, 'gorgeous': 3.0, 'stunning': 2.6, 'perfect': 2.7,
+    'wonderful': 2.7, 'brilliant': 2.8, 'happy': 2.7, 'glad': 2.0, 'fun': 2.3, 'funny': 1.9,
+    'cool': 1.3, 'cute': 2.0, 'like': 1.5, 'liked': 1.8, 'likes': 1.8, 'enjoy': 2.2,
+    'enjoyed': 2.3, 'thanks': 1.9, 'thank': 1.5, 'thx': 1.5, 'congrats': 2.4,
+    'congratulations': 2.9, 'wow': 2.8, 'yay': 2.4, 'helpful': 1.8, 'useful': 1.9,
+    'inspiring': 2.6, 'inspired': 2.2, 'recommend': 1.5, 'favorite': 2.0, 'favourite': 2.0,
+    'incredible': 2.3, 'legend': 1.8, 'fire': 1.2, 'lit': 1.4, 'goat': 1.8, 'win': 2.8,
+    'yes': 1.7, 'agree': 1.5, 'support': 1.7, 'proud': 2.1, 'excited': 2.3, 'exciting': 2.2,
+    'delicious': 2.7, 'superb': 3.1, 'fabulous': 2.4, 'masterpiece': 3.1, 'impressive': 2.3,
+    'cheers': 2.1, 'lol': 1.8, 'haha': 1.9,
+    # negative
+    'hate': -2.7, 'hated': -3.2, 'awful': -2.0, 'terrible': -2.1, 'horrible': -2.5,
+    'bad': -2.5, 'worse': -2.1, 'worst': -3.1, 'ugly': -2.3, 'boring': -1.3, 'dull': -1.7,
+    'sad': -2.1, 'angry': -2.3, 'annoying': -1.7, 'annoyed': -1.6, 'disappointed': -1.9,
+    'disappointing': -2.2, 'disgusting': -2.4, 'gross': -2.1, 'poor': -2.1, 'fake': -2.1,
+    'scam': -2.6, 'spam': -1.5, 'trash': -2.1, 'garbage': -2.2, 'useless': -1.8, 'stupid': -2.4,
+    'dumb': -2.3, 'wrong': -2.1, 'broken': -1.8, 'fail': -2.5, 'failed': -2.3, 'sucks': -1.5,
+    'meh': -0.6, 'unfollow': -1.8, 'unfollowed': -1.8, 'overpriced': -1.6,
+    'expensive': -0.9, 'slow': -1.0, 'problem': -1.7, 'issue': -0.9, 'refund': -1.1,
+    'rude': -2.0, 'lame': -1.8, 'cringe': -1.7, 'toxic': -2.4, 'sick': -1.9, 'hurt': -2.1,
+    'sorry': -0.3, 'cancel': -1.4, 'cancelled': -1.6, 'waste': -1.8, 'lies': -1.8,
+    'misleading': -1.8, 'clickbait': -1.9,
+    # emoji
+    '\U0001F60D': 3.0, '❤️': 3.0, '❤': 3.0, '\U0001F525': 2.0, '\U0001F44F': 2.1,
+    '\U0001F44D': 1.9, '\U0001F602': 1.9, '\U0001F923': 1.9, '\U0001F60A': 2.3, '\U0001F64C': 2.2,
+    '\U0001F970': 3.0, '\U0001F4AF': 2.0, '\U0001F389': 2.4, '\U0001F60E': 1.9,
+    '\U0001F621': -2.9, '\U0001F620': -2.5, '\U0001F622': -2.0, '\U0001F62D': -1.2,
+    '\U0001F44E': -2.0, '\U0001F612': -1.5, '\U0001F92E': -2.5, '\U0001F494': -2.4,
+    '\U0001F644': -1.4, '\U0001F634': -0.9,
+}
+
+NEGATIONS = frozenset([
+    'not', 'no', 'never', 'nothing', 'nobody', 'none', 'neither', 'nor', 'without',
+    'dont', "don't", 'doesnt', "doesn't", 'didnt', "didn't", 'isnt', "isn't", 'wasnt', "wasn't",
+    'cant', "can't", 'cannot', 'wont', "won't", 'aint', "ain't",
+])
+
+BOOSTERS = {
+    'very': 0.3, 'really': 0.3, 'so': 0.3, 'super': 0.3, 'extremely': 0.4, 'absolutely': 0.4,
+    'totally': 0.3, 'incredibly': 0.4, 'too': 0.2, 'most': 0.3, 'soo': 0.4, 'sooo': 0.5,
+    'slightly': -0.3, 'somewhat': -0.3, 'kinda': -0.3, 'barely': -0.4, 'little': -0.2,
+}
+
+NEGATION_FACTOR = -0.74
+CONTRAST_WORDS = frozenset(['but', 'however', 'though', 'although'])
+NORMALIZE_ALPHA = 15
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?|[☀-➿\U0001F300-\U0001FAFF]️?|!")
+
+def score_text(text):
+    tokens = TOKEN_PATTERN.findall(text.lower()) if text else []
+    if not tokens:
+        return 0.0
+
+    valences = []
+    exclamations = 0
+    contrast_at = None
+    for index, token in enumerate(tokens):
+        if token == '!':
+            exclamations += 1
+            continue
+        if token in CONTRAST_WORDS:
+            contrast_at = len(valences)
+        valence = LEXICON.get(token)
+        if valence is None:
+            valences.append(0.0)
+            continue
+
+        # Look back over the three preceding words for boosters and negations.
+        window = [word for word in tokens[max(0, index - 3):index] if word != '!']
+        for distance, word in enumerate(reversed(window), start=1):
+            boost = BOOSTERS.get(word)
+            if boost:
+                scale = 1.0 if distance == 1 else 0.95 if distance == 2 else 0.9
+                valence += math.copysign(boost * scale, valence)
+        if any(word in NEGATIONS for word in window):
+            valence *= NEGATION_FACTOR
+        valences.append(valence)
+
+    # The clause after "but" usually carries the opinion.
+    if contrast_at is not None:
+        valences = [
+            value * (0.5 if position < contrast_at else 1.5)
+            for position, value in enumerate(valences)
+        ]
+
+    total = sum(valences)
+    if total and exclamations:
+        total += math.copysign(min(exclamations, 4) * 0.292, total)
+    if not total:
+        return 0.0
+    return round(total / math.sqrt(total * total + NORMALIZE_ALPHA), 4)
+
+def score_texts(texts):
+    return [score_text(text) for text in texts]
+
+def score_comments(workers=None, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, rescore=False, limit=None, progress=None):
+    comments = Comment.objects.all()
+    if not rescore:
+        comments = comments.exclude(sentiment_version=MODEL_VERSION)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    started = time.perf_counter()
+    scored = 0
+    last_id = 0
+    try:
+        while limit is None or scored < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - scored)
+            rows = list(comments.filter(id__gt=last_id).order_by('id').values_list('id', 'text')[:size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            texts = [text for _, text in rows]
+            batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+            if executor is None:
+                results = map(score_texts, batches)
+            else:
+                results = executor.map(score_texts, batches)
+            scores = [score for batch in results for score in batch]
+
+            Comment.objects.bulk_update(
+                [
+                    Comment(id=comment_id, sentiment_score=score, sentiment_version=MODEL_VERSION)
+                    for (comment_id, _), score in zip(rows, scores)
+                ],
+                ['sentiment_score', 'sentiment_version'],
+                batch_size=1000
+            )
+            scored += len(rows)
+            if progress:
+                progress(scored, time.perf_counter() - started)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'scored': scored,
+        'model_version': MODEL_VERSION,
+        'elapsed_seconds': round(elapsed, 3),
+        'comments_per_second': round(scored / elapsed) if elapsed else 0,
+    }
@@ -20,10 +20,11 @@ class PostSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_latest_metrics(self, obj):
-        latest = obj.metrics.first()
-        if latest:
-            return PostMetricsSerializer(latest).data
-        return None
+        try:
+            current = obj.current_metrics
+        except PostCurrentMetrics.DoesNotExist:
+            return None
+        return PostCurrentMetricsSerializer(current).data
 
 class PostMetricsSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,6 +33,14 @@ class PostMetricsSerializer(serializers.ModelSerializer):
                   'views_count', 'reach', 'impressions', 'engagement_rate', 'recorded_at']
         read_only_fields = ['id', 'recorded_at']
 
+class PostCurrentMetricsSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='metrics_id', read_only=True)
+    
+    class Meta:
+        model = PostCurrentMetrics
+        fields = ['id', 'likes_count', 'comments_count', 'shares_count', 'saves_count', 
+                  'views_count', 'reach', 'impressions', 'engagement_rate', 'recorded_at']
+
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
@@ -73,15 +82,15 @@ class AIInsightSerializer(serializers.ModelSerializer):
 class QuerySerializer(serializers.ModelSerializer):
     class Meta:
         model = Query
-        fields = ['id', 'query_text', 'response', 'response_data', 'execution_time', 'created_at']
-        read_only_fields = ['id', 'response', 'response_data', 'execution_time', 'created_at']
+        fields = ['id', 'query_text', 'response', 'response_data', 'execution_time', 'timings', 'created_at']
+        read_only_fields = ['id', 'response', 'response_data', 'execution_time', 'timings', 'created_at']
 
 class ReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Report
         fields = ['id', 'report_type', 'title', 'description', 'format', 'filters', 
-                  'file', 'status', 'created_at', 'completed_at']
-        read_only_fields = ['id', 'file', 'status', 'created_at', 'completed_at']
+                  'file', 'status', 'progress', 'row_count', 'error_message', 'created_at', 'completed_at']
+        read_only_fields = ['id', 'file', 'status', 'progress', 'row_count', 'error_message', 'created_at', 'completed_at']
 
 class CompetitorSerializer(serializers.ModelSerializer):
     latest_metrics = serializers.SerializerMethodField()
@@ -93,9 +102,8 @@ class CompetitorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'added_at']
     
     def get_latest_metrics(self, obj):
-        latest = obj.metrics.first()
-        if latest:
-            return CompetitorMetricsSerializer(latest).data
+        if obj.latest_metrics_id:
+            return CompetitorMetricsSerializer(obj.latest_metrics).data
         return None
 
 class CompetitorMetricsSerializer(serializers.ModelSerializer):
@@ -0,0 +1,110 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from accounts.models import SocialMediaAccount
+from .models import (Post, PostMetrics, PostCurrentMetrics, PostHashtag, Audience, CurrentAudience, EngagementPattern,
+                     AIInsight, CompetitorMetrics)
+from .rollups import sync_rollups
+from .hashtags import link_caption_hashtags, sync_hashtag_stats
+from .cache import bump_generation, bump_generation_for_accounts
+from .competitors import update_latest_metrics, rebuild_latest_metrics
+
+@receiver(post_save, sender=PostMetrics)
+def sync_current_metrics(sender, instance, **kwargs):
+    PostCurrentMetrics.objects.sync([instance])
+    sync_rollups(snapshots=[instance])
+    sync_hashtag_stats(post_ids=[instance.post_id])
+
+@receiver(post_save, sender=Audience)
+def sync_current_audience(sender, instance, **kwargs):
+    CurrentAudience.objects.sync([instance])
+
+@receiver(post_delete, sender=Audience)
+def rebuild_current_audience(sender, instance, **kwargs):
+    CurrentAudience.objects.rebuild([instance.social_account_id])
+
+def _deleted_directly(sender, origin):
+    # False for rows removed by a cascade from another model (an account or
+    # user going away takes its rollups with it; a post refreshes for its
+    # own snapshots).
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is sender
+
+@receiver(post_save, sender=Post)
+def sync_post_rollups(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_posted_at', None)
+    moved = [(instance.social_account_id, loaded)] if loaded and loaded != instance.posted_at else []
+    sync_rollups(posts=[instance], removed=moved)
+    instance._loaded_posted_at = instance.posted_at
+
+@receiver(pre_delete, sender=Post)
+def collect_post_rollup_days(sender, instance, origin=None, **kwargs):
+    if not _deleted_directly(sender, origin):
+        return
+    recorded = PostMetrics.objects.filter(post_id=instance.id).values_list('recorded_at', flat=True)
+    instance._rollup_moments = [(instance.social_account_id, moment) for moment in [instance.posted_at, *recorded]]
+
+@receiver(post_delete, sender=Post)
+def refresh_post_rollups(sender, instance, **kwargs):
+    sync_rollups(removed=getattr(instance, '_rollup_moments', ()))
+
+@receiver(post_delete, sender=PostMetrics)
+def refresh_metrics_rollups(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(sender, origin):
+        sync_rollups(snapshots=[instance])
+
+@receiver(post_delete, sender=PostMetrics)
+def rebuild_current_metrics(sender, instance, origin=None, **kwargs):
+    # Deleting the current snapshot cascades to PostCurrentMetrics; fall
+    # back to the post's next newest one.
+    if _deleted_directly(sender, origin):
+        PostCurrentMetrics.objects.rebuild([instance.post_id])
+
+@receiver(post_save, sender=Post)
+def link_post_hashtags(sender, instance, **kwargs):
+    if link_caption_hashtags([(instance.id, instance.caption)]):
+        sync_hashtag_stats(post_ids=[instance.id])
+
+@receiver(post_save, sender=PostHashtag)
+def sync_post_hashtag_stats(sender, instance, **kwargs):
+    sync_hashtag_stats(post_ids=[instance.post_id])
+    bump_generation_for_accounts(Post.objects.filter(id=instance.post_id).values_list('social_account_id', flat=True))
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Audience)
+@receiver([post_save, post_delete], sender=EngagementPattern)
+def invalidate_account_cache(sender, instance, **kwargs):
+    bump_generation_for_accounts([instance.social_account_id])
+
+@receiver(post_save, sender=PostMetrics)
+def invalidate_metrics_cache(sender, instance, **kwargs):
+    bump_generation(Post.objects.filter(
+        id=instance.post_id
+    ).values_list('social_account__user_id', flat=True))
+
+@receiver(pre_delete, sender=PostMetrics)
+def invalidate_deleted_metrics_cache(sender, instance, origin=None, **kwargs):
+    # Cascades are invalidated by their root (post, account or user). A
+    # direct delete bumps its users once, however many rows it removes;
+    # every row shares the same origin, so the first one does the lookup.
+    if not _deleted_directly(sender, origin) or getattr(origin, '_cache_bumped', False):
+        return
+    snapshots = origin.order_by() if isinstance(origin, QuerySet) else PostMetrics.objects.filter(id=instance.id)
+    bump_generation(snapshots.values_list('post__social_account__user_id', flat=True).distinct())
+    origin._cache_bumped = True
+
+@receiver([post_save, post_delete], sender=AIInsight)
+def invalidate_insight_cache(sender, instance, **kwargs):
+    bump_generation([instance.user_id])
+
+@receiver([post_save, post_delete], sender=SocialMediaAccount)
+def invalidate_social_account_cache(sender, instance, **kwargs):
+    bump_generation([instance.user_id])
+
+@receiver(post_save, sender=CompetitorMetrics)
+def sync_competitor_latest_metrics(sender, instance, **kwargs):
+    update_latest_metrics([instance])
+
+@receiver(post_delete, sender=CompetitorMetrics)
+def rebuild_competitor_latest_metrics(sender, instance, **kwargs):
+    rebuild_latest_metrics([instance.competitor_id])
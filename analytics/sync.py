@@ -0,0 +1,221 @@
+import asyncio
+import time
+from datetime import timedelta, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from accounts.models import SocialMediaAccount
+from .ingest import BatchIngestor, validate_record
+
+WRITE_BATCH_SIZE = 5000
+MAX_RETRIES = 5
+MAX_RETRY_AFTER = 300
+
+def sync_settings():
+    return getattr(settings, 'SOCIAL_SYNC', {})
+
+def retry_after(value, default):
+    # Retry-After is either delay-seconds or an HTTP-date; anything else
+    # falls back to the default backoff.
+    if not value:
+        return default
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if timezone.is_naive(when):
+            when = when.replace(tzinfo=dt_timezone.utc)
+        delay = (when - timezone.now()).total_seconds()
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+class PlatformClient:
+    def __init__(self, platform, base_url, rate, max_connections, timeout):
+        self.platform = platform
+        self.bucket = TokenBucket(rate)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.requests = 0
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def get(self, path, account, params=None):
+        token = getattr(account, 'access_token', None)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        for attempt in range(MAX_RETRIES):
+            await self.bucket.acquire()
+            self.requests += 1
+            response = await self.client.get(path, params=params, headers=headers)
+            if response.status_code == 429 or response.status_code >= 500:
+                delay = retry_after(response.headers.get('Retry-After'), 2 ** attempt)
+                self.bucket.pause(delay)
+                await asyncio.sleep(delay)
+                continue
+            response.raise_for_status()
+            # A decoding error is an httpx.HTTPError, so callers treat a
+            # garbled body like any other failed request.
+            try:
+                payload = response.json()
+            except ValueError as exc:
+                raise httpx.DecodingError(f'Invalid JSON response from {path}', request=response.request) from exc
+            if not isinstance(payload, dict):
+                raise httpx.DecodingError(f'Expected a JSON object from {path}', request=response.request)
+            return payload
+        response.raise_for_status()
+
+    async def fetch_posts(self, account, since):
+        params = {'limit': 100}
+        if since:
+            params['since'] = since.isoformat()
+
+        path = f'/{self.platform}/accounts/{account.account_id}/posts'
+        while True:
+            payload = await self.get(path, account, params)
+            for item in payload.get('posts', []):
+                yield item
+            if not payload.get('next'):
+                return
+            params = {'limit': 100, 'cursor': payload['next']}
+
+    async def fetch_profile(self, account):
+        return await self.get(f'/{self.platform}/accounts/{account.account_id}/profile', account)
+
+def platform_client(platform, options):
+    platform_urls = options.get('PLATFORM_URLS', {})
+    return PlatformClient(
+        platform,
+        base_url=platform_urls.get(platform, options['BASE_URL']),
+        rate=options['RATE_LIMITS'].get(platform, 10),
+        max_connections=options['MAX_CONNECTIONS'],
+        timeout=options['TIMEOUT'],
+    )
+
+def group_by_platform(accounts):
+    by_platform = {}
+    for account in accounts:
+        by_platform.setdefault(account.platform, []).append(account)
+    return by_platform
+
+def to_records(account, item, fetched_at):
+    post = {
+        'type': 'post',
+        'social_account': account.id,
+        'post_id': item.get('post_id'),
+        'content_type': item.get('content_type'),
+        'posted_at': item.get('posted_at'),
+        'caption': item.get('caption'),
+        'media_url': item.get('media_url'),
+        'thumbnail_url': item.get('thumbnail_url'),
+    }
+    records = [post]
+    if item.get('metrics'):
+        records.append(dict(item['metrics'], type='metrics', post_id=post['post_id'], recorded_at=fetched_at))
+    return records
+
+class SyncEngine:
+    def __init__(self, options=None):
+        self.options = dict(sync_settings(), **(options or {}))
+        self.ingestor = BatchIngestor(chunk_size=WRITE_BATCH_SIZE)
+        self.pending = []
+        self.write_lock = None
+        self.synced = []
+        self.failed = {}
+        self.fetched = 0
+
+    def _since(self, account):
+        if not account.last_synced:
+            return None
+        return account.last_synced - timedelta(hours=self.options['LOOKBACK_HOURS'])
+
+    async def _flush(self, force=False):
+        async with self.write_lock:
+            if not self.pending or (not force and len(self.pending) < WRITE_BATCH_SIZE):
+                return
+            batch, self.pending = self.pending, []
+            await sync_to_async(self.ingestor.write)(batch)
+
+    async def _sync_account(self, client, account, synced_at):
+        fetched_at = synced_at.isoformat()
+        try:
+            async for item in client.fetch_posts(account, self._since(account)):
+                self.fetched += 1
+                for record in to_records(account, item, fetched_at):
+                    data, errors = validate_record(record['type'], record)
+                    self.pending.append((self.fetched, record['type'], data, errors))
+                await self._flush()
+        except httpx.HTTPError as exc:
+            self.failed[account.id] = str(exc) or exc.__class__.__name__
+            return
+        self.synced.append(account.id)
+
+    async def _sync_platform(self, platform, accounts, synced_at):
+        client = platform_client(platform, self.options)
+        try:
+            await asyncio.gather(*(self._sync_account(client, account, synced_at) for account in accounts))
+        finally:
+            await client.close()
+        return client.requests
+
+    async def _run(self, accounts, synced_at):
+        self.write_lock = asyncio.Lock()
+        requests = await asyncio.gather(*(
+            self._sync_platform(platform, platform_accounts, synced_at)
+            for platform, platform_accounts in group_by_platform(accounts).items()
+        ))
+        await self._flush(force=True)
+        return sum(requests)
+
+    def run(self, accounts):
+        started = time.perf_counter()
+        synced_at = timezone.now()
+        accounts = list(accounts)
+
+        requests = asyncio.run(self._run(accounts, synced_at))
+        self.ingestor.finish()
+        SocialMediaAccount.objects.filter(id__in=self.synced).update(last_synced=synced_at)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'accounts': len(accounts),
+            'synced': len(self.synced),
+            'failed': self.failed,
+            'requests': requests,
+            'posts_fetched': self.fetched,
+            'written': self.ingestor.counts,
+            'errors': self.ingestor.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'posts_per_second': round(self.fetched / elapsed) if elapsed else 0,
+        }
+
+def sync_accounts(accounts, **options):
+    return SyncEngine(options).run(accounts)
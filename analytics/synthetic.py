@@ -0,0 +1,261 @@
+import math
+import random
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from .models import *
+from .cache import bump_generation
+from .hashtags import link_caption_hashtags, rebuild_hashtag_stats
+from .patterns import rebuild_engagement_patterns
+from .rollups import refresh_daily_rollups
+from accounts.models import User, SocialMediaAccount
+
+# Synthetic users are recognisable by this username prefix so a dataset can
+# be removed again without touching real accounts.
+USERNAME_PREFIX = 'synthetic-'
+PASSWORD = 'synthetic'
+
+SCALES = {
+    'small': {'users': 2, 'accounts_per_user': 2, 'posts_per_account': 200, 'metrics_hours': 24,
+              'comments_per_post': 5, 'days': 90, 'competitors_per_user': 3},
+    'medium': {'users': 10, 'accounts_per_user': 3, 'posts_per_account': 1000, 'metrics_hours': 48,
+               'comments_per_post': 10, 'days': 180, 'competitors_per_user': 5},
+    'large': {'users': 50, 'accounts_per_user': 4, 'posts_per_account': 5000, 'metrics_hours': 72,
+              'comments_per_post': 20, 'days': 365, 'competitors_per_user': 10},
+}
+
+PLATFORMS = [choice for choice, _ in SocialMediaAccount.PLATFORM_CHOICES]
+CONTENT_TYPES = [choice for choice, _ in Post.CONTENT_TYPE_CHOICES]
+CONTENT_WEIGHTS = [30, 20, 30, 10, 10]
+CONTENT_BOOST = {'reel': 1.6, 'carousel': 1.2, 'static': 0.8, 'story': 0.5, 'video': 1.3}
+
+# Relative posting frequency per local hour: quiet at night, peaks at lunch
+# and in the evening.
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 3, 5, 6, 6, 7, 8, 10, 9, 7, 6, 7, 9, 12, 14, 13, 10, 6, 3]
+
+TOPICS = ['travel', 'food', 'fitness', 'fashion', 'tech', 'music', 'art', 'design', 'coffee', 'nature',
+          'photography', 'startup', 'marketing', 'books', 'gaming', 'pets', 'yoga', 'diy', 'beauty', 'sports']
+CAPTION_WORDS = ['new', 'today', 'behind', 'the', 'scenes', 'launch', 'tips', 'how', 'we', 'made', 'this',
+                 'weekend', 'vibes', 'check', 'out', 'our', 'latest', 'drop', 'story', 'time', 'quick', 'guide']
+COMMENTS = ['love this!', 'so good', 'amazing work', 'great tips, thanks', 'not my favourite',
+            'this is awesome', 'meh', 'where is this?', 'terrible audio', 'best post this week',
+            'can you share more?', 'so boring', 'wow', 'need this', 'disappointed tbh', 'beautiful shot']
+COUNTRIES = ['IN', 'US', 'GB', 'BR', 'ID', 'DE', 'CA', 'AU']
+CITIES = ['Mumbai', 'Delhi', 'Bengaluru', 'New York', 'London', 'Sao Paulo', 'Jakarta', 'Toronto']
+
+def _split(rng, keys, total=100.0):
+    weights = [rng.random() + 0.2 for _ in keys]
+    scale = total / sum(weights)
+    return {key: round(weight * scale, 1) for key, weight in zip(keys, weights)}
+
+def _posted_at(rng, now, days):
+    day = timezone.localtime(now - timedelta(days=rng.randrange(days)))
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    posted_at = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+    return posted_at - timedelta(days=1) if posted_at > now else posted_at
+
+class DatasetGenerator:
+    def __init__(self, users, accounts_per_user, posts_per_account, metrics_hours, comments_per_post,
+                 days, competitors_per_user, seed=0, batch_size=5000, progress=None):
+        self.users = users
+        self.accounts_per_user = accounts_per_user
+        self.posts_per_account = posts_per_account
+        self.metrics_hours = metrics_hours
+        self.comments_per_post = comments_per_post
+        self.days = days
+        self.competitors_per_user = competitors_per_user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.counts = dict.fromkeys(['users', 'accounts', 'posts', 'post_metrics', 'comments', 'hashtag_links',
+                                     'audience', 'competitors', 'competitor_metrics'], 0)
+        self.pending = {}
+
+    def _queue(self, model, obj, name):
+        batch = self.pending.setdefault(model, [])
+        batch.append(obj)
+        self.counts[name] += 1
+        if len(batch) >= self.batch_size:
+            self._flush(model)
+
+    def _flush(self, model=None):
+        for pending_model in [model] if model else list(self.pending):
+            batch = self.pending.pop(pending_model, [])
+            if batch:
+                self._insert(pending_model, batch)
+        if self.progress:
+            self.progress(self.counts)
+
+    def _insert(self, model, objs):
+        # auto_now_add fields are overwritten by bulk_create, so put the
+        # generated timestamps back afterwards.
+        recorded = [obj.recorded_at for obj in objs] if model in (Audience, CompetitorMetrics) else None
+        model.objects.bulk_create(objs, batch_size=1000)
+        if recorded:
+            for obj, recorded_at in zip(objs, recorded):
+                obj.recorded_at = recorded_at
+            model.objects.bulk_update(objs, ['recorded_at'], batch_size=1000)
+
+    def generate(self):
+        rng = self.rng
+        existing = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        password = make_password(PASSWORD)
+
+        users = User.objects.bulk_create([
+            User(
+                username=f'{USERNAME_PREFIX}{existing + index}',
+                email=f'{USERNAME_PREFIX}{existing + index}@example.com',
+                password=password,
+                organization='Synthetic benchmark data'
+            )
+            for index in range(self.users)
+        ])
+        self.counts['users'] = len(users)
+
+        for user in users:
+            accounts = SocialMediaAccount.objects.bulk_create([
+                SocialMediaAccount(
+                    user=user,
+                    platform=rng.choice(PLATFORMS),
+                    account_username=f'{user.username}-{index}',
+                    account_id=f'{user.id}-{index}',
+                    last_synced=self.now
+                )
+                for index in range(self.accounts_per_user)
+            ])
+            self.counts['accounts'] += len(accounts)
+            for account in accounts:
+                self._generate_account(account)
+            self._generate_competitors(user)
+
+        self._flush()
+        self._derive()
+        return self.counts
+
+    def _generate_account(self, account):
+        rng = self.rng
+        followers = int(rng.lognormvariate(9, 1.3)) + 100
+        daily_growth = rng.uniform(-0.002, 0.01)
+        ages = _split(rng, ['age_range_13_17', 'age_range_18_24', 'age_range_25_34', 'age_range_35_44',
+                            'age_range_45_54', 'age_range_55_plus'])
+        genders = _split(rng, ['gender_male', 'gender_female', 'gender_other'])
+        countries = _split(rng, rng.sample(COUNTRIES, 4))
+        cities = _split(rng, rng.sample(CITIES, 4))
+
+        # One audience snapshot per day, oldest first, ending at today's count.
+        for offset in range(self.days, -1, -1):
+            count = max(0, int(followers / (1 + daily_growth) ** offset * rng.uniform(0.995, 1.005)))
+            self._queue(Audience, Audience(
+                social_account=account,
+                followers_count=count,
+                following_count=rng.randrange(50, 2000),
+                top_countries=countries,
+                top_cities=cities,
+                recorded_at=self.now - timedelta(days=offset),
+                **ages,
+                **genders
+            ), 'audience')
+
+        topics = rng.sample(TOPICS, 6)
+        posts = []
+        for index in range(self.posts_per_account):
+            content_type = rng.choices(CONTENT_TYPES, CONTENT_WEIGHTS)[0]
+            tags = rng.sample(topics, rng.randrange(1, 4))
+            caption = ' '.join(rng.sample(CAPTION_WORDS, rng.randrange(3, 10)) + [f'#{tag}' for tag in tags])
+            posts.append(Post(
+                social_account=account,
+                post_id=f'syn-{account.id}-{index}',
+                content_type=content_type,
+                caption=caption,
+                posted_at=_posted_at(rng, self.now, self.days)
+            ))
+            if len(posts) >= self.batch_size:
+                self._generate_posts(posts, followers)
+                posts = []
+        self._generate_posts(posts, followers)
+
+    def _generate_posts(self, posts, followers):
+        if not posts:
+            return
+        rng = self.rng
+        Post.objects.bulk_create(posts)
+        self.counts['posts'] += len(posts)
+        self.counts['hashtag_links'] += link_caption_hashtags((post.id, post.caption) for post in posts)
+
+        for post in posts:
+            # Engagement follows a saturating curve over the first day or so.
+            final_likes = followers * rng.lognormvariate(-3.5, 0.8) * CONTENT_BOOST[post.content_type]
+            reach = followers * rng.uniform(0.2, 1.5)
+            hours = min(self.metrics_hours, int((self.now - post.posted_at).total_seconds() // 3600))
+            for hour in range(1, hours + 1):
+                share = 1 - math.exp(-hour / 8)
+                likes = int(final_likes * share)
+                comments = int(likes * 0.04)
+                shares = int(likes * 0.02)
+                self._queue(PostMetrics, PostMetrics(
+                    post=post,
+                    likes_count=likes,
+                    comments_count=comments,
+                    shares_count=shares,
+                    saves_count=int(likes * 0.05),
+                    views_count=int(reach * share * 1.8) if post.content_type in ('reel', 'video') else 0,
+                    reach=int(reach * share),
+                    impressions=int(reach * share * 1.3),
+                    engagement_rate=(likes + comments + shares) / followers * 100,
+                    recorded_at=post.posted_at + timedelta(hours=hour)
+                ), 'post_metrics')
+
+            for index in range(rng.randrange(self.comments_per_post + 1)):
+                self._queue(Comment, Comment(
+                    post=post,
+                    comment_id=f'{post.post_id}-c{index}',
+                    username=f'fan_{rng.randrange(5000)}',
+                    text=rng.choice(COMMENTS),
+                    likes_count=rng.randrange(20),
+                    posted_at=post.posted_at + timedelta(minutes=rng.randrange(1, 60 * 48))
+                ), 'comments')
+
+    def _generate_competitors(self, user):
+        rng = self.rng
+        competitors = Competitor.objects.bulk_create([
+            Competitor(
+                user=user,
+                platform=rng.choice(PLATFORMS),
+                account_username=f'rival_{user.id}_{index}',
+                account_id=f'rival-{user.id}-{index}'
+            )
+            for index in range(self.competitors_per_user)
+        ])
+        self.counts['competitors'] += len(competitors)
+
+        for competitor in competitors:
+            followers = int(rng.lognormvariate(10, 1.2))
+            posts_count = rng.randrange(50, 2000)
+            for offset in range(self.days, -1, -1):
+                self._queue(CompetitorMetrics, CompetitorMetrics(
+                    competitor=competitor,
+                    followers_count=int(followers * (1 - offset * rng.uniform(0, 0.002))),
+                    following_count=rng.randrange(50, 1500),
+                    posts_count=posts_count - offset // 2,
+                    avg_engagement_rate=rng.uniform(0.5, 6),
+                    avg_likes=rng.uniform(50, 5000),
+                    avg_comments=rng.uniform(2, 200),
+                    recorded_at=self.now - timedelta(days=offset)
+                ), 'competitor_metrics')
+
+    def _derive(self):
+        # Rebuild everything the post_save signals would have maintained.
+        PostCurrentMetrics.objects.rebuild(batch_size=self.batch_size)
+        CurrentAudience.objects.rebuild(batch_size=self.batch_size)
+        today = timezone.localdate()
+        refresh_daily_rollups([today - timedelta(days=offset) for offset in range(self.days + 3)])
+        rebuild_hashtag_stats()
+        rebuild_engagement_patterns()
+        bump_generation(User.objects.filter(username__startswith=USERNAME_PREFIX).values_list('id', flat=True))
+
+def generate_dataset(seed=0, batch_size=5000, progress=None, **options):
+    return DatasetGenerator(seed=seed, batch_size=batch_size, progress=progress, **options).generate()
+
+def delete_dataset():
+    return User.objects.filter(username__startswith=USERNAME_PREFIX).delete()[1]
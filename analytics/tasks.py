@@ -1,4 +1,4 @@
-from social_analytics.celery import shared_task
+from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 from .models import *
@@ -6,119 +6,175 @@ from accounts.models import SocialMediaAccount
 
 @shared_task
 def sync_all_social_accounts():
-    accounts = SocialMediaAccount.objects.filter(is_active=True)
-    for account in accounts:
-        sync_social_account.delay(account.id)
-    return f"Synced {accounts.count()} accounts"
+    from .sync import sync_settings
+    
+    batch_size = sync_settings().get('ACCOUNTS_PER_TASK', 200)
+    account_ids = list(
+        SocialMediaAccount.objects.filter(is_active=True).order_by('platform', 'id').values_list('id', flat=True)
+    )
+    
+    for start in range(0, len(account_ids), batch_size):
+        sync_social_accounts.delay(account_ids[start:start + batch_size])
+    
+    return f"Queued {len(account_ids)} accounts"
+
+@shared_task
+def sync_social_accounts(account_ids):
+    from .sync import sync_accounts
+    
+    accounts = SocialMediaAccount.objects.filter(id__in=account_ids, is_active=True)
+    result = sync_accounts(accounts)
+    
+    return f"Synced {result['synced']} of {result['accounts']} accounts ({result['posts_fetched']} posts)"
 
 @shared_task
 def sync_social_account(account_id):
+    from .sync import sync_accounts
+    
     try:
         account = SocialMediaAccount.objects.get(id=account_id)
-        account.last_synced = timezone.now()
-        account.save()
-        return f"Synced account {account.account_username}"
     except SocialMediaAccount.DoesNotExist:
         return f"Account {account_id} not found"
+    
+    result = sync_accounts([account])
+    if result['failed']:
+        return f"Sync failed for account {account.account_username}: {result['failed'][account.id]}"
+    return f"Synced account {account.account_username} ({result['posts_fetched']} posts)"
 
 @shared_task
-def update_engagement_patterns():
-    accounts = SocialMediaAccount.objects.filter(is_active=True)
-    
-    for account in accounts:
-        posts = Post.objects.filter(social_account=account)
-        
-        for post in posts:
-            hour = post.posted_at.hour
-            day = post.posted_at.weekday()
-            
-            latest_metrics = post.metrics.first()
-            
-            if latest_metrics:
-                pattern, created = EngagementPattern.objects.get_or_create(
-                    social_account=account,
-                    hour_of_day=hour,
-                    day_of_week=day
-                )
-                
-                pattern.avg_engagement_rate = (pattern.avg_engagement_rate * pattern.post_count + latest_metrics.engagement_rate) / (pattern.post_count + 1)
-                pattern.avg_likes = (pattern.avg_likes * pattern.post_count + latest_metrics.likes_count) / (pattern.post_count + 1)
-                pattern.avg_comments = (pattern.avg_comments * pattern.post_count + latest_metrics.comments_count) / (pattern.post_count + 1)
-                pattern.avg_shares = (pattern.avg_shares * pattern.post_count + latest_metrics.shares_count) / (pattern.post_count + 1)
-                pattern.post_count += 1
-                pattern.save()
-    
-    return "Engagement patterns updated"
+def update_engagement_patterns(full=False, account_ids=None):
+    from .patterns import fold_new_posts, rebuild_engagement_patterns
+    
+    # account_ids scopes a full rebuild; folding new posts is always global.
+    updated = rebuild_engagement_patterns(account_ids) if full else fold_new_posts()
+    
+    return f"Engagement patterns updated ({updated} buckets)"
 
 @shared_task
 def generate_ai_insights():
-    from accounts.models import User
-    
-    users = User.objects.filter(is_active=True)
-    
-    for user in users:
-        date_from = timezone.now() - timedelta(days=7)
-        
-        posts = Post.objects.filter(
-            social_account__user=user,
-            posted_at__gte=date_from
-        )
-        
-        if posts.exists():
-            best_content = posts.order_by('-metrics__engagement_rate').first()
-            
-            if best_content:
-                AIInsight.objects.create(
-                    user=user,
-                    social_account=best_content.social_account,
-                    insight_type='content_performance',
-                    title=f'Your {best_content.content_type} performed exceptionally well',
-                    description=f'Your recent {best_content.content_type} got high engagement. Consider creating similar content.',
-                    data={'post_id': best_content.post_id},
-                    priority=5
-                )
-    
-    return f"Generated insights for {users.count()} users"
+    from .insights import generate_insights
+    
+    created = generate_insights()
+    
+    return f"Generated {created} insights"
 
 @shared_task
 def sync_competitor_data():
-    competitors = Competitor.objects.filter(is_active=True)
-    
-    for competitor in competitors:
-        CompetitorMetrics.objects.create(
-            competitor=competitor,
-            followers_count=0,
-            following_count=0,
-            posts_count=0,
-            avg_engagement_rate=0.0
-        )
-    
-    return f"Synced {competitors.count()} competitors"
+    from .sync import sync_settings
+    
+    batch_size = sync_settings().get('ACCOUNTS_PER_TASK', 200)
+    competitor_ids = list(
+        Competitor.objects.filter(is_active=True).order_by('platform', 'account_id').values_list('id', flat=True)
+    )
+    
+    for start in range(0, len(competitor_ids), batch_size):
+        sync_competitors_batch.delay(competitor_ids[start:start + batch_size])
+    
+    return f"Queued {len(competitor_ids)} competitors"
+
+@shared_task
+def sync_competitors_batch(competitor_ids):
+    from .competitors import sync_competitors
+    
+    competitors = Competitor.objects.filter(id__in=competitor_ids, is_active=True)
+    result = sync_competitors(competitors)
+    
+    return f"Synced {result['synced']} of {result['competitors']} competitors"
 
 @shared_task
 def generate_report(report_id):
+    from .reports import build_report
+    
     try:
         report = Report.objects.get(id=report_id)
-        report.status = 'processing'
-        report.save()
-        
-        report.status = 'completed'
-        report.completed_at = timezone.now()
-        report.save()
-        
-        return f"Report {report_id} generated"
     except Report.DoesNotExist:
         return f"Report {report_id} not found"
+    
+    report.status = 'processing'
+    report.progress = 0
+    report.error_message = None
+    report.save()
+    
+    try:
+        rows = build_report(report)
+    except Exception as exc:
+        report.status = 'failed'
+        report.error_message = str(exc)
+        report.save()
+        raise
+    
+    return f"Report {report_id} generated with {rows} rows"
 
 @shared_task
 def process_nlp_query(query_id):
+    from .nlq import QueryError, run_query
+    
     try:
-        query = Query.objects.get(id=query_id)
-        
-        query.response = "Query processed"
-        query.response_data = {'status': 'success'}
-        query.save()
-        
-        return f"Query {query_id} processed"
+        query = Query.objects.select_related('user').get(id=query_id)
     except Query.DoesNotExist:
-        return f"Query {query_id} not found"
\ No newline at end of file
+        return f"Query {query_id} not found"
+    
+    try:
+        result = run_query(query.user, query.query_text)
+    except QueryError as exc:
+        query.response = str(exc)
+        query.response_data = {'error': str(exc)}
+        query.save()
+        return f"Query {query_id} could not be parsed"
+    
+    query.response = result['message']
+    query.response_data = dict(result, query=query.query_text)
+    query.execution_time = result['timings']['total_ms'] / 1000
+    query.timings = result['timings']
+    query.save()
+    
+    return f"Query {query_id} processed"
+
+@shared_task
+def update_daily_rollups(days=2):
+    from .rollups import refresh_daily_rollups
+    
+    today = timezone.localdate()
+    refreshed = refresh_daily_rollups([today - timedelta(days=offset) for offset in range(1, days + 1)])
+    
+    return f"Refreshed {refreshed} daily rollups"
+
+@shared_task
+def rebuild_hashtag_stats(user_ids=None):
+    from .hashtags import rebuild_hashtag_stats as rebuild
+    
+    created = rebuild(user_ids=user_ids)
+    
+    return f"Rebuilt {created} hashtag stat rows"
+
+@shared_task
+def score_comment_sentiment():
+    from .sentiment import score_comments
+    
+    # Celery's prefork workers cannot start child processes, so score inline.
+    result = score_comments(workers=1)
+    
+    return f"Scored {result['scored']} comments ({result['comments_per_second']}/s)"
+
+@shared_task
+def maintain_post_metrics():
+    from .partitions import ensure_partitions
+    from .retention import downsample_post_metrics
+    
+    created = ensure_partitions()
+    deleted = downsample_post_metrics()
+    
+    return f"Created {len(created)} partitions, removed {deleted['daily']} hourly and {deleted['weekly']} daily snapshots"
+
+@shared_task
+def recompute_engagement_rates(account_ids=None, days=None):
+    from .engagement import recompute_engagement
+    from .patterns import rebuild_engagement_patterns
+    
+    since = timezone.now() - timedelta(days=days) if days else None
+    result = recompute_engagement(account_ids=account_ids, since=since)
+    # Patterns average current engagement rates, so rebuild them from the new ones.
+    if result['updated']:
+        rebuild_engagement_patterns(account_ids)
+    
+    return f"Recomputed engagement for {result['scanned']} snapshots ({result['updated']} changed)"
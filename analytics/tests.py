@@ -1,3 +1,1024 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime, time, timedelta
+from email.utils import format_datetime
+from unittest import skipUnless
+from xml.dom import minidom
+import httpx
+from django.db import connection
+from django.db.models import Value
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from accounts.models import User, SocialMediaAccount
+from .models import (Post, PostMetrics, PostCurrentMetrics, Comment, Audience, CurrentAudience, EngagementPattern,
+                     AIInsight, DailyMetricsRollup, HashtagDailyStats, ProcessingCheckpoint, Query, Competitor,
+                     CompetitorMetrics)
+from .utils import build_post_timeline, calculate_engagement_rate
+from .audience import FollowerHistory, audience_as_of
+from .cache import get_generation
+from .competitors import rebuild_latest_metrics
+from .engagement import recompute_engagement
+from .filters import AliasedOrderingFilter
+from .heatmap import refresh_heatmaps
+from .insights import generate_insights
+from .instrumentation import fingerprint_sql
+from .nlq import QueryError, normalize_query, parse_query
+from .hashtags import extract_hashtags, link_caption_hashtags, rebuild_hashtag_stats, trending_hashtags
+from .ingest import COPY_THRESHOLD, ingest_stream
+from .partitions import TABLE, is_partitioned, partition_name, partition_post_metrics
+from .patterns import rebuild_engagement_patterns
+from .reports import XLSXReportWriter
+from .sentiment import MODEL_VERSION, score_comments, score_text
+from .serializers import EngagementPatternSerializer
+from .retention import HOURLY_DAYS, downsample_post_metrics
+from .sync import PlatformClient, retry_after
+from .timeseries import downsample
+from .views import PostViewSet
+
+class AnalyticsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.account = SocialMediaAccount.objects.create(
+            user=cls.user, platform='instagram', account_username='owner', account_id='1'
+        )
+        cls.other_account = SocialMediaAccount.objects.create(
+            user=cls.other, platform='instagram', account_username='other', account_id='2'
+        )
+
+    def create_post(self, account, post_id, posted_at=None):
+        return Post.objects.create(
+            social_account=account, post_id=post_id, content_type='static',
+            posted_at=posted_at or timezone.now() - timedelta(hours=1)
+        )
+
+class IngestOwnershipTests(AnalyticsTestCase):
+    def ingest(self, *records, user=None):
+        lines = [json.dumps(record) for record in records]
+        return ingest_stream(lines, user=user or self.user)
+
+    def comment(self, post_id, comment_id, text='hi'):
+        return {
+            'type': 'comment', 'post_id': post_id, 'comment_id': comment_id,
+            'username': 'fan', 'text': text, 'posted_at': timezone.now().isoformat(),
+        }
+
+    def test_foreign_post_id_is_rejected(self):
+        self.create_post(self.other_account, 'theirs')
+        result = self.ingest({
+            'type': 'post', 'social_account': self.account.id, 'post_id': 'theirs',
+            'content_type': 'static', 'posted_at': timezone.now().isoformat(),
+        })
+
+        self.assertEqual(result['created']['post'], 0)
+        self.assertEqual(result['errors'][0]['errors'], {'post_id': ['Post belongs to another account.']})
+        self.assertEqual(Post.objects.get(post_id='theirs').social_account, self.other_account)
+
+    def test_unknown_social_account_is_rejected(self):
+        result = self.ingest({
+            'type': 'post', 'social_account': self.other_account.id, 'post_id': 'new',
+            'content_type': 'static', 'posted_at': timezone.now().isoformat(),
+        })
+
+        self.assertEqual(result['errors'][0]['errors'], {'social_account': ['Unknown social account.']})
+        self.assertFalse(Post.objects.filter(post_id='new').exists())
+
+    def test_foreign_comment_id_is_rejected(self):
+        theirs = self.create_post(self.other_account, 'theirs')
+        Comment.objects.create(post=theirs, comment_id='c1', username='fan', text='original', posted_at=timezone.now())
+        self.create_post(self.account, 'mine')
+
+        result = self.ingest(self.comment('mine', 'c1', text='hijacked'), self.comment('mine', 'c2'))
+
+        self.assertEqual(result['created']['comment'], 1)
+        self.assertEqual(result['errors'], [
+            {'line': 1, 'type': 'comment', 'errors': {'comment_id': ['Comment belongs to another account.']}}
+        ])
+        comment = Comment.objects.get(comment_id='c1')
+        self.assertEqual((comment.post_id, comment.text), (theirs.id, 'original'))
+        self.assertTrue(Comment.objects.filter(comment_id='c2', post__post_id='mine').exists())
+
+    def test_comment_on_foreign_post_is_rejected(self):
+        self.create_post(self.other_account, 'theirs')
+
+        result = self.ingest(self.comment('theirs', 'c1'))
+
+        self.assertEqual(result['errors'][0]['errors'], {'post_id': ['Unknown post.']})
+        self.assertFalse(Comment.objects.exists())
+
+    def test_over_long_values_are_row_errors(self):
+        self.create_post(self.account, 'mine')
+
+        result = self.ingest(self.comment('mine', 'c' * 256), self.comment('mine', 'c2'))
+
+        self.assertEqual(result['created']['comment'], 1)
+        self.assertEqual(result['errors'][0]['line'], 1)
+        self.assertIn('comment_id', result['errors'][0]['errors'])
+
+class PatternRebuildTests(AnalyticsTestCase):
+    def test_rebuild_replaces_patterns_and_bumps_every_account(self):
+        post = self.create_post(self.account, 'mine')
+        PostMetrics.objects.create(post=post, likes_count=10, engagement_rate=2.0)
+        EngagementPattern.objects.bulk_create([
+            EngagementPattern(social_account=self.other_account, day_of_week=0, hour_of_day=hour, post_count=1)
+            for hour in range(3)
+        ])
+        generations = get_generation(self.user.id), get_generation(self.other.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(rebuild_engagement_patterns(), 1)
+
+        deletes = [query for query in queries.captured_queries
+                   if query['sql'].startswith('DELETE') and 'analytics_engagementpattern' in query['sql']]
+        self.assertEqual(len(deletes), 1)
+
+        pattern = EngagementPattern.objects.get()
+        self.assertEqual((pattern.social_account, pattern.post_count, pattern.avg_likes), (self.account, 1, 10))
+        self.assertEqual((get_generation(self.user.id), get_generation(self.other.id)), (generations[0] + 1, generations[1] + 1))
+
+    def test_scoped_rebuild_leaves_other_accounts_and_the_checkpoint(self):
+        folded = self.create_post(self.account, 'folded')
+        PostMetrics.objects.create(post=folded, likes_count=10)
+        theirs = self.create_post(self.other_account, 'theirs')
+        PostMetrics.objects.create(post=theirs, likes_count=5)
+        rebuild_engagement_patterns()
+        checkpoint = ProcessingCheckpoint.objects.get(name='engagement_patterns').position
+
+        pending = self.create_post(self.account, 'pending')
+        PostMetrics.objects.create(post=pending, likes_count=30)
+        EngagementPattern.objects.filter(social_account=self.account).update(avg_likes=99)
+
+        rebuild_engagement_patterns(account_ids=[self.account.id])
+
+        self.assertEqual(ProcessingCheckpoint.objects.get(name='engagement_patterns').position, checkpoint)
+        self.assertEqual(EngagementPattern.objects.get(social_account=self.account).avg_likes, 10)
+        self.assertEqual(EngagementPattern.objects.get(social_account=self.other_account).avg_likes, 5)
+
+class CacheInvalidationTests(AnalyticsTestCase):
+    def test_social_account_changes_bump_the_owner(self):
+        generation, other_generation = get_generation(self.user.id), get_generation(self.other.id)
+
+        self.account.is_active = False
+        self.account.save()
+        self.assertEqual(get_generation(self.user.id), generation + 1)
+
+        SocialMediaAccount.objects.create(user=self.user, platform='twitter', account_username='owner', account_id='3').delete()
+        self.assertEqual(get_generation(self.user.id), generation + 3)
+        self.assertEqual(get_generation(self.other.id), other_generation)
+
+    def test_deleting_metrics_bumps_once_per_delete(self):
+        post = self.create_post(self.account, 'mine')
+        for likes in range(3):
+            PostMetrics.objects.create(post=post, likes_count=likes)
+
+        generation = get_generation(self.user.id)
+        PostMetrics.objects.filter(post=post).delete()
+        self.assertEqual(get_generation(self.user.id), generation + 1)
+
+        PostMetrics.objects.create(post=post, likes_count=4)
+        PostMetrics.objects.create(post=post, likes_count=5)
+        generation = get_generation(self.user.id)
+        post.delete()
+        self.assertEqual(get_generation(self.user.id), generation + 1)
+
+class RollupMaintenanceTests(AnalyticsTestCase):
+    def setUp(self):
+        self.old_day = timezone.now() - timedelta(days=5)
+        self.post = self.create_post(self.account, 'mine', posted_at=self.old_day)
+        self.snapshot = PostMetrics.objects.create(post=self.post, likes_count=7, recorded_at=self.old_day)
+
+    def rollup(self, moment):
+        return DailyMetricsRollup.objects.filter(social_account=self.account, date=timezone.localdate(moment)).first()
+
+    def test_saving_posts_and_metrics_fills_sealed_days(self):
+        rollup = self.rollup(self.old_day)
+        self.assertEqual((rollup.posts_published, rollup.snapshots_count, rollup.total_likes), (1, 1, 7))
+
+    def test_deleting_metrics_refreshes_their_day(self):
+        PostMetrics.objects.create(post=self.post, likes_count=3, recorded_at=self.old_day)
+        self.snapshot.delete()
+
+        rollup = self.rollup(self.old_day)
+        self.assertEqual((rollup.snapshots_count, rollup.total_likes), (1, 3))
+
+    def test_deleting_a_post_refreshes_its_days(self):
+        later = self.old_day + timedelta(days=2)
+        PostMetrics.objects.create(post=self.post, likes_count=3, recorded_at=later)
+
+        Post.objects.get(pk=self.post.pk).delete()
+
+        self.assertIsNone(self.rollup(self.old_day))
+        self.assertIsNone(self.rollup(later))
+
+    def test_moving_a_post_refreshes_the_day_it_left(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.posted_at = self.old_day - timedelta(days=2)
+        post.save()
+
+        self.assertEqual(self.rollup(self.old_day).posts_published, 0)
+        self.assertEqual(self.rollup(post.posted_at).posts_published, 1)
+
+    def test_ingest_moving_a_post_refreshes_the_day_it_left(self):
+        moved_to = self.old_day - timedelta(days=2)
+        ingest_stream([json.dumps({
+            'type': 'post', 'social_account': self.account.id, 'post_id': 'mine',
+            'content_type': 'static', 'posted_at': moved_to.isoformat(),
+        })], user=self.user)
+
+        self.assertEqual(self.rollup(self.old_day).posts_published, 0)
+        self.assertEqual(self.rollup(moved_to).posts_published, 1)
+
+class CurrentProjectionTests(AnalyticsTestCase):
+    def setUp(self):
+        self.post = self.create_post(self.account, 'mine')
+        self.recorded_at = timezone.now() - timedelta(hours=3)
+
+    def snapshot(self, hours, likes):
+        return PostMetrics.objects.create(post=self.post, likes_count=likes, recorded_at=self.recorded_at + timedelta(hours=hours))
+
+    def audience(self, followers):
+        # recorded_at is auto_now_add, so creation order is time order.
+        return Audience.objects.create(social_account=self.account, followers_count=followers)
+
+    def test_current_metrics_follow_the_newest_snapshot(self):
+        self.snapshot(0, 1)
+        newest = self.snapshot(2, 3)
+        self.snapshot(1, 2)
+
+        current = PostCurrentMetrics.objects.get(post=self.post)
+        self.assertEqual((current.metrics_id, current.likes_count), (newest.id, 3))
+
+        newest.likes_count = 4
+        newest.save()
+        self.assertEqual(PostCurrentMetrics.objects.get(post=self.post).likes_count, 4)
+
+    def test_an_older_snapshot_never_replaces_a_newer_one(self):
+        older = self.snapshot(0, 1)
+        newest = self.snapshot(1, 2)
+
+        # As a concurrent writer that read the row before newest arrived.
+        self.assertEqual(PostCurrentMetrics.objects.sync([older]), 1)
+        self.assertEqual(PostCurrentMetrics.objects.get(post=self.post).metrics_id, newest.id)
+
+        PostCurrentMetrics.objects.filter(post=self.post).delete()
+        PostCurrentMetrics.objects.sync([older])
+        self.assertEqual(PostCurrentMetrics.objects.get(post=self.post).metrics_id, older.id)
+
+    def test_deleting_the_current_snapshot_falls_back(self):
+        self.snapshot(0, 1)
+        middle = self.snapshot(1, 2)
+        newest = self.snapshot(2, 3)
+
+        newest.delete()
+        current = PostCurrentMetrics.objects.get(post=self.post)
+        self.assertEqual((current.metrics_id, current.likes_count), (middle.id, 2))
+
+        PostMetrics.objects.filter(post=self.post).delete()
+        self.assertFalse(PostCurrentMetrics.objects.filter(post=self.post).exists())
+
+    def test_current_audience_follows_the_newest_snapshot(self):
+        self.audience(100)
+        newest = self.audience(300)
+
+        current = CurrentAudience.objects.get(social_account=self.account)
+        self.assertEqual((current.audience_id, current.followers_count), (newest.id, 300))
+
+        newest.followers_count = 350
+        newest.save()
+        self.assertEqual(CurrentAudience.objects.get(social_account=self.account).followers_count, 350)
+
+    def test_an_older_audience_never_replaces_a_newer_one(self):
+        older = self.audience(100)
+        newest = self.audience(300)
+        Audience.objects.filter(id=older.id).update(recorded_at=newest.recorded_at - timedelta(hours=1))
+        older.refresh_from_db()
+
+        self.assertEqual(CurrentAudience.objects.sync([older]), 1)
+        self.assertEqual(CurrentAudience.objects.get(social_account=self.account).audience_id, newest.id)
+
+        CurrentAudience.objects.rebuild([self.account.id])
+        self.assertEqual(CurrentAudience.objects.get(social_account=self.account).followers_count, 300)
+
+    def test_deleting_the_current_audience_falls_back(self):
+        first = self.audience(100)
+        newest = self.audience(200)
+
+        newest.delete()
+        current = CurrentAudience.objects.get(social_account=self.account)
+        self.assertEqual((current.audience_id, current.followers_count), (first.id, 100))
+
+        first.delete()
+        self.assertFalse(CurrentAudience.objects.filter(social_account=self.account).exists())
+
+class CursorPaginationTests(AnalyticsTestCase):
+    def setUp(self):
+        for index in range(3):
+            self.create_post(self.account, f'post-{index}', posted_at=timezone.now() - timedelta(hours=index + 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_posts(self, cursor):
+        return self.client.get('/api/analytics/posts/', {'cursor': cursor, 'page_size': 1})
+
+    def encode(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_next_link_round_trips(self):
+        first = self.client.get('/api/analytics/posts/', {'page_size': 1})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual([post['post_id'] for post in second.data['results']], ['post-1'])
+
+    def test_malformed_cursors_are_rejected(self):
+        timestamp = timezone.now().isoformat()
+        cursors = [
+            'not base64!',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            self.encode([timestamp, 1]),
+            self.encode(7),
+            self.encode({'r': True}),
+            self.encode({'v': 'abc'}),
+            self.encode({'v': [timestamp]}),
+            self.encode({'v': ['yesterday', 1]}),
+            self.encode({'v': [timestamp, 'abc']}),
+            self.encode({'v': [None, 1]}),
+            self.encode({'v': [{'a': 1}, 1]}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.get_posts(cursor)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(str(response.data['detail']), 'Invalid cursor')
+
+class PostSearchTests(AnalyticsTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def captioned(self, post_id, caption, hours):
+        post = self.create_post(self.account, post_id, posted_at=timezone.now() - timedelta(hours=hours))
+        # update() so the search_vector trigger sees the caption.
+        Post.objects.filter(pk=post.pk).update(caption=caption)
+
+    def search(self, **params):
+        response = self.client.get('/api/analytics/posts/', params)
+        self.assertEqual(response.status_code, 200)
+        return [post['post_id'] for post in response.data['results']]
+
+    def test_search_matches_captions_and_honours_explicit_ordering(self):
+        self.captioned('old', 'sunset at the beach', 3)
+        self.captioned('new', 'beach day', 1)
+        self.captioned('city', 'city lights', 2)
+
+        self.assertEqual(self.search(search='beach', ordering='-posted_at'), ['new', 'old'])
+        self.assertEqual(self.search(search='beach', ordering='posted_at'), ['old', 'new'])
+
+    def test_default_ordering_leaves_a_ranked_search_alone(self):
+        ranked = Post.objects.annotate(search_rank=Value(1.0)).order_by('-search_rank', '-id')
+        request = Request(APIRequestFactory().get('/'))
+        self.assertEqual(
+            AliasedOrderingFilter().filter_queryset(request, ranked, PostViewSet()).query.order_by,
+            ('-search_rank', '-id')
+        )
+
+        request = Request(APIRequestFactory().get('/', {'ordering': 'posted_at'}))
+        self.assertEqual(
+            AliasedOrderingFilter().filter_queryset(request, ranked, PostViewSet()).query.order_by,
+            ('posted_at',)
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'full-text search needs PostgreSQL')
+    def test_results_are_ordered_by_rank(self):
+        self.captioned('weak', 'beach', 1)
+        self.captioned('strong', 'beach beach beach sunset', 3)
+
+        self.assertEqual(self.search(search='beach'), ['strong', 'weak'])
+
+class ExportTests(AnalyticsTestCase):
+    def setUp(self):
+        self.create_post(self.account, 'mine')
+        self.create_post(self.other_account, 'theirs')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get('/api/analytics/posts/', params)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode()
+
+    def test_csv_export_streams_the_users_rows(self):
+        response, body = self.export(format='csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual([row['post_id'] for row in rows], ['mine'])
+        self.assertEqual(rows[0]['platform'], 'instagram')
+
+    def test_ndjson_export_writes_one_object_per_line(self):
+        response, body = self.export(format='ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['post_id'] for line in body.splitlines()], ['mine'])
+
+    def test_errors_are_rendered_in_the_requested_format(self):
+        response, body = self.export(format='csv', date_from='not a date')
+        self.assertEqual(response.status_code, 400)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(list(rows[0]), ['date_from'])
+        self.assertEqual(len(json.loads(rows[0]['date_from'])), 1)
+
+        response, body = self.export(format='ndjson', date_from='not a date')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([list(json.loads(line)) for line in body.splitlines()], [['date_from']])
+
+class InsightGenerationTests(AnalyticsTestCase):
+    def setUp(self):
+        for account in (self.account, self.other_account):
+            EngagementPattern.objects.create(
+                social_account=account, day_of_week=2, hour_of_day=18, avg_engagement_rate=4.5, post_count=3
+            )
+
+    def test_only_inserted_insights_are_counted_and_invalidated(self):
+        self.assertEqual(generate_insights(), 2)
+
+        AIInsight.objects.filter(user=self.other).delete()
+        generation, other_generation = get_generation(self.user.id), get_generation(self.other.id)
+
+        self.assertEqual(generate_insights(), 1)
+        self.assertEqual(AIInsight.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(get_generation(self.user.id), generation)
+        self.assertEqual(get_generation(self.other.id), other_generation + 1)
+
+class HeatmapTests(AnalyticsTestCase):
+    def setUp(self):
+        self.lucky = EngagementPattern.objects.create(
+            social_account=self.account, day_of_week=0, hour_of_day=9, avg_engagement_rate=10.0, post_count=1
+        )
+        self.steady = EngagementPattern.objects.create(
+            social_account=self.account, day_of_week=2, hour_of_day=18, avg_engagement_rate=6.0, post_count=20
+        )
+        # A weak, well-sampled slot pulls the account average down, so the
+        # single lucky post ends up behind the steady slot.
+        self.weak = EngagementPattern.objects.create(
+            social_account=self.account, day_of_week=5, hour_of_day=3, avg_engagement_rate=1.0, post_count=20
+        )
+        EngagementPattern.objects.create(
+            social_account=self.other_account, day_of_week=4, hour_of_day=12, avg_engagement_rate=50.0, post_count=40
+        )
+        refresh_heatmaps()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, name, **params):
+        response = self.client.get(f'/api/analytics/engagement-patterns/{name}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_optimal_times_serializes_patterns_by_confidence(self):
+        optimal = self.get('optimal_times')
+
+        self.assertEqual([slot['id'] for slot in optimal], [self.steady.id, self.lucky.id, self.weak.id])
+        self.assertEqual(set(optimal[0]), set(EngagementPatternSerializer.Meta.fields))
+        self.assertEqual([slot['id'] for slot in self.get('optimal_times', limit=1, account_id=self.account.id)], [self.steady.id])
+
+    def test_heatmap_grids_are_indexed_by_day_and_hour(self):
+        heatmap = self.get('heatmap')
+
+        self.assertEqual(heatmap['engagement_rate'][2][18], 6.0)
+        self.assertEqual(heatmap['post_count'][0][9], 1)
+        self.assertEqual(heatmap['confidence'][2][18], round(20 / 23, 3))
+        self.assertEqual(sum(map(sum, heatmap['post_count'])), 41)
+        self.assertEqual(heatmap['days'][2], 'Wednesday')
+
+    def test_schedule_follows_the_ranked_slots(self):
+        schedule = self.get('best_posting_schedule', posts_per_week=2)
+
+        self.assertEqual([(slot['day'], slot['hour']) for slot in schedule], [('Wednesday', 18), ('Monday', 9)])
+
+class PlatformClientTests(AnalyticsTestCase):
+    def fetch(self, *responses):
+        responses = list(responses)
+
+        async def run():
+            client = PlatformClient('instagram', 'http://platform.test', rate=1000, max_connections=1, timeout=5)
+            await client.close()
+            client.client = httpx.AsyncClient(
+                base_url='http://platform.test', transport=httpx.MockTransport(lambda request: responses.pop(0))
+            )
+            try:
+                return await client.fetch_profile(self.account)
+            finally:
+                await client.close()
+
+        return asyncio.run(run())
+
+    def test_retry_after_accepts_seconds_and_http_dates(self):
+        self.assertEqual(retry_after('3', 1), 3.0)
+        self.assertEqual(retry_after(None, 1), 1)
+        self.assertEqual(retry_after('soon', 1), 1)
+        self.assertEqual(retry_after(format_datetime(timezone.now() - timedelta(minutes=1), usegmt=True), 1), 0.0)
+        delay = retry_after(format_datetime(timezone.now() + timedelta(seconds=30), usegmt=True), 1)
+        self.assertTrue(25 <= delay <= 30)
+
+    def test_retries_after_an_http_date(self):
+        retry_at = format_datetime(timezone.now() - timedelta(seconds=1), usegmt=True)
+        profile = self.fetch(
+            httpx.Response(429, headers={'Retry-After': retry_at}),
+            httpx.Response(200, json={'followers_count': 5})
+        )
+        self.assertEqual(profile, {'followers_count': 5})
+
+    def test_non_json_body_is_an_http_error(self):
+        with self.assertRaises(httpx.HTTPError):
+            self.fetch(httpx.Response(200, text='<html>maintenance</html>'))
+        with self.assertRaises(httpx.HTTPError):
+            self.fetch(httpx.Response(200, json=['not', 'an', 'object']))
+
+class DownsampleTests(AnalyticsTestCase):
+    fields = {'followers': 'followers_count'}
+
+    def setUp(self):
+        self.date_from = timezone.now() - timedelta(days=4)
+
+    def audience(self, account, followers, days_ago):
+        snapshot = Audience.objects.create(social_account=account, followers_count=followers)
+        Audience.objects.filter(pk=snapshot.pk).update(recorded_at=self.date_from + timedelta(days=4 - days_ago))
+
+    def test_points_must_be_a_number(self):
+        with self.assertRaisesMessage(ValueError, 'points must be a whole number'):
+            downsample(Audience.objects.all(), 'recorded_at', self.fields, self.date_from, points='abc')
+
+    def test_series_are_seeded_from_before_the_range(self):
+        self.audience(self.account, 100, days_ago=10)
+        self.audience(self.other_account, 50, days_ago=10)
+        self.audience(self.other_account, 60, days_ago=1.5)
+
+        timeline = downsample(
+            Audience.objects.all(), 'recorded_at', self.fields, self.date_from,
+            bucket='1d', series_field='social_account_id'
+        )
+
+        self.assertEqual([point['followers'] for point in timeline][:4], [150, 150, 160, 160])
+        self.assertEqual([point['stats']['followers']['change'] for point in timeline][:4], [0, 0, 10, 0])
+
+    def test_single_series_change_starts_from_the_previous_value(self):
+        self.audience(self.account, 100, days_ago=10)
+        self.audience(self.account, 120, days_ago=3.5)
+
+        timeline = downsample(Audience.objects.all(), 'recorded_at', self.fields, self.date_from, bucket='1d')
+
+        self.assertEqual(timeline[0]['stats']['followers']['change'], 20)
+
+class XLSXReportWriterTests(TestCase):
+    def test_control_characters_are_dropped(self):
+        stream = io.BytesIO()
+        writer = XLSXReportWriter(stream, 'Report')
+        writer.write_header(['caption', 'likes'])
+        writer.write_row(['bell\x07 and\x0b tab\t', 3])
+        writer.close()
+
+        sheet = minidom.parseString(zipfile.ZipFile(stream).read('xl/worksheets/sheet1.xml'))
+        texts = [node.firstChild.data for node in sheet.getElementsByTagName('t')]
+        self.assertEqual(texts, ['caption', 'likes', 'bell and tab\t'])
+
+class CompetitorLatestMetricsTests(AnalyticsTestCase):
+    def setUp(self):
+        self.competitor = Competitor.objects.create(user=self.user, platform='instagram', account_username='rival', account_id='r')
+
+    def snapshot(self, followers):
+        return CompetitorMetrics.objects.create(competitor=self.competitor, followers_count=followers)
+
+    def latest(self):
+        return Competitor.objects.get(pk=self.competitor.pk).latest_metrics_id
+
+    def test_pointer_follows_new_snapshots_and_deletes(self):
+        first = self.snapshot(10)
+        newest = self.snapshot(20)
+        self.assertEqual(self.latest(), newest.id)
+
+        CompetitorMetrics.objects.filter(pk=first.pk).update(recorded_at=newest.recorded_at + timedelta(hours=1))
+        self.assertEqual(rebuild_latest_metrics([self.competitor.id]), 1)
+        self.assertEqual(self.latest(), first.id)
+
+        first.delete()
+        self.assertEqual(self.latest(), newest.id)
+        newest.delete()
+        self.assertIsNone(self.latest())
+
+class RecomputeEngagementTests(AnalyticsTestCase):
+    def setUp(self):
+        self.start = timezone.now() - timedelta(days=10)
+        for days, followers in ((1, 1000), (4, 2500), (7, 400)):
+            snapshot = Audience.objects.create(social_account=self.account, followers_count=followers)
+            Audience.objects.filter(pk=snapshot.pk).update(recorded_at=self.start + timedelta(days=days))
+        self.post = self.create_post(self.account, 'mine', posted_at=self.start)
+        self.snapshots = [
+            PostMetrics.objects.create(
+                post=self.post, likes_count=10 * hours, comments_count=hours % 7, shares_count=hours % 3,
+                engagement_rate=99.0, recorded_at=self.start + timedelta(hours=hours)
+            )
+            for hours in range(0, 24 * 9, 5)
+        ]
+
+    def followers_at(self, moment):
+        history = Audience.objects.filter(social_account=self.account).order_by('recorded_at')
+        before = [snapshot.followers_count for snapshot in history if snapshot.recorded_at <= moment]
+        # Snapshots older than the first Audience row use that row.
+        return before[-1] if before else history[0].followers_count
+
+    def test_matches_the_scalar_engagement_rate(self):
+        result = recompute_engagement(chunk_size=7)
+
+        self.assertEqual((result['scanned'], result['updated']), (len(self.snapshots), len(self.snapshots)))
+        for snapshot in PostMetrics.objects.filter(post=self.post):
+            expected = calculate_engagement_rate(
+                snapshot.likes_count, snapshot.comments_count, snapshot.shares_count, self.followers_at(snapshot.recorded_at)
+            )
+            self.assertAlmostEqual(snapshot.engagement_rate, expected, places=9)
+
+        newest = max(self.snapshots, key=lambda snapshot: snapshot.recorded_at)
+        current = PostCurrentMetrics.objects.get(post=self.post)
+        self.assertAlmostEqual(current.engagement_rate, PostMetrics.objects.get(pk=newest.pk).engagement_rate, places=9)
+
+        self.assertEqual(recompute_engagement()['updated'], 0)
+
+    def test_accounts_without_audience_keep_their_rates(self):
+        post = self.create_post(self.other_account, 'theirs')
+        snapshot = PostMetrics.objects.create(post=post, likes_count=5, engagement_rate=3.5)
+
+        recompute_engagement(account_ids=[self.other_account.id])
+
+        self.assertEqual(PostMetrics.objects.get(pk=snapshot.pk).engagement_rate, 3.5)
+
+class RetentionTests(AnalyticsTestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.old_day = today - timedelta(days=HOURLY_DAYS + 10)
+        self.recent_day = today - timedelta(days=5)
+        self.post = self.create_post(self.account, 'mine', posted_at=self.at(self.old_day, 9))
+        Audience.objects.create(social_account=self.account, followers_count=1000)
+        self.snapshots = {
+            day: [
+                PostMetrics.objects.create(post=self.post, likes_count=hour, engagement_rate=99.0, recorded_at=self.at(day, hour))
+                for hour in (12, 13, 14)
+            ]
+            for day in (self.old_day, self.recent_day)
+        }
+
+    def at(self, day, hour):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def rollup(self, day):
+        return DailyMetricsRollup.objects.get(social_account=self.account, date=day)
+
+    def test_thinning_keeps_each_posts_newest_snapshot_per_day(self):
+        result = downsample_post_metrics()
+
+        self.assertEqual(result, {'daily': 2, 'weekly': 0})
+        kept = set(PostMetrics.objects.filter(post=self.post).values_list('id', flat=True))
+        self.assertEqual(kept, {self.snapshots[self.old_day][-1].id} | {snapshot.id for snapshot in self.snapshots[self.recent_day]})
+        self.assertEqual(PostCurrentMetrics.objects.get(post=self.post).metrics_id, self.snapshots[self.recent_day][-1].id)
+        self.assertEqual(downsample_post_metrics(), {'daily': 0, 'weekly': 0})
+
+    def test_recompute_leaves_rollups_of_thinned_days_alone(self):
+        downsample_post_metrics()
+        self.assertEqual(self.rollup(self.old_day).snapshots_count, 3)
+        stale_sum = self.rollup(self.recent_day).engagement_rate_sum
+
+        recompute_engagement()
+
+        self.assertEqual(self.rollup(self.old_day).snapshots_count, 3)
+        recent = self.rollup(self.recent_day)
+        self.assertEqual(recent.snapshots_count, 3)
+        self.assertNotEqual(recent.engagement_rate_sum, stale_sum)
+
+    @skipUnless(connection.vendor == 'postgresql', 'partitioning needs PostgreSQL')
+    def test_partitioning_keeps_rows_and_routes_new_ones(self):
+        before = PostMetrics.objects.count()
+
+        result = partition_post_metrics(batch_size=2)
+
+        self.assertTrue(is_partitioned())
+        self.assertEqual(result['copied'], before)
+        self.assertEqual(PostMetrics.objects.count(), before)
+        snapshot = PostMetrics.objects.create(post=self.post, likes_count=1)
+        self.assertGreater(snapshot.id, max(snapshot.id for snapshots in self.snapshots.values() for snapshot in snapshots))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT tableoid::regclass::text FROM {TABLE} WHERE id = %s', [snapshot.id])
+            self.assertEqual(cursor.fetchone()[0], partition_name(timezone.localdate()))
+
+class TimelineTests(AnalyticsTestCase):
+    def setUp(self):
+        self.first_day = timezone.localdate() - timedelta(days=4)
+        self.date_from = self.at(0, 0)
+        audience = Audience.objects.create(social_account=self.account, followers_count=1000)
+        Audience.objects.filter(pk=audience.pk).update(recorded_at=self.date_from - timedelta(days=1))
+        for post_id, day, hour, likes, rate in (('a', 0, 10, 10, 2.0), ('b', 0, 15, 20, 4.0), ('c', 2, 9, 5, 1.0)):
+            self.publish(self.account, post_id, self.at(day, hour), likes, rate)
+        self.publish(self.other_account, 'theirs', self.at(0, 11), 100, 9.0)
+
+    def at(self, day, hour):
+        return timezone.make_aware(datetime.combine(self.first_day + timedelta(days=day), time(hour)))
+
+    def publish(self, account, post_id, posted_at, likes, rate):
+        post = self.create_post(account, post_id, posted_at=posted_at)
+        PostMetrics.objects.create(post=post, likes_count=likes, engagement_rate=rate)
+
+    def timeline(self, granularity='day'):
+        posts = Post.objects.filter(social_account__user=self.user)
+        return build_post_timeline(posts, self.date_from, self.at(2, 12), granularity=granularity)
+
+    def test_days_are_filled_and_totalled(self):
+        timeline = self.timeline()
+
+        self.assertEqual([row['date'] for row in timeline], [(self.first_day + timedelta(days=day)).isoformat() for day in range(3)])
+        self.assertEqual([row['posts_count'] for row in timeline], [2, 0, 1])
+        self.assertEqual([row['total_likes'] for row in timeline], [30, 0, 5])
+        self.assertEqual([row['avg_engagement_rate'] for row in timeline], [3.0, 0, 1.0])
+        self.assertEqual([row['followers'] for row in timeline], [1000] * 3)
+        self.assertEqual(timeline[0]['follower_engagement_rate'], calculate_engagement_rate(30, 0, 0, 1000))
+
+    def test_query_count_does_not_grow_with_posts(self):
+        with CaptureQueriesContext(connection) as before:
+            self.timeline('hour')
+        for hour in range(12, 18):
+            self.publish(self.account, f'extra-{hour}', self.at(1, hour), 1, 1.0)
+        with CaptureQueriesContext(connection) as after:
+            timeline = self.timeline('hour')
+
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(sum(row['posts_count'] for row in timeline), 9)
+
+    def test_unknown_granularity_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/analytics/posts/timeline_analytics/', {'granularity': 'fortnight'})
+        self.assertEqual(response.status_code, 400)
+
+class IngestLoaderTests(AnalyticsTestCase):
+    def setUp(self):
+        self.post = self.create_post(self.account, 'mine')
+        self.start = timezone.now() - timedelta(hours=2)
+
+    def metrics(self, count):
+        return [
+            json.dumps({
+                'type': 'metrics', 'post_id': 'mine', 'likes_count': index,
+                'recorded_at': (self.start + timedelta(seconds=index)).isoformat(),
+            })
+            for index in range(count)
+        ]
+
+    def test_csv_metrics_update_the_current_snapshot(self):
+        lines = ['post_id,likes_count,recorded_at', f'mine,4,{self.start.isoformat()}',
+                 f'mine,9,{(self.start + timedelta(minutes=5)).isoformat()}']
+
+        result = ingest_stream(lines, input_format='csv', record_type='metrics', user=self.user)
+
+        self.assertEqual((result['created']['metrics'], result['error_count']), (2, 0))
+        self.assertEqual(PostCurrentMetrics.objects.get(post=self.post).likes_count, 9)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        lines = [json.dumps({'type': 'metrics', 'post_id': 'mine', 'likes_count': 'many'}), *self.metrics(1)]
+
+        result = ingest_stream(lines, user=self.user)
+
+        self.assertEqual(result['created']['metrics'], 1)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in result['errors']], [(1, ['likes_count'])])
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL')
+    def test_copy_loader_keeps_the_projection_current(self):
+        result = ingest_stream(self.metrics(COPY_THRESHOLD), user=self.user, chunk_size=COPY_THRESHOLD)
+
+        self.assertEqual(result['created']['metrics'], COPY_THRESHOLD)
+        self.assertEqual(PostMetrics.objects.filter(post=self.post).count(), COPY_THRESHOLD)
+        current = PostCurrentMetrics.objects.get(post=self.post)
+        newest = PostMetrics.objects.filter(post=self.post).order_by('-recorded_at', '-id').first()
+        self.assertEqual((current.metrics_id, current.likes_count), (newest.id, COPY_THRESHOLD - 1))
+
+class TrendingHashtagTests(AnalyticsTestCase):
+    def publish(self, account, post_id, caption, days_ago, rate):
+        post = Post.objects.create(
+            social_account=account, post_id=post_id, content_type='static', caption=caption,
+            posted_at=timezone.now() - timedelta(days=days_ago)
+        )
+        PostMetrics.objects.create(post=post, likes_count=10, engagement_rate=rate)
+        return post
+
+    def trending(self, user=None, days=30):
+        return [
+            (row['tag'], row['usage_count'], row['avg_engagement'])
+            for row in trending_hashtags(user or self.user, days=days)
+        ]
+
+    def test_tags_are_ranked_by_use_within_the_window(self):
+        self.publish(self.account, 'a', '#beach #sun', 2, 2.0)
+        self.publish(self.account, 'b', '#beach', 5, 4.0)
+        self.publish(self.account, 'old', '#sun #retro', 60, 9.0)
+        self.publish(self.other_account, 'theirs', '#sun #sun2', 1, 1.0)
+
+        self.assertEqual(self.trending(), [('beach', 2, 3.0), ('sun', 1, 2.0)])
+        self.assertEqual(self.trending(self.other), [('sun', 1, 1.0), ('sun2', 1, 1.0)])
+
+    def test_stats_follow_metric_updates_and_match_a_rebuild(self):
+        post = self.publish(self.account, 'a', '#beach', 2, 2.0)
+        PostMetrics.objects.create(post=post, likes_count=30, engagement_rate=6.0)
+
+        self.assertEqual(self.trending(), [('beach', 1, 6.0)])
+        incremental = sorted(HashtagDailyStats.objects.values_list('user_id', 'hashtag_id', 'date', 'usage_count', 'likes_sum'))
+        rebuild_hashtag_stats()
+        self.assertEqual(
+            sorted(HashtagDailyStats.objects.values_list('user_id', 'hashtag_id', 'date', 'usage_count', 'likes_sum')),
+            incremental
+        )
+
+class HashtagExtractionTests(AnalyticsTestCase):
+    def test_extraction_normalizes_and_skips_non_tags(self):
+        caption = '#Beach #beach day#sun &#39; http://example.com/#frag #2024 #Café \uFF03\uFF34ide'
+        self.assertEqual(extract_hashtags(caption), ['beach', 'café', 'tide'])
+        self.assertEqual(extract_hashtags('no tags here'), [])
+
+    def test_linking_is_idempotent(self):
+        post = Post.objects.create(
+            social_account=self.account, post_id='mine', content_type='static',
+            caption='#beach #sun', posted_at=timezone.now()
+        )
+        self.assertEqual(set(post.post_hashtags.values_list('hashtag__tag', flat=True)), {'beach', 'sun'})
+
+        link_caption_hashtags([(post.id, '#Beach #surf')])
+        self.assertEqual(sorted(post.post_hashtags.values_list('hashtag__tag', flat=True)), ['beach', 'sun', 'surf'])
+
+    def test_backfill_command_links_existing_captions(self):
+        post = self.create_post(self.account, 'mine')
+        Post.objects.filter(pk=post.pk).update(caption='#late #tags')
+
+        call_command('extract_hashtags', stdout=io.StringIO())
+
+        self.assertEqual(sorted(post.post_hashtags.values_list('hashtag__tag', flat=True)), ['late', 'tags'])
+        self.assertEqual(HashtagDailyStats.objects.filter(user=self.user).count(), 2)
+
+class SentimentScoringTests(AnalyticsTestCase):
+    def test_lexicon_scores_handle_negation_boosters_and_contrast(self):
+        self.assertGreater(score_text('I love this!'), 0.5)
+        self.assertLess(score_text('this is horrible'), -0.5)
+        self.assertLess(score_text('not good'), 0)
+        self.assertGreater(score_text('very good'), score_text('good'))
+        self.assertLess(score_text('good but terrible'), 0)
+        self.assertEqual(score_text(''), 0.0)
+        self.assertEqual(score_text('see you at 5'), 0.0)
+
+    def test_comments_are_scored_once_in_chunks(self):
+        post = self.create_post(self.account, 'mine')
+        texts = ['love it', 'awful', 'ok', 'great stuff', 'so bad']
+        for index, text in enumerate(texts):
+            Comment.objects.create(post=post, comment_id=f'c{index}', username='fan', text=text, posted_at=timezone.now())
+
+        self.assertEqual(score_comments(workers=1, limit=2, chunk_size=2, batch_size=1)['scored'], 2)
+        self.assertEqual(score_comments(workers=1, chunk_size=2, batch_size=1)['scored'], 3)
+        self.assertEqual(score_comments(workers=1)['scored'], 0)
+        self.assertEqual(score_comments(workers=1, rescore=True)['scored'], 5)
+
+        scores = dict(Comment.objects.values_list('text', 'sentiment_score'))
+        self.assertEqual(scores, {text: score_text(text) for text in texts})
+        self.assertFalse(Comment.objects.exclude(sentiment_version=MODEL_VERSION).exists())
+
+class QueryEngineTests(AnalyticsTestCase):
+    def plan(self, text):
+        return parse_query(normalize_query(text))
+
+    def test_top_queries_are_parsed(self):
+        plan = self.plan('Top ten Reels by likes in the last 2 weeks')
+
+        self.assertEqual(
+            (plan['intent'], plan['limit'], plan['order'], plan['metric'], plan['content_types'], plan['period']),
+            ('top', 10, 'desc', 'likes', ['reel'], {'kind': 'days', 'value': 14})
+        )
+        self.assertEqual(self.plan('worst 3 posts on instagram')['order'], 'asc')
+
+    def test_aggregate_queries_are_parsed(self):
+        plan = self.plan('average engagement on instagram by platform this month')
+        self.assertEqual(
+            (plan['intent'], plan['metric'], plan['aggregate'], plan['group_by'], plan['platforms'], plan['period']),
+            ('aggregate', 'engagement', 'avg', 'platform', ['instagram'], {'kind': 'this_month'})
+        )
+
+        plan = self.plan('how many posts did @owner publish all time')
+        self.assertEqual((plan['metric'], plan['aggregate'], plan['accounts'], plan['period']),
+                         ('posts', 'count', ['owner'], {'kind': 'all'}))
+
+        with self.assertRaises(QueryError):
+            self.plan('what should I do')
+
+    def test_execute_answers_from_the_users_posts_and_caches(self):
+        for post_id, likes in (('low', 3), ('high', 30)):
+            PostMetrics.objects.create(post=self.create_post(self.account, post_id), likes_count=likes)
+        PostMetrics.objects.create(post=self.create_post(self.other_account, 'theirs'), likes_count=300)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        text = 'top 2 posts by likes over the last 3 days'
+
+        first = client.post('/api/analytics/queries/execute/', {'query_text': text}, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([(row['post_id'], row['value']) for row in first.data['results']], [('high', 30), ('low', 3)])
+
+        second = client.post('/api/analytics/queries/execute/', {'query_text': text.upper()}, format='json')
+        self.assertTrue(second.data['timings']['plan_cached'])
+        self.assertTrue(second.data['timings']['result_cached'])
+
+        PostMetrics.objects.create(post=Post.objects.get(post_id='low'), likes_count=50)
+        third = client.post('/api/analytics/queries/execute/', {'query_text': text}, format='json')
+        self.assertFalse(third.data['timings']['result_cached'])
+        self.assertEqual(third.data['results'][0]['post_id'], 'low')
+
+        failed = client.post('/api/analytics/queries/execute/', {'query_text': 'what should I do'}, format='json')
+        self.assertEqual(failed.status_code, 400)
+        self.assertEqual(Query.objects.filter(user=self.user).count(), 4)
+
+class InstrumentationTests(AnalyticsTestCase):
+    def setUp(self):
+        self.create_post(self.account, 'mine')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def metrics(self, **headers):
+        return self.client.get('/api/analytics/metrics/', **headers)
+
+    def test_fingerprints_ignore_literals(self):
+        first = fingerprint_sql('SELECT * FROM "t" WHERE id IN (1, 2, 3) AND name = \'x\' LIMIT 20')
+        second = fingerprint_sql('SELECT  * FROM "t" WHERE id IN (%s, %s) AND name = %s LIMIT 5')
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?'))
+
+    def test_requests_report_timing_and_feed_the_histograms(self):
+        response = self.client.get('/api/analytics/posts/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries", serializer;dur=[\d.]+, total;dur=[\d.]+$')
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.force_login(self.user)
+        body = self.metrics().content.decode()
+        self.assertRegex(body, r'analytics_request_queries_count\{view="posts-list",method="GET"\} [1-9]')
+        self.assertIn('analytics_slowest_query_seconds{view="posts-list",method="GET",fingerprint=', body)
+
+    def test_metrics_need_staff_or_the_token(self):
+        # metrics_view is a plain Django view, so it sees the session login.
+        self.client.force_login(self.user)
+        self.assertEqual(self.metrics().status_code, 403)
+
+        with override_settings(INSTRUMENTATION={'TOKEN': 'secret'}):
+            self.client.logout()
+            self.assertEqual(self.metrics(HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.metrics(HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+class FollowerAsOfTests(AnalyticsTestCase):
+    def setUp(self):
+        self.start = timezone.now() - timedelta(days=10)
+        self.snapshots = [self.audience(self.account, days, followers) for days, followers in ((0, 100), (3, 300), (6, 600))]
+        self.audience(self.other_account, 2, 50)
+
+    def audience(self, account, days, followers):
+        snapshot = Audience.objects.create(social_account=account, followers_count=followers)
+        Audience.objects.filter(pk=snapshot.pk).update(recorded_at=self.start + timedelta(days=days))
+        snapshot.refresh_from_db()
+        return snapshot
+
+    def test_audience_as_of_picks_the_snapshot_in_effect(self):
+        accounts = [self.account.id, self.other_account.id]
+
+        self.assertEqual(audience_as_of(accounts, self.start + timedelta(days=4))[self.account.id].id, self.snapshots[1].id)
+        self.assertEqual(audience_as_of(accounts, self.start + timedelta(days=3))[self.account.id].id, self.snapshots[1].id)
+        self.assertEqual(list(audience_as_of(accounts, self.start + timedelta(days=1))), [self.account.id])
+        self.assertEqual(audience_as_of(accounts)[self.account.id].id, self.snapshots[2].id)
+
+        # Same recorded_at: the later row wins.
+        tied = self.audience(self.account, 6, 650)
+        self.assertEqual(audience_as_of([self.account.id])[self.account.id].id, tied.id)
+
+    def test_follower_history_looks_up_counts_in_a_range(self):
+        history = FollowerHistory.load(
+            [self.account.id, self.other_account.id],
+            start=self.start + timedelta(days=4), end=self.start + timedelta(days=5)
+        )
+
+        self.assertEqual(history.followers_at(self.account.id, self.start + timedelta(days=4)), 300)
+        self.assertEqual(history.followers_at(self.account.id, self.start + timedelta(days=9)), 300)
+        self.assertEqual(history.followers_at(self.other_account.id, self.start + timedelta(days=4)), 50)
+        self.assertIsNone(history.followers_at(self.account.id, self.start))
+        self.assertEqual(history.total_at([self.account.id, self.other_account.id, 0], self.start + timedelta(days=5)), 350)
+
+        full = FollowerHistory.load([self.account.id])
+        self.assertEqual(
+            [full.followers_at(self.account.id, self.start + timedelta(days=days)) for days in (0, 2, 3, 7)],
+            [100, 100, 300, 600]
+        )
 
-# Create your tests here.
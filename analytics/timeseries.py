@@ -0,0 +1,131 @@
+import math
+import re
+from datetime import timedelta
+from django.db.models import Avg, Count, F, FloatField, Func, IntegerField, Max, Min, Value, Window
+from django.db.models.functions import Cast, Floor, RowNumber
+from django.utils import timezone
+
+DEFAULT_POINTS = 60
+MAX_POINTS = 1000
+MIN_BUCKET_SECONDS = 60
+
+BUCKET_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+BUCKET_PATTERN = re.compile(r'^(\d+)([mhdw])$')
+
+class EpochSeconds(Func):
+    output_field = FloatField()
+    template = 'EXTRACT(EPOCH FROM %(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="CAST(strftime('%%%%s', %(expressions)s) AS REAL)", **extra_context)
+
+def parse_bucket(value):
+    match = BUCKET_PATTERN.match(value or '')
+    if not match:
+        raise ValueError('bucket must look like 30m, 6h, 1d or 1w')
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+def bucket_seconds(date_from, date_to, points=None, bucket=None):
+    if bucket:
+        seconds = parse_bucket(bucket)
+    else:
+        try:
+            points = DEFAULT_POINTS if points is None else int(points)
+        except (TypeError, ValueError):
+            raise ValueError('points must be a whole number')
+        if points < 1:
+            raise ValueError('points must be positive')
+        seconds = math.ceil((date_to - date_from).total_seconds() / min(points, MAX_POINTS))
+    seconds = max(seconds, MIN_BUCKET_SECONDS)
+    if (date_to - date_from).total_seconds() / seconds > MAX_POINTS:
+        raise ValueError(f'bucket too small for the range; at most {MAX_POINTS} points')
+    return seconds
+
+def _bucket_rows(queryset, time_field, fields, date_from, date_to, size, series_field):
+    # One row per (series, bucket): the bucket's newest row carries the
+    # last values, window aggregates carry min/max/avg.
+    partition = [F('bucket')] + ([F(series_field)] if series_field else [])
+    queryset = queryset.annotate(**{name: F(column) for name, column in fields.items() if name != column})
+    stats = {}
+    for field in fields:
+        stats[f'{field}_min'] = Window(Min(field), partition_by=partition)
+        stats[f'{field}_max'] = Window(Max(field), partition_by=partition)
+        stats[f'{field}_avg'] = Window(Avg(field), partition_by=partition)
+
+    return queryset.filter(
+        **{f'{time_field}__gte': date_from, f'{time_field}__lte': date_to}
+    ).annotate(
+        bucket=Cast(Floor(
+            (EpochSeconds(time_field) - Value(date_from.timestamp())) / Value(float(size)),
+            output_field=FloatField()
+        ), IntegerField())
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=partition, order_by=[F(time_field).desc(), F('pk').desc()]),
+        samples=Window(Count('pk'), partition_by=partition),
+        **stats
+    ).filter(rank=1).order_by().values(
+        'bucket', 'samples', *fields, *stats, *([series_field] if series_field else [])
+    )
+
+def _seed_rows(queryset, time_field, fields, date_from, series_field):
+    # Each series' last row before date_from, so a series without rows in
+    # the first buckets still carries its value and the first change is
+    # measured against what came before the range.
+    partition = [F(series_field)] if series_field else None
+    queryset = queryset.annotate(**{name: F(column) for name, column in fields.items() if name != column})
+    return queryset.filter(**{f'{time_field}__lt': date_from}).annotate(
+        rank=Window(RowNumber(), partition_by=partition, order_by=[F(time_field).desc(), F('pk').desc()])
+    ).filter(rank=1).order_by().values(*fields, *([series_field] if series_field else []))
+
+# Downsamples a snapshot table into constant-size buckets between date_from
+# and date_to. fields maps output names to columns. Each point has the last
+# value of every field, plus min/max/avg, the change from the previous
+# bucket's last value and the percent change. With series_field (e.g. one
+# series per account) the series are summed, each carrying its last value
+# (from before date_from if need be) through buckets it has no rows in.
+def downsample(queryset, time_field, fields, date_from, date_to=None, points=None, bucket=None, series_field=None):
+    date_to = date_to or timezone.now()
+    size = bucket_seconds(date_from, date_to, points, bucket)
+    count = max(1, math.ceil((date_to - date_from).total_seconds() / size))
+
+    buckets = {}
+    for row in _bucket_rows(queryset, time_field, fields, date_from, date_to, size, series_field):
+        buckets.setdefault(min(row['bucket'], count - 1), {})[row.get(series_field)] = row
+
+    carried = {row.get(series_field): row for row in _seed_rows(queryset, time_field, fields, date_from, series_field)}
+    previous = {field: sum(row[field] or 0 for row in carried.values()) if carried else None for field in fields}
+    timeline = []
+    for index in range(count):
+        rows = buckets.get(index, {})
+        for series, row in rows.items():
+            carried[series] = row
+        start = date_from + timedelta(seconds=index * size)
+        point = {
+            'date': start.isoformat() if size < 86400 else timezone.localdate(start).isoformat(),
+            'samples': sum(row['samples'] for row in rows.values()),
+        }
+        stats = {}
+        for field in fields:
+            if not carried:
+                point[field] = None
+                stats[field] = dict.fromkeys(['min', 'max', 'avg', 'change', 'change_percent'])
+                continue
+            # Series without rows in this bucket contribute their last value.
+            last = sum(row[field] or 0 for row in carried.values())
+            summed = {
+                stat: sum((row[f'{field}_{stat}'] if series in rows else row[field]) or 0 for series, row in carried.items())
+                for stat in ('min', 'max', 'avg')
+            }
+            change = last - previous[field] if previous[field] is not None else None
+            point[field] = last
+            stats[field] = {
+                'min': summed['min'],
+                'max': summed['max'],
+                'avg': round(float(summed['avg']), 4),
+                'change': change,
+                'change_percent': round(change / previous[field] * 100, 2) if change is not None and previous[field] else None,
+            }
+            previous[field] = last
+        point['stats'] = stats
+        timeline.append(point)
+    return timeline
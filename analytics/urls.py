@@ -1,12 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import *
+from .instrumentation import metrics_view
 
 router = DefaultRouter()
 router.register(r'social-accounts', SocialMediaAccountViewSet, basename='social-accounts')
 router.register(r'posts', PostViewSet, basename='posts')
 router.register(r'post-metrics', PostMetricsViewSet, basename='post-metrics')
 router.register(r'comments', CommentViewSet, basename='comments')
+router.register(r'ingest', IngestViewSet, basename='ingest')
 router.register(r'hashtags', HashtagViewSet, basename='hashtags')
 router.register(r'audience', AudienceViewSet, basename='audience')
 router.register(r'engagement-patterns', EngagementPatternViewSet, basename='engagement-patterns')
@@ -19,5 +21,6 @@ router.register(r'content-strategies', ContentStrategyViewSet, basename='content
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 from django.db.models import Avg, Sum, Count
+from django.db.models.functions import TruncHour, TruncDay, TruncWeek, TruncMonth
 from datetime import timedelta
 from django.utils import timezone
 
@@ -9,19 +10,9 @@ def calculate_engagement_rate(likes, comments, shares, followers):
     return (total_engagement / followers) * 100
 
 def get_trending_hashtags(user, days=30):
-    from .models import Hashtag, Post
+    from .hashtags import trending_hashtags
     
-    date_from = timezone.now() - timedelta(days=days)
-    
-    trending = Hashtag.objects.filter(
-        post_hashtags__post__social_account__user=user,
-        post_hashtags__post__posted_at__gte=date_from
-    ).annotate(
-        usage_count=Count('post_hashtags'),
-        avg_engagement=Avg('post_hashtags__post__metrics__engagement_rate')
-    ).order_by('-usage_count', '-avg_engagement')[:20]
-    
-    return trending
+    return trending_hashtags(user, days=days)
 
 def get_optimal_posting_times(social_account):
     from .models import EngagementPattern
@@ -70,4 +61,97 @@ def generate_content_recommendations(social_account):
             'suggestion': f'Post more {content_type} content'
         })
     
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+TIMELINE_GRANULARITIES = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+def _bucket_start(value, granularity):
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return value
+    value = value.replace(hour=0)
+    if granularity == 'week':
+        value -= timedelta(days=value.weekday())
+    elif granularity == 'month':
+        value = value.replace(day=1)
+    return value
+
+def _next_bucket(value, granularity):
+    if granularity == 'hour':
+        return value + timedelta(hours=1)
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(weeks=1)
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+TIMELINE_TOTALS = ['posts_count', 'total_likes', 'total_comments', 'total_shares', 'total_reach',
+                   'engagement_sum', 'engagement_count']
+
+def build_post_timeline(queryset, date_from, date_to=None, granularity='day', tzinfo=None):
+    from .audience import FollowerHistory
+    
+    tzinfo = tzinfo or timezone.get_current_timezone()
+    date_to = date_to or timezone.now()
+    trunc = TIMELINE_GRANULARITIES[granularity]
+    
+    rows = queryset.filter(
+        posted_at__gte=date_from,
+        posted_at__lte=date_to
+    ).annotate(
+        bucket=trunc('posted_at', tzinfo=tzinfo)
+    ).values('bucket', 'social_account_id').annotate(
+        posts_count=Count('id'),
+        total_likes=Sum('current_metrics__likes_count'),
+        total_comments=Sum('current_metrics__comments_count'),
+        total_shares=Sum('current_metrics__shares_count'),
+        total_reach=Sum('current_metrics__reach'),
+        engagement_sum=Sum('current_metrics__engagement_rate'),
+        engagement_count=Count('current_metrics__engagement_rate')
+    ).order_by('bucket')
+    
+    buckets = {}
+    for row in rows:
+        key = _bucket_start(timezone.localtime(row['bucket'], tzinfo).replace(tzinfo=None), granularity)
+        bucket = buckets.setdefault(key, dict.fromkeys(TIMELINE_TOTALS, 0))
+        for field in TIMELINE_TOTALS:
+            bucket[field] += row[field] or 0
+        bucket.setdefault('accounts', set()).add(row['social_account_id'])
+    
+    # Follower counts as they were at the end of each bucket, not today's.
+    account_ids = set().union(*(bucket['accounts'] for bucket in buckets.values()))
+    followers = FollowerHistory.load(account_ids, start=date_from, end=date_to)
+    
+    timeline = []
+    current = _bucket_start(timezone.localtime(date_from, tzinfo).replace(tzinfo=None), granularity)
+    end = timezone.localtime(date_to, tzinfo).replace(tzinfo=None)
+    
+    while current <= end:
+        row = buckets.get(current, {})
+        label = timezone.make_aware(current, tzinfo).isoformat() if granularity == 'hour' else current.date().isoformat()
+        as_of = min(timezone.make_aware(_next_bucket(current, granularity), tzinfo), date_to)
+        # Engagement per follower of the accounts that posted in the bucket.
+        posting_followers = followers.total_at(row.get('accounts', ()), as_of)
+        timeline.append({
+            'date': label,
+            'posts_count': row.get('posts_count', 0),
+            'total_likes': row.get('total_likes', 0),
+            'total_comments': row.get('total_comments', 0),
+            'total_shares': row.get('total_shares', 0),
+            'total_reach': row.get('total_reach', 0),
+            'avg_engagement_rate': row['engagement_sum'] / row['engagement_count'] if row.get('engagement_count') else 0,
+            'followers': followers.total_at(account_ids, as_of),
+            'follower_engagement_rate': calculate_engagement_rate(
+                row.get('total_likes', 0), row.get('total_comments', 0), row.get('total_shares', 0), posting_followers
+            ),
+        })
+        current = _next_bucket(current, granularity)
+    
+    return timeline
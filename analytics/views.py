@@ -1,13 +1,27 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Avg, Sum, Count, Q, F, Max, Min
 from django.utils import timezone
 from datetime import timedelta
 from .models import *
 from .serializers import *
+from .utils import TIMELINE_GRANULARITIES, build_post_timeline
+from .audience import merge_demographics
+from .timeseries import downsample
+from .rollups import rollup_totals
+from .hashtags import stat_keys, sync_hashtag_stats, trending_hashtags
+from .heatmap import AVERAGE_FIELDS, DAY_NAMES, confidence, grid_rows, load_heatmap, ranked_patterns, ranked_slots
+from .cache import cached_action, get_cache_stats, bump_generation
+from .ingest import RECORD_TYPES, ingest_stream
+from .exports import StreamingExportMixin
+from .filters import AliasedOrderingFilter, PostFilter, PostMetricsFilter
+from .tasks import generate_report, sync_social_account
+from .search import FullTextSearchFilter
+from .nlq import QueryError, run_query
+from .pagination import PostCursorPagination, PostMetricsCursorPagination, CommentCursorPagination
 from accounts.models import SocialMediaAccount
 
 class SocialMediaAccountViewSet(viewsets.ModelViewSet):
@@ -26,51 +40,78 @@ class SocialMediaAccountViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def sync(self, request, pk=None):
         account = self.get_object()
+        sync_social_account.delay(account.id)
         return Response({'status': 'sync initiated', 'account_id': account.id})
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def overview(self, request):
-        accounts = self.get_queryset()
+        accounts = self.get_queryset().select_related('current_audience')
+        totals = rollup_totals(request.user, group_by='social_account')
         overview_data = []
         
         for account in accounts:
-            latest_audience = account.audience.order_by('-recorded_at').first()
-            posts_count = account.posts.count()
-            
-            total_metrics = PostMetrics.objects.filter(
-                post__social_account=account
-            ).aggregate(
-                total_likes=Sum('likes_count'),
-                total_comments=Sum('comments_count'),
-                total_shares=Sum('shares_count'),
-                avg_engagement=Avg('engagement_rate')
-            )
+            current_audience = getattr(account, 'current_audience', None)
+            account_totals = totals.get(account.id, {})
             
             overview_data.append({
                 'account_id': account.id,
                 'platform': account.platform,
                 'username': account.account_username,
-                'followers': latest_audience.followers_count if latest_audience else 0,
-                'posts_count': posts_count,
-                'total_likes': total_metrics['total_likes'] or 0,
-                'total_comments': total_metrics['total_comments'] or 0,
-                'total_shares': total_metrics['total_shares'] or 0,
-                'avg_engagement_rate': total_metrics['avg_engagement'] or 0,
+                'followers': current_audience.followers_count if current_audience else 0,
+                'posts_count': account_totals.get('posts_count', 0),
+                'total_likes': account_totals.get('total_likes', 0),
+                'total_comments': account_totals.get('total_comments', 0),
+                'total_shares': account_totals.get('total_shares', 0),
+                'avg_engagement_rate': account_totals.get('avg_engagement_rate', 0),
             })
         
         return Response(overview_data)
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['content_type', 'social_account__platform', 'social_account']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, AliasedOrderingFilter]
+    filterset_class = PostFilter
+    pagination_class = PostCursorPagination
     search_fields = ['caption', 'post_id']
-    ordering_fields = ['posted_at', 'metrics__engagement_rate', 'metrics__likes_count']
+    trigram_search_fields = ['post_id']
+    # Ordering through metrics (one row per snapshot) repeated each post.
+    ordering_fields = ['posted_at', 'current_metrics__engagement_rate', 'current_metrics__likes_count']
+    ordering_aliases = {
+        'metrics__engagement_rate': 'current_metrics__engagement_rate',
+        'metrics__likes_count': 'current_metrics__likes_count',
+    }
     ordering = ['-posted_at']
+    export_filename = 'posts'
+    export_fields = {
+        'id': 'id',
+        'post_id': 'post_id',
+        'platform': 'social_account__platform',
+        'account_username': 'social_account__account_username',
+        'content_type': 'content_type',
+        'caption': 'caption',
+        'media_url': 'media_url',
+        'thumbnail_url': 'thumbnail_url',
+        'posted_at': 'posted_at',
+        'likes_count': 'current_metrics__likes_count',
+        'comments_count': 'current_metrics__comments_count',
+        'shares_count': 'current_metrics__shares_count',
+        'saves_count': 'current_metrics__saves_count',
+        'views_count': 'current_metrics__views_count',
+        'reach': 'current_metrics__reach',
+        'impressions': 'current_metrics__impressions',
+        'engagement_rate': 'current_metrics__engagement_rate',
+        'metrics_recorded_at': 'current_metrics__recorded_at',
+    }
     
     def get_queryset(self):
-        return Post.objects.filter(social_account__user=self.request.user).select_related('social_account').prefetch_related('metrics')
+        return Post.objects.filter(social_account__user=self.request.user).select_related('social_account', 'current_metrics')
+    
+    def perform_destroy(self, instance):
+        keys = stat_keys([instance.id])
+        instance.delete()
+        sync_hashtag_stats(keys=keys)
     
     @action(detail=False, methods=['get'])
     def top_performing(self, request):
@@ -80,7 +121,10 @@ class PostViewSet(viewsets.ModelViewSet):
         platform = request.query_params.get('platform')
         
         date_from = timezone.now() - timedelta(days=days)
-        queryset = self.get_queryset().filter(posted_at__gte=date_from)
+        queryset = self.get_queryset().filter(
+            posted_at__gte=date_from,
+            current_metrics__isnull=False
+        )
         
         if content_type:
             queryset = queryset.filter(content_type=content_type)
@@ -88,22 +132,13 @@ class PostViewSet(viewsets.ModelViewSet):
         if platform:
             queryset = queryset.filter(social_account__platform=platform)
         
-        posts_with_metrics = []
-        for post in queryset:
-            latest_metric = post.metrics.first()
-            if latest_metric:
-                posts_with_metrics.append({
-                    'post': post,
-                    'engagement_rate': latest_metric.engagement_rate
-                })
-        
-        posts_with_metrics.sort(key=lambda x: x['engagement_rate'], reverse=True)
-        top_posts = [item['post'] for item in posts_with_metrics[:limit]]
+        top_posts = queryset.order_by('-current_metrics__engagement_rate')[:limit]
         
         serializer = self.get_serializer(top_posts, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def content_comparison(self, request):
         days = int(request.query_params.get('days', 30))
         platform = request.query_params.get('platform')
@@ -136,46 +171,21 @@ class PostViewSet(viewsets.ModelViewSet):
     def timeline_analytics(self, request):
         days = int(request.query_params.get('days', 30))
         platform = request.query_params.get('platform')
+        granularity = request.query_params.get('granularity', 'day')
         date_from = timezone.now() - timedelta(days=days)
         
-        queryset = Post.objects.filter(
-            social_account__user=request.user,
-            posted_at__gte=date_from
-        )
+        if granularity not in TIMELINE_GRANULARITIES:
+            return Response(
+                {'error': f"granularity must be one of {', '.join(TIMELINE_GRANULARITIES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = Post.objects.filter(social_account__user=request.user)
         
         if platform:
             queryset = queryset.filter(social_account__platform=platform)
         
-        timeline_data = []
-        current_date = date_from
-        
-        while current_date <= timezone.now():
-            day_posts = queryset.filter(
-                posted_at__date=current_date.date()
-            )
-            
-            day_metrics = PostMetrics.objects.filter(
-                post__in=day_posts
-            ).aggregate(
-                total_likes=Sum('likes_count'),
-                total_comments=Sum('comments_count'),
-                total_shares=Sum('shares_count'),
-                total_reach=Sum('reach'),
-                avg_engagement=Avg('engagement_rate'),
-                posts_count=Count('post', distinct=True)
-            )
-            
-            timeline_data.append({
-                'date': current_date.date().isoformat(),
-                'posts_count': day_metrics['posts_count'] or 0,
-                'total_likes': day_metrics['total_likes'] or 0,
-                'total_comments': day_metrics['total_comments'] or 0,
-                'total_shares': day_metrics['total_shares'] or 0,
-                'total_reach': day_metrics['total_reach'] or 0,
-                'avg_engagement_rate': day_metrics['avg_engagement'] or 0,
-            })
-            
-            current_date += timedelta(days=1)
+        timeline_data = build_post_timeline(queryset, date_from, granularity=granularity)
         
         return Response(timeline_data)
     
@@ -206,21 +216,68 @@ class PostViewSet(viewsets.ModelViewSet):
             'hashtags': hashtags
         })
 
-class PostMetricsViewSet(viewsets.ModelViewSet):
+class PostMetricsViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     serializer_class = PostMetricsSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['post']
+    filterset_class = PostMetricsFilter
+    pagination_class = PostMetricsCursorPagination
+    export_filename = 'post-metrics'
+    export_fields = {
+        'id': 'id',
+        'post': 'post_id',
+        'post_id': 'post__post_id',
+        'likes_count': 'likes_count',
+        'comments_count': 'comments_count',
+        'shares_count': 'shares_count',
+        'saves_count': 'saves_count',
+        'views_count': 'views_count',
+        'reach': 'reach',
+        'impressions': 'impressions',
+        'engagement_rate': 'engagement_rate',
+        'recorded_at': 'recorded_at',
+    }
     
     def get_queryset(self):
         return PostMetrics.objects.filter(post__social_account__user=self.request.user)
 
+class IngestViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        content_type = request.content_type or ''
+        input_format = request.query_params.get('input_format')
+        record_type = request.query_params.get('type')
+        
+        if not input_format:
+            input_format = 'csv' if 'csv' in content_type else 'ndjson'
+        
+        if input_format not in ('ndjson', 'csv'):
+            return Response({'error': 'input_format must be ndjson or csv'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if input_format == 'csv' and record_type and record_type not in RECORD_TYPES:
+            return Response({'error': f"type must be one of {', '.join(RECORD_TYPES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+            lines = upload
+        else:
+            lines = iter(request.stream.readline, b'') if request.stream else []
+        
+        result = ingest_stream(lines, input_format=input_format, record_type=record_type, user=request.user)
+        return Response(result)
+
 class CommentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    pagination_class = CommentCursorPagination
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ['post']
     search_fields = ['text', 'username']
+    trigram_search_fields = ['username']
     
     def get_queryset(self):
         return Comment.objects.filter(post__social_account__user=self.request.user)
@@ -275,28 +332,19 @@ class HashtagViewSet(viewsets.ReadOnlyModelViewSet):
         ).annotate(usage_count=Count('post_hashtags')).distinct()
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def trending(self, request):
         days = int(request.query_params.get('days', 30))
         limit = int(request.query_params.get('limit', 20))
-        date_from = timezone.now() - timedelta(days=days)
-        
-        trending = Hashtag.objects.filter(
-            post_hashtags__post__social_account__user=request.user,
-            post_hashtags__post__posted_at__gte=date_from
-        ).annotate(
-            usage_count=Count('post_hashtags'),
-            avg_engagement=Avg('post_hashtags__post__metrics__engagement_rate'),
-            total_likes=Sum('post_hashtags__post__metrics__likes_count')
-        ).order_by('-usage_count', '-avg_engagement')[:limit]
         
         result = []
-        for hashtag in trending:
+        for row in trending_hashtags(request.user, days=days, limit=limit):
             result.append({
-                'id': hashtag.id,
-                'tag': hashtag.tag,
-                'usage_count': hashtag.usage_count,
-                'avg_engagement': hashtag.avg_engagement or 0,
-                'total_likes': hashtag.total_likes or 0
+                'id': row['hashtag_id'],
+                'tag': row['tag'],
+                'usage_count': row['usage_count'],
+                'avg_engagement': row['avg_engagement'] or 0,
+                'total_likes': row['likes'] or 0
             })
         
         return Response(result)
@@ -334,43 +382,26 @@ class AudienceViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['social_account']
+    growth_fields = {'followers': 'followers_count', 'following': 'following_count'}
     
     def get_queryset(self):
         return Audience.objects.filter(social_account__user=self.request.user)
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def demographics(self, request):
         account_id = request.query_params.get('account_id')
         
-        queryset = self.get_queryset()
+        current = CurrentAudience.objects.filter(social_account__user=request.user)
         if account_id:
-            queryset = queryset.filter(social_account_id=account_id)
+            current = current.filter(social_account_id=account_id)
         
-        latest_audience = queryset.order_by('-recorded_at').first()
-        
-        if not latest_audience:
+        current = list(current)
+        if not current:
             return Response({'error': 'No audience data found'}, status=status.HTTP_404_NOT_FOUND)
         
-        demographics = {
-            'age_distribution': {
-                '13-17': latest_audience.age_range_13_17,
-                '18-24': latest_audience.age_range_18_24,
-                '25-34': latest_audience.age_range_25_34,
-                '35-44': latest_audience.age_range_35_44,
-                '45-54': latest_audience.age_range_45_54,
-                '55+': latest_audience.age_range_55_plus,
-            },
-            'gender_distribution': {
-                'male': latest_audience.gender_male,
-                'female': latest_audience.gender_female,
-                'other': latest_audience.gender_other,
-            },
-            'top_countries': latest_audience.top_countries,
-            'top_cities': latest_audience.top_cities,
-            'followers_count': latest_audience.followers_count,
-            'following_count': latest_audience.following_count,
-            'recorded_at': latest_audience.recorded_at
-        }
+        # Without an account, every account's audience weighted by followers.
+        demographics = merge_demographics(current)
         
         return Response(demographics)
     
@@ -383,18 +414,17 @@ class AudienceViewSet(viewsets.ReadOnlyModelViewSet):
         if account_id:
             queryset = queryset.filter(social_account_id=account_id)
         
-        date_from = timezone.now() - timedelta(days=days)
-        audience_history = queryset.filter(
-            recorded_at__gte=date_from
-        ).order_by('recorded_at')
-        
-        growth_data = []
-        for audience in audience_history:
-            growth_data.append({
-                'date': audience.recorded_at.date().isoformat(),
-                'followers': audience.followers_count,
-                'following': audience.following_count
-            })
+        # Without an account, the accounts' series are summed.
+        try:
+            growth_data = downsample(
+                queryset, 'recorded_at', self.growth_fields,
+                date_from=timezone.now() - timedelta(days=days),
+                points=request.query_params.get('points'),
+                bucket=request.query_params.get('bucket'),
+                series_field='social_account_id'
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(growth_data)
 
@@ -416,34 +446,23 @@ class EngagementPatternViewSet(viewsets.ReadOnlyModelViewSet):
         if account_id:
             queryset = queryset.filter(social_account_id=account_id)
         
-        optimal = queryset.order_by('-avg_engagement_rate')[:limit]
+        optimal = ranked_patterns(queryset)[:limit]
         
         serializer = self.get_serializer(optimal, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def heatmap(self, request):
         account_id = request.query_params.get('account_id')
         
-        queryset = self.get_queryset()
-        if account_id:
-            queryset = queryset.filter(social_account_id=account_id)
+        grid = load_heatmap(request.user, account_id)
         
-        heatmap_data = {}
-        for pattern in queryset:
-            day = pattern.day_of_week
-            hour = pattern.hour_of_day
-            
-            if day not in heatmap_data:
-                heatmap_data[day] = {}
-            
-            heatmap_data[day][hour] = {
-                'engagement_rate': pattern.avg_engagement_rate,
-                'likes': pattern.avg_likes,
-                'comments': pattern.avg_comments,
-                'shares': pattern.avg_shares,
-                'post_count': pattern.post_count
-            }
+        # Each field is a 7x24 array indexed [day_of_week][hour_of_day].
+        heatmap_data = {field: grid_rows([round(value, 4) for value in grid[field]]) for field in AVERAGE_FIELDS}
+        heatmap_data['post_count'] = grid_rows(grid['post_count'])
+        heatmap_data['confidence'] = grid_rows([round(confidence(count), 3) for count in grid['post_count']])
+        heatmap_data['days'] = DAY_NAMES
         
         return Response(heatmap_data)
     
@@ -452,22 +471,17 @@ class EngagementPatternViewSet(viewsets.ReadOnlyModelViewSet):
         account_id = request.query_params.get('account_id')
         posts_per_week = int(request.query_params.get('posts_per_week', 7))
         
-        queryset = self.get_queryset()
-        if account_id:
-            queryset = queryset.filter(social_account_id=account_id)
-        
-        top_slots = queryset.order_by('-avg_engagement_rate')[:posts_per_week]
+        grid = load_heatmap(request.user, account_id)
         
         schedule = []
-        days_map = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
-        
-        for slot in top_slots:
+        for slot in ranked_slots(grid)[:posts_per_week]:
             schedule.append({
-                'day': days_map[slot.day_of_week],
-                'hour': slot.hour_of_day,
-                'expected_engagement_rate': slot.avg_engagement_rate,
-                'avg_likes': slot.avg_likes,
-                'avg_comments': slot.avg_comments
+                'day': DAY_NAMES[slot['day_of_week']],
+                'hour': slot['hour_of_day'],
+                'expected_engagement_rate': slot['avg_engagement_rate'],
+                'avg_likes': slot['avg_likes'],
+                'avg_comments': slot['avg_comments'],
+                'confidence': slot['confidence']
             })
         
         return Response(schedule)
@@ -496,6 +510,7 @@ class AIInsightViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         self.get_queryset().update(is_read=True)
+        bump_generation([request.user.id])
         return Response({'status': 'all insights marked as read'})
 
 class QueryViewSet(viewsets.ModelViewSet):
@@ -515,20 +530,21 @@ class QueryViewSet(viewsets.ModelViewSet):
         if not query_text:
             return Response({'error': 'query_text is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        start_time = timezone.now()
+        try:
+            result = run_query(request.user, query_text)
+        except QueryError as exc:
+            Query.objects.create(user=request.user, query_text=query_text, response=str(exc))
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        response_data = {
-            'query': query_text,
-            'results': [],
-            'message': 'Query processed successfully'
-        }
+        response_data = dict(result, query=query_text)
         
         Query.objects.create(
             user=request.user,
             query_text=query_text,
-            response=response_data['message'],
+            response=result['message'],
             response_data=response_data,
-            execution_time=(timezone.now() - start_time).total_seconds()
+            execution_time=result['timings']['total_ms'] / 1000,
+            timings=result['timings']
         )
         
         return Response(response_data)
@@ -550,8 +566,11 @@ class ReportViewSet(viewsets.ModelViewSet):
     def generate(self, request, pk=None):
         report = self.get_object()
         report.status = 'processing'
+        report.progress = 0
         report.save()
         
+        generate_report.delay(report.id)
+        
         return Response({'status': 'report generation started', 'report_id': report.id})
     
     @action(detail=True, methods=['get'])
@@ -572,9 +591,10 @@ class CompetitorViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['platform', 'is_active']
     search_fields = ['account_username']
+    growth_fields = {'followers': 'followers_count', 'posts': 'posts_count', 'avg_engagement': 'avg_engagement_rate'}
     
     def get_queryset(self):
-        return Competitor.objects.filter(user=self.request.user)
+        return Competitor.objects.filter(user=self.request.user).select_related('latest_metrics')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -591,7 +611,7 @@ class CompetitorViewSet(viewsets.ModelViewSet):
         comparison_data = []
         
         for competitor in competitors:
-            latest_metrics = competitor.metrics.order_by('-recorded_at').first()
+            latest_metrics = competitor.latest_metrics
             
             if latest_metrics:
                 comparison_data.append({
@@ -612,20 +632,16 @@ class CompetitorViewSet(viewsets.ModelViewSet):
     def growth_trend(self, request, pk=None):
         competitor = self.get_object()
         days = int(request.query_params.get('days', 30))
-        date_from = timezone.now() - timedelta(days=days)
         
-        metrics_history = competitor.metrics.filter(
-            recorded_at__gte=date_from
-        ).order_by('recorded_at')
-        
-        trend_data = []
-        for metrics in metrics_history:
-            trend_data.append({
-                'date': metrics.recorded_at.date().isoformat(),
-                'followers': metrics.followers_count,
-                'posts': metrics.posts_count,
-                'avg_engagement': metrics.avg_engagement_rate
-            })
+        try:
+            trend_data = downsample(
+                competitor.metrics.all(), 'recorded_at', self.growth_fields,
+                date_from=timezone.now() - timedelta(days=days),
+                points=request.query_params.get('points'),
+                bucket=request.query_params.get('bucket')
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(trend_data)
 
@@ -693,34 +709,18 @@ class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def overview(self, request):
         user = request.user
         days = int(request.query_params.get('days', 30))
-        date_from = timezone.now() - timedelta(days=days)
         
         total_accounts = SocialMediaAccount.objects.filter(user=user).count()
         
-        total_posts = Post.objects.filter(
-            social_account__user=user,
-            posted_at__gte=date_from
-        ).count()
-        
-        metrics_aggregate = PostMetrics.objects.filter(
-            post__social_account__user=user,
-            recorded_at__gte=date_from
-        ).aggregate(
-            total_likes=Sum('likes_count'),
-            total_comments=Sum('comments_count'),
-            total_shares=Sum('shares_count'),
-            total_reach=Sum('reach'),
-            avg_engagement=Avg('engagement_rate')
-        )
+        metrics_aggregate = rollup_totals(user, days=days)
         
-        latest_audience = Audience.objects.filter(
+        total_followers = CurrentAudience.objects.filter(
             social_account__user=user
-        ).order_by('-recorded_at').first()
-        
-        total_followers = latest_audience.followers_count if latest_audience else 0
+        ).aggregate(total=Sum('followers_count'))['total'] or 0
         
         unread_insights = AIInsight.objects.filter(
             user=user,
@@ -730,49 +730,44 @@ class DashboardViewSet(viewsets.ViewSet):
         overview_data = {
             'period_days': days,
             'total_accounts': total_accounts,
-            'total_posts': total_posts,
+            'total_posts': metrics_aggregate['posts_count'],
             'total_followers': total_followers,
-            'total_likes': metrics_aggregate['total_likes'] or 0,
-            'total_comments': metrics_aggregate['total_comments'] or 0,
-            'total_shares': metrics_aggregate['total_shares'] or 0,
-            'total_reach': metrics_aggregate['total_reach'] or 0,
-            'avg_engagement_rate': metrics_aggregate['avg_engagement'] or 0,
+            'total_likes': metrics_aggregate['total_likes'],
+            'total_comments': metrics_aggregate['total_comments'],
+            'total_shares': metrics_aggregate['total_shares'],
+            'total_reach': metrics_aggregate['total_reach'],
+            'avg_engagement_rate': metrics_aggregate['avg_engagement_rate'],
             'unread_insights': unread_insights
         }
         
         return Response(overview_data)
     
     @action(detail=False, methods=['get'])
+    @cached_action
     def platform_breakdown(self, request):
         user = request.user
         days = int(request.query_params.get('days', 30))
-        date_from = timezone.now() - timedelta(days=days)
         
         platforms = SocialMediaAccount.objects.filter(user=user).values_list('platform', flat=True).distinct()
+        totals = rollup_totals(user, days=days, group_by='platform')
         
         breakdown = []
         
         for platform in platforms:
-            posts = Post.objects.filter(
-                social_account__user=user,
-                social_account__platform=platform,
-                posted_at__gte=date_from
-            )
+            metrics = totals.get(platform, {})
             
-            metrics = PostMetrics.objects.filter(post__in=posts).aggregate(
-                total_likes=Sum('likes_count'),
-                total_comments=Sum('comments_count'),
-                total_shares=Sum('shares_count'),
-                avg_engagement=Avg('engagement_rate'),
-                total_reach=Sum('reach')
-            )
-
             breakdown.append({
                 'platform': platform,
-                'posts_count': posts.count(),
-                'total_likes': metrics['total_likes'] or 0,
-                'total_comments': metrics['total_comments'] or 0,
-                'total_shares': metrics['total_shares'] or 0,
-                'avg_engagement_rate': metrics['avg_engagement'] or 0,
-                'total_reach': metrics['total_reach'] or 0
-            })
\ No newline at end of file
+                'posts_count': metrics.get('posts_count', 0),
+                'total_likes': metrics.get('total_likes', 0),
+                'total_comments': metrics.get('total_comments', 0),
+                'total_shares': metrics.get('total_shares', 0),
+                'avg_engagement_rate': metrics.get('avg_engagement_rate', 0),
+                'total_reach': metrics.get('total_reach', 0)
+            })
+        
+        return Response(breakdown)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(get_cache_stats())
\ No newline at end of file
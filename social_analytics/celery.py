@@ -1,5 +1,5 @@
 import os
-from social_analytics.celery import Celery
+from celery import Celery
 from celery.schedules import crontab
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_analytics.settings')
@@ -15,14 +15,35 @@ app.conf.beat_schedule = {
     },
     'update-engagement-patterns': {
         'task': 'analytics.tasks.update_engagement_patterns',
-        'schedule': crontab(hour='*/6'),
+        'schedule': crontab(minute='0', hour='*/6'),
+    },
+    'rebuild-engagement-patterns': {
+        'task': 'analytics.tasks.update_engagement_patterns',
+        'schedule': crontab(hour='3', minute='0', day_of_week='sunday'),
+        'kwargs': {'full': True},
     },
     'generate-insights': {
         'task': 'analytics.tasks.generate_ai_insights',
-        'schedule': crontab(hour='0', minute='0'),
+        'schedule': crontab(hour='1', minute='0'),
+    },
+    'update-daily-rollups': {
+        'task': 'analytics.tasks.update_daily_rollups',
+        'schedule': crontab(hour='0', minute='30'),
+    },
+    'rebuild-hashtag-stats': {
+        'task': 'analytics.tasks.rebuild_hashtag_stats',
+        'schedule': crontab(hour='3', minute='30', day_of_week='sunday'),
+    },
+    'score-comment-sentiment': {
+        'task': 'analytics.tasks.score_comment_sentiment',
+        'schedule': crontab(minute='*/15'),
+    },
+    'maintain-post-metrics': {
+        'task': 'analytics.tasks.maintain_post_metrics',
+        'schedule': crontab(hour='4', minute='0'),
     },
     'sync-competitor-data': {
         'task': 'analytics.tasks.sync_competitor_data',
-        'schedule': crontab(hour='*/12'),
+        'schedule': crontab(minute='0', hour='*/12'),
     },
 }
\ No newline at end of file
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -31,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'analytics.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -132,4 +134,28 @@ CACHES = {
         'KEY_PREFIX': 'social_analytics',
         'TIMEOUT': 3600,
     }
-}
\ No newline at end of file
+}
+
+SOCIAL_SYNC = {
+    'BASE_URL': os.getenv('SOCIAL_SYNC_BASE_URL', 'http://localhost:8765'),
+    'MAX_CONNECTIONS': 20,
+    'TIMEOUT': 30,
+    'LOOKBACK_HOURS': 48,
+    'ACCOUNTS_PER_TASK': 200,
+    'RATE_LIMITS': {
+        'instagram': 50,
+        'facebook': 50,
+        'twitter': 15,
+        'linkedin': 10,
+        'youtube': 20,
+        'tiktok': 20,
+    },
+}
+
+INSTRUMENTATION = {
+    'ENABLED': os.getenv('INSTRUMENTATION_ENABLED', 'True') == 'True',
+    # Seconds between pushes of per-process histograms to the shared cache
+    'FLUSH_INTERVAL': 10,
+    # Bearer token accepted by /api/analytics/metrics/ in addition to staff sessions
+    'TOKEN': os.getenv('METRICS_TOKEN'),
+}